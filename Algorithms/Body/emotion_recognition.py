@@ -1,9 +1,19 @@
-"""facial expression/emotion recognition algorithm"""
-from dataclasses import dataclass
+"""
+facial expression/emotion recognition algorithm
+
+With detect_every > 1 the MTCNN face detector only runs every N analysed frames.
+In between the largest face is followed with an OpenCV tracker and only the
+emotion classifier runs, on a crop around the tracked face. face_detector picks
+the detector backend, see face_detectors.py.
+"""
+from dataclasses import dataclass, replace
 from typing import Optional
 import cv2
 import numpy as np
 from fer import FER
+from Algorithms.model_pool import ModelPool
+from Algorithms.Body.face_detectors import MtcnnFaceDetector, create_face_detector
+from Sensors.capture import CameraBroker, Frame
 
 @dataclass
 class EmotionResult:
@@ -11,56 +21,189 @@ class EmotionResult:
     main_frame: np.ndarray
     emotion_text: str
 
+@dataclass
+class EmotionAnalysis:
+    """face boxes found in a frame and the emotion of the largest face"""
+    face_boxes: list
+    largest_box: Optional[tuple]
+    emotion_text: str
+
+def warm_up_fer(detector):
+    """run face detection and the emotion classifier once on a blank frame"""
+    blank = np.zeros((540, 960, 3), dtype=np.uint8)
+    detector.detect_emotions(blank)  # MTCNN only, a blank frame has no faces
+    detector.detect_emotions(blank, face_rectangles=[(0, 0, 64, 64)])  # emotion classifier
+
+def warm_up_face_detector(face_detector):
+    """run a face detector backend once on a blank frame"""
+    face_detector.detect(np.zeros((540, 960, 3), dtype=np.uint8))
+
+def create_tracker(name="KCF"):
+    """OpenCV single object tracker by name, e.g. KCF, MOSSE, CSRT or MIL"""
+    for module in (cv2, getattr(cv2, "legacy", None)):  # MOSSE only exists in cv2.legacy
+        factory = getattr(module, f"Tracker{name}_create", None)
+        if factory is not None:
+            return factory()
+    raise ValueError(f"OpenCV tracker {name} is not available, is opencv-contrib installed?")
+
+def largest(boxes):
+    """largest (x, y, w, h) box, None for no boxes"""
+    return max(boxes, key=lambda box: box[2] * box[3], default=None)
+
 class EmotionRecogniser:
     """
     Emotion recogniser class called by the UI
     """
-    def __init__(self):
-        self.detector = FER(mtcnn=True)
-        self.cap = cv2.VideoCapture(0)
+    def __init__(self, detect_every=1, tracker="KCF", camera_index=0, face_detector="mtcnn"):
+        pool = ModelPool.shared()
+        mtcnn = face_detector == "mtcnn"
+        self.pool_keys = []
+        if not mtcnn:  # first, so missing weights fail before FER is loaded
+            face_key = ("face", face_detector)
+            self.face_detector = pool.acquire(face_key,
+                                              lambda: create_face_detector(face_detector),
+                                              warm_up_face_detector)
+            self.pool_keys.append(face_key)
+        # FER without MTCNN only loads a Haar cascade next to the emotion classifier
+        fer_key = ("fer", "mtcnn" if mtcnn else "haar")
+        self.detector = pool.acquire(fer_key, lambda: FER(mtcnn=mtcnn), warm_up_fer)
+        self.pool_keys.append(fer_key)
+        if mtcnn:
+            self.face_detector = MtcnnFaceDetector(self.detector)
+        self.detect_every = detect_every  # run face detection every N analysed frames
+        self.tracker_name = tracker  # OpenCV tracker following the face in between
+        self.tracker = None
+        self.tracked_box = None
+        self.frames_since_detection = 0
+        # camera_index None analyses frames passed in, e.g. from a video file
+        self.source = None
+        if camera_index is not None:
+            self.source = CameraBroker.shared().subscribe(camera_index)
+        self.last_seq = -1
 
-    def process_frame(self) -> Optional[EmotionResult]:
-        """Process the input and return the relevant emotion"""
-        ret, frame = self.cap.read()
-        if not ret:
+    def read_frame(self) -> Optional[Frame]:
+        """Return the newest camera frame resized for analysis, None if no new frame arrived"""
+        latest = self.source.read(self.last_seq)
+        if latest is None:
             return None
+        self.last_seq = latest.seq
+        return replace(latest, image=cv2.resize(latest.image, (960, 540)))
+
+    def analyse(self, frame) -> EmotionAnalysis:
+        """Detect faces and the dominant emotion of the largest one, safe to call off the UI thread"""
+        if self.detect_every > 1:
+            return self._analyse_tracked(frame)
+        faces = self.face_detector.detect(frame)
+        if not faces:
+            return EmotionAnalysis(face_boxes=[], largest_box=None, emotion_text="Unknown")
+        return self._emotion_analysis(self.detector.detect_emotions(frame, face_rectangles=faces))
+
+    def _analyse_tracked(self, frame) -> EmotionAnalysis:
+        """detect faces every detect_every frames, track the largest one in between"""
+        box = None
+        if self.tracker is not None and self.frames_since_detection < self.detect_every - 1:
+            found, tracked = self.tracker.update(frame)
+            box = tuple(int(v) for v in tracked) if found else None
+            if box is not None and not self._inside(box, frame):
+                box = None  # the face left the frame, find it again
+            self.frames_since_detection += 1
+
+        face_boxes = [box] if box is not None else []
+        if box is None:
+            face_boxes = self.face_detector.detect(frame)
+            box = largest(face_boxes)
+            self.frames_since_detection = 0
+            self.tracker = None
+            if box is not None:
+                self.tracker = create_tracker(self.tracker_name)
+                x, y, w, h = box
+                x, y = max(0, x), max(0, y)  # MTCNN boxes can start outside the frame
+                self.tracker.init(frame, (x, y, min(w, frame.shape[1] - x),
+                                          min(h, frame.shape[0] - y)))
+        self.tracked_box = box
+        if box is None:
+            return EmotionAnalysis(face_boxes=[], largest_box=None, emotion_text="Unknown")
 
-        frame = cv2.resize(frame, (960, 540))
-
-        emotion_data = self.detector.detect_emotions(frame)
-        dominant_emotion = "Neutral"
-
-        if emotion_data:
-            try:
-                # Find the largest face
-                largest_face = max(emotion_data, key=lambda x: x['box'][2] * x['box'][3])
-                emotions = largest_face["emotions"]
-                dominant_emotion = max(emotions, key=emotions.get)
-                largest_box = largest_face["box"]
-
-                for face in emotion_data:
-                    x, y, w, h = face["box"]
-                    if face == largest_face:
-                        # Green box for the largest face
-                        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                        # Display emotion
-                        cv2.putText(frame, f"Emotion: {dominant_emotion}",
-                                    (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1,
-                                    (255, 255, 255), 2)
-                    else:
-                        # Red box for other faces
-                        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
-
-            except Exception as e:
-                print(f"Error processing emotion data: {e}")
-                dominant_emotion = "Unknown"
-        else:
-            dominant_emotion = "Unknown"
-
-        return EmotionResult(main_frame=frame, emotion_text=dominant_emotion)
+        emotion_data = self.classify_face(frame, box)
+        analysis = self._emotion_analysis(emotion_data)
+        # Keep every detected face on screen, the emotion belongs to the largest
+        return replace(analysis, face_boxes=face_boxes,
+                       largest_box=box if analysis.largest_box else None)
+
+    @staticmethod
+    def _inside(box, frame):
+        """True if a box is non-empty and mostly inside the frame"""
+        x, y, w, h = box
+        height, width = frame.shape[:2]
+        return w > 0 and h > 0 and x + w / 2 > 0 and y + h / 2 > 0 \
+            and x + w / 2 < width and y + h / 2 < height
+
+    def classify_face(self, frame, box):
+        """Run only the emotion classifier on a crop around one (x, y, w, h) face box"""
+        x, y, w, h = box
+        margin = max(w, h) // 2  # room for FER's square crop and offsets
+        x1, y1 = max(0, x - margin), max(0, y - margin)
+        x2, y2 = min(frame.shape[1], x + w + margin), min(frame.shape[0], y + h + margin)
+        crop = frame[y1:y2, x1:x2]
+        emotion_data = self.detector.detect_emotions(crop,
+                                                     face_rectangles=[(x - x1, y - y1, w, h)])
+        for face in emotion_data:
+            face["box"] = box  # back to frame coordinates
+        return emotion_data
+
+    def _emotion_analysis(self, emotion_data) -> EmotionAnalysis:
+        """largest face and its dominant emotion from FER output"""
+        if not emotion_data:
+            return EmotionAnalysis(face_boxes=[], largest_box=None, emotion_text="Unknown")
+
+        face_boxes = [tuple(face["box"]) for face in emotion_data]
+        try:
+            # Find the largest face
+            largest_face = max(emotion_data, key=lambda x: x['box'][2] * x['box'][3])
+            emotions = largest_face["emotions"]
+            dominant_emotion = max(emotions, key=emotions.get)
+            largest_box = tuple(largest_face["box"])
+        except Exception as e:
+            print(f"Error processing emotion data: {e}")
+            return EmotionAnalysis(face_boxes=face_boxes, largest_box=None,
+                                   emotion_text="Unknown")
+
+        return EmotionAnalysis(face_boxes=face_boxes, largest_box=largest_box,
+                               emotion_text=dominant_emotion)
+
+    def draw(self, frame, analysis: Optional[EmotionAnalysis]) -> EmotionResult:
+        """Draw the face boxes and emotion of an analysis onto the frame"""
+        if analysis is None:
+            return EmotionResult(main_frame=frame, emotion_text="Unknown")
+
+        for box in analysis.face_boxes:
+            x, y, w, h = box
+            if box == analysis.largest_box:
+                # Green box for the largest face
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                # Display emotion
+                cv2.putText(frame, f"Emotion: {analysis.emotion_text}",
+                            (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1,
+                            (255, 255, 255), 2)
+            else:
+                # Red box for other faces
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
+
+        return EmotionResult(main_frame=frame, emotion_text=analysis.emotion_text)
+
+    def process_frame(self) -> Optional[EmotionResult]:
+        """Process the newest camera frame, returns None if no new frame has arrived"""
+        latest = self.read_frame()
+        if latest is None:
+            return None
+        return self.draw(latest.image, self.analyse(latest.image))
 
 
     def release(self):
-        """release resources"""
-        self.cap.release()
+        """release resources, the detector stays warm in the model pool"""
+        if self.source is not None:
+            self.source.release()
+        for key in self.pool_keys:
+            ModelPool.shared().release(key)
+        self.pool_keys = []
         cv2.destroyAllWindows()
@@ -0,0 +1,82 @@
+"""
+Face detector backends for the emotion recogniser
+
+Every backend returns (x, y, w, h) boxes in frame pixels, so the FER emotion
+classifier can run on any of them:
+    mtcnn  FER's MTCNN, the most accurate and the slowest
+    haar   OpenCV's frontal face Haar cascade
+    res10  OpenCV DNN Res10 SSD from deploy.prototxt. The weights are not in the
+           repository: put res10_300x300_ssd_iter_140000.caffemodel (from the
+           OpenCV face detector samples) next to deploy.prototxt.
+"""
+import os
+import cv2
+import numpy as np
+
+RES10_PROTOTXT = 'Algorithms/Body/deploy.prototxt'
+RES10_WEIGHTS = 'Algorithms/Body/res10_300x300_ssd_iter_140000.caffemodel'
+FACE_DETECTORS = ("mtcnn", "haar", "res10")
+
+class MtcnnFaceDetector:
+    """MTCNN through an FER(mtcnn=True) instance"""
+    def __init__(self, fer):
+        self.fer = fer
+
+    def detect(self, frame):
+        """face boxes in a BGR frame"""
+        return [tuple(face) for face in self.fer.find_faces(frame)]
+
+class HaarFaceDetector:
+    """OpenCV Haar cascade with FER's default parameters"""
+    def __init__(self, scale_factor=1.1, min_neighbors=5, min_size=50):
+        self.cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size  # smallest face side in pixels
+
+    def detect(self, frame):
+        """face boxes in a BGR frame"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=self.scale_factor,
+                                              minNeighbors=self.min_neighbors,
+                                              minSize=(self.min_size, self.min_size))
+        return [tuple(int(v) for v in face) for face in faces]
+
+class Res10FaceDetector:
+    """OpenCV DNN ResNet-10 SSD, runs on a 300x300 blob"""
+    def __init__(self, prototxt=RES10_PROTOTXT, weights=RES10_WEIGHTS, conf=0.5,
+                 input_size=300):
+        if not os.path.exists(weights):
+            raise FileNotFoundError(f"Res10 face detector weights not found: {weights}")
+        self.net = cv2.dnn.readNetFromCaffe(prototxt, weights)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.conf = conf  # minimum face confidence
+        self.input_size = input_size
+
+    def detect(self, frame):
+        """face boxes in a BGR frame"""
+        height, width = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(frame, 1.0, (self.input_size, self.input_size),
+                                     (104.0, 177.0, 123.0))  # training mean, BGR
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]  # (n, 7): _, _, conf, x1, y1, x2, y2
+        detections = detections[detections[:, 2] >= self.conf]
+        corners = np.clip(detections[:, 3:7], 0.0, 1.0) * (width, height, width, height)
+        return [(int(x1), int(y1), int(x2 - x1), int(y2 - y1))
+                for x1, y1, x2, y2 in corners if x2 > x1 and y2 > y1]
+
+def res10_available(weights=RES10_WEIGHTS):
+    """True if the Res10 weights have been downloaded"""
+    return os.path.exists(weights)
+
+def create_face_detector(name, fer=None):
+    """Face detector backend by name, mtcnn needs the FER(mtcnn=True) instance"""
+    if name == "mtcnn":
+        return MtcnnFaceDetector(fer)
+    if name == "haar":
+        return HaarFaceDetector()
+    if name == "res10":
+        return Res10FaceDetector()
+    raise ValueError(f"Unknown face detector: {name}, choose from {FACE_DETECTORS}")
@@ -1,4 +1,13 @@
-"""Hand Gesture Recogniziton using Googles MediaPipe, followed the documentation provided"""
+"""
+Hand Gesture Recogniziton using Googles MediaPipe, followed the documentation provided
+
+running_mode "image" recognises every frame from scratch, "video" and
+"live_stream" let MediaPipe track hands between frames instead of rerunning palm
+detection. live_stream is asynchronous: analyse_async() returns straight away
+and the result arrives on MediaPipe's thread through on_result(seq, hands).
+"""
+import threading
+import time
 from dataclasses import dataclass
 from typing import Optional
 import cv2
@@ -6,6 +15,10 @@ import mediapipe as mp
 import numpy as np
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
+from Algorithms.model_pool import ModelPool
+from Sensors.capture import CameraBroker, Frame
+
+GESTURE_MODEL = 'Algorithms/Body/gesture_recognizer.task'
 
 @dataclass
 class GestureResult:
@@ -14,34 +27,134 @@ class GestureResult:
     left_label: str
     right_label: str
 
+RUNNING_MODES = {
+    "image": vision.RunningMode.IMAGE,
+    "video": vision.RunningMode.VIDEO,
+    "live_stream": vision.RunningMode.LIVE_STREAM,
+}
+
+def hands_from_result(recognition_result):
+    """(gestures, landmarks) per hand from a MediaPipe result"""
+    if not recognition_result.gestures:
+        return []
+    return list(zip(recognition_result.gestures, recognition_result.hand_landmarks))
+
+class StreamingGestureModel:
+    """
+    MediaPipe recognizer with its timestamps. In LIVE_STREAM mode the result
+    callback is fixed when the recognizer is created, so the pooled model
+    forwards results to whichever recogniser currently listens.
+    """
+    def __init__(self, running_mode="image", num_hands=2):
+        self.running_mode = running_mode
+        self.listener = None  # called with (result, timestamp_ms) in LIVE_STREAM mode
+        self._last_timestamp = -1
+        self._lock = threading.Lock()
+        base_options = python.BaseOptions(model_asset_path=GESTURE_MODEL)
+        options = vision.GestureRecognizerOptions(
+            base_options=base_options, num_hands=num_hands,
+            running_mode=RUNNING_MODES[running_mode],
+            result_callback=self._on_result if running_mode == "live_stream" else None)
+        self.recogniser = vision.GestureRecognizer.create_from_options(options)
+
+    def next_timestamp(self):
+        """monotonically increasing milliseconds, MediaPipe rejects repeats"""
+        with self._lock:
+            self._last_timestamp = max(int(time.monotonic() * 1000), self._last_timestamp + 1)
+            return self._last_timestamp
+
+    def _on_result(self, result, _output_image, timestamp_ms):
+        listener = self.listener
+        if listener is not None:
+            listener(result, timestamp_ms)
+
+    def recognise(self, mp_image):
+        """blocking recognition in IMAGE or VIDEO mode"""
+        if self.running_mode == "video":
+            return self.recogniser.recognize_for_video(mp_image, self.next_timestamp())
+        return self.recogniser.recognize(mp_image)
+
+    def recognise_async(self, mp_image, timestamp):
+        """queue a frame in LIVE_STREAM mode under a timestamp from next_timestamp()"""
+        self.recogniser.recognize_async(mp_image, timestamp)
+
+    def close(self):
+        """free MediaPipe's native resources"""
+        self.recogniser.close()
+
+def to_mp_image(frame):
+    """BGR frame to a MediaPipe RGB image"""
+    return mp.Image(image_format=mp.ImageFormat.SRGB,
+                    data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
 class GestureRecogniser:
     """Gesture Recogniser called by UI"""
-    def __init__(self):
-        self.recogniser = self._setup_recogniser()
-        self.cap = cv2.VideoCapture(0)
+    def __init__(self, running_mode="image", on_result=None):
+        if running_mode not in RUNNING_MODES:
+            raise ValueError(f"Unknown running mode: {running_mode}")
+        self.running_mode = running_mode
+        self.on_result = on_result  # live_stream: called with (seq, hands) on MediaPipe's thread
+        self.pool_key = ("gesture", GESTURE_MODEL, running_mode)
+        self.model = ModelPool.shared().acquire(
+            self.pool_key, lambda: StreamingGestureModel(running_mode), self._warm_up)
+        self._pending = {}  # live_stream: timestamp -> frame sequence number
+        self._pending_lock = threading.Lock()
+        if running_mode == "live_stream":
+            self.model.listener = self._on_live_result
+        self.source = CameraBroker.shared().subscribe(0)
+        self.last_seq = -1
 
-    def _setup_recogniser(self):
-        base_options = python.BaseOptions(
-            model_asset_path='Algorithms/Body/gesture_recognizer.task')
-        options = vision.GestureRecognizerOptions(base_options=base_options, num_hands=2)
-        return vision.GestureRecognizer.create_from_options(options)
+    @staticmethod
+    def _warm_up(model):
+        """first recognition on a blank frame so the first camera frame is not slow"""
+        blank = to_mp_image(np.zeros((480, 640, 3), dtype=np.uint8))
+        if model.running_mode == "live_stream":
+            # Nobody listens yet, the result is discarded
+            model.recognise_async(blank, model.next_timestamp())
+        else:
+            model.recognise(blank)
 
-    def process_frame(self) -> Optional[GestureResult]:
-        """Process input and return relevant hand gesture labels"""
-        ret, frame = self.cap.read()
-        if not ret:
+    def read_frame(self) -> Optional[Frame]:
+        """Return the newest camera frame, None if no new frame has arrived"""
+        latest = self.source.read(self.last_seq)
+        if latest is None:
             return None
+        self.last_seq = latest.seq
+        return latest
 
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
-        recognition_result = self.recogniser.recognize(mp_image)
+    def analyse(self, frame):
+        """Run MediaPipe on a frame and return (gestures, landmarks) per hand, image/video mode"""
+        return hands_from_result(self.model.recognise(to_mp_image(frame)))
 
-        gestures_and_landmarks = []
-        if recognition_result.gestures:
-            for hand_gestures, hand_landmarks in zip(recognition_result.gestures,
-                                                     recognition_result.hand_landmarks):
-                gestures_and_landmarks.append((hand_gestures, hand_landmarks))
+    def analyse_async(self, seq, frame):
+        """
+        Queue a frame in live_stream mode without waiting, its hands are passed
+        to on_result(seq, hands) when MediaPipe finishes. MediaPipe skips frames
+        it has no time for.
+        """
+        # Registered before queueing, the result may arrive before recognize_async returns
+        timestamp = self.model.next_timestamp()
+        with self._pending_lock:
+            self._pending[timestamp] = seq
+        try:
+            self.model.recognise_async(to_mp_image(frame), timestamp)
+        except Exception:
+            with self._pending_lock:
+                self._pending.pop(timestamp, None)
+            raise
 
+    def _on_live_result(self, result, timestamp_ms):
+        with self._pending_lock:
+            seq = self._pending.pop(timestamp_ms, None)
+            # Frames before this one will never get a result, forget them
+            for timestamp in [t for t in self._pending if t < timestamp_ms]:
+                del self._pending[timestamp]
+        if seq is not None and self.on_result is not None:
+            self.on_result(seq, hands_from_result(result))
+
+    def draw(self, frame, gestures_and_landmarks) -> GestureResult:
+        """Draw landmarks onto a copy of the frame and pick the left/right labels"""
+        gestures_and_landmarks = gestures_and_landmarks or []
         frame_with_landmarks = self._draw_landmarks(frame.copy(), gestures_and_landmarks)
         left_label, right_label = self._get_gesture_labels(gestures_and_landmarks)
 
@@ -51,6 +164,13 @@ class GestureRecogniser:
             right_label=right_label
         )
 
+    def process_frame(self) -> Optional[GestureResult]:
+        """Process the newest camera frame in image/video mode, None if no new frame arrived"""
+        latest = self.read_frame()
+        if latest is None:
+            return None
+        return self.draw(latest.image, self.analyse(latest.image))
+
     def _get_gesture_labels(self, gestures_and_landmarks):
         labels = ["", ""]  # Default empty labels
         sorted_hands = sorted(gestures_and_landmarks, key=lambda x: x[1][0].x)
@@ -74,6 +194,11 @@ class GestureRecogniser:
         return frame
 
     def release(self):
-        """release resources"""
-        self.cap.release()
+        """release resources, the MediaPipe recogniser stays warm in the model pool"""
+        self.source.release()
+        if self.pool_key is not None:
+            if self.model.listener == self._on_live_result:
+                self.model.listener = None
+            ModelPool.shared().release(self.pool_key)
+            self.pool_key = None
         cv2.destroyAllWindows()
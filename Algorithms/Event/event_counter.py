@@ -0,0 +1,383 @@
+"""
+High speed object counting from event camera events
+
+Events are cut into short time slices (1 ms by default) and each slice is
+clustered on a coarse grid:
+    hashing     every event's cell (cell x cell pixels) is combined with its
+                slice into one key, and np.bincount over a batch of slices
+                gives the events per cell and their x, y and time sums, so
+                the per event work is a few vectorised passes
+    clusters    cells with enough events in a slice are joined with
+                connectedComponentsWithStats on the small cell grid, a
+                cluster's centroid and time are the event weighted means of
+                its cells
+    tracking    clusters continue the track whose predicted position (from its
+                velocity) is nearest, greedily, closest pairs first
+    counting    a track moving from one side of a CountingLine to the other,
+                or into a CountingRegion, is counted once, at the time the
+                straight step between its two observations crosses, so the
+                crossing time has microsecond resolution
+Batches of any size can be given to process(), the unfinished last slice is
+kept for the next call.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+import cv2
+import numpy as np
+
+@dataclass
+class EventCluster:
+    """events of one object in a time slice"""
+    centroid: tuple  # x, y pixels, event weighted
+    box: tuple  # x, y, w, h pixels, whole cells
+    events: int
+    time: float  # mean event timestamp, microseconds
+
+@dataclass
+class Track:
+    """an object followed across slices"""
+    track_id: int
+    centroid: tuple
+    time: float  # microseconds of the latest observation
+    velocity: tuple = (0.0, 0.0)  # pixels per microsecond
+    events: int = 0  # events of the latest observation
+    age: int = 1  # observations
+    missed: int = 0  # slices with events since the latest observation
+    counted: set = field(default_factory=set)  # names of the lines that counted it
+    history: deque = field(default_factory=lambda: deque(maxlen=8))  # (time, x, y)
+
+@dataclass
+class Crossing:
+    """a track counted by a line or region"""
+    name: str  # of the line or region
+    track_id: int
+    time: float  # microseconds
+    direction: int  # 1 forward, -1 backward (regions only count entries, 1)
+
+class CountingLine:
+    """
+    Count tracks crossing the segment from start to end. Forward is from the
+    right to the left of the segment seen from start (y down: for a line from
+    top to bottom, left to right on screen).
+    """
+    def __init__(self, start, end, name="line"):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.name = name
+        self.forward = 0
+        self.backward = 0
+
+    def side(self, point):
+        """signed distance-like value, > 0 on the forward side"""
+        direction = self.end - self.start
+        return direction[1] * (point[0] - self.start[0]) - direction[0] * (point[1] - self.start[1])
+
+    def crossing(self, previous, current):
+        """(fraction of the step from previous to current where it crosses, direction) or None"""
+        before, after = self.side(previous), self.side(current)
+        if (before > 0) == (after > 0) or before == after:
+            return None
+        fraction = before / (before - after)
+        point = np.asarray(previous) + fraction * (np.asarray(current) - np.asarray(previous))
+        direction = self.end - self.start
+        along = np.dot(point - self.start, direction) / np.dot(direction, direction)
+        if not 0 <= along <= 1:
+            return None
+        return fraction, 1 if after > 0 else -1
+
+    def fit_time(self, history):
+        """
+        time a track's recent (time, x, y) observations cross the line, from a
+        straight line fit of their side over time: a single step is as noisy as
+        a slice's centroid, a slow object's crossing time more so
+        """
+        times, xs, ys = np.array(history).T
+        sides = self.side((xs, ys))
+        slope, intercept = np.polyfit(times - times[0], sides, 1)
+        if slope == 0:
+            return None
+        return times[0] + min(max(-intercept / slope, 0.0), times[-1] - times[0])
+
+    def add(self, direction):
+        """count one crossing, forward if direction > 0"""
+        if direction > 0:
+            self.forward += 1
+        else:
+            self.backward += 1
+
+    @property
+    def total(self):
+        """crossings in both directions"""
+        return self.forward + self.backward
+
+    def draw(self, image, colour=(0, 255, 255)):
+        """draw the segment onto a BGR image"""
+        cv2.line(image, tuple(int(v) for v in self.start), tuple(int(v) for v in self.end),
+                 colour, 2)
+
+class CountingRegion:
+    """Count tracks entering the rectangle x, y, w, h"""
+    def __init__(self, x, y, w, h, name="region"):
+        self.box = (x, y, w, h)
+        self.name = name
+        self.forward = 0  # entries
+        self.backward = 0  # always 0, for CountingLine's interface
+
+    def inside(self, point):
+        """whether the (x, y) point lies in the rectangle"""
+        x, y, w, h = self.box
+        return x <= point[0] < x + w and y <= point[1] < y + h
+
+    def crossing(self, previous, current):
+        """(fraction of the step from previous to current where it enters, 1) or None"""
+        if self.inside(previous) or not self.inside(current):
+            return None
+        # Clip the step to the box, the entry is where the last axis comes in
+        x, y, w, h = self.box
+        fraction = 0.0
+        for axis, low, high in ((0, x, x + w), (1, y, y + h)):
+            delta = current[axis] - previous[axis]
+            if delta:
+                fraction = max(fraction, min((low - previous[axis]) / delta,
+                                             (high - previous[axis]) / delta))
+        return min(max(fraction, 0.0), 1.0), 1
+
+    def add(self, _direction):
+        """count one entry, the direction is always 1"""
+        self.forward += 1
+
+    @property
+    def total(self):
+        """entries"""
+        return self.forward
+
+    def draw(self, image, colour=(0, 255, 255)):
+        """draw the rectangle onto a BGR image"""
+        x, y, w, h = self.box
+        cv2.rectangle(image, (x, y), (x + w, y + h), colour, 2)
+
+class EventCounter:
+    """Cluster, track and count objects in a stream of events"""
+    def __init__(self, width, height, lines=(), cell=8, slice_time=1000, min_cell_events=2,
+                 min_cluster_events=20, max_distance=24.0, max_missed=10, slices_per_pass=32):
+        self.width = width
+        self.height = height
+        self.lines = list(lines)  # CountingLines and CountingRegions
+        self.cell = cell  # pixels per grid cell side
+        self.slice_time = slice_time  # microseconds per slice
+        self.min_cell_events = min_cell_events  # a cell with fewer events in a slice is noise
+        self.min_cluster_events = min_cluster_events  # smallest object, events per slice
+        self.max_distance = max_distance  # pixels from a track's predicted position
+        self.max_missed = max_missed  # a lost track is remembered max_missed * slice_time
+        self.slices_per_pass = slices_per_pass  # slices binned with one bincount
+        self.grid = (-(-width // cell), -(-height // cell))  # cells across, down
+        self.tracks = {}  # id -> Track
+        self.crossings = []  # every Crossing so far
+        self.clusters = []  # of the latest slice
+        self.slices = 0  # slices processed
+        self._next_id = 0
+        self._pending = None  # events of the unfinished slice
+        self._mask = np.empty(self.grid[::-1], dtype=np.uint8)
+
+    @property
+    def counts(self):
+        """{name: (forward, backward)} of every line and region"""
+        return {line.name: (line.forward, line.backward) for line in self.lines}
+
+    def process(self, events):
+        """Add time ordered events, returns the new Crossings of the slices they finished"""
+        events = self._inside(events)
+        crossings = []
+        pending, self._pending = self._pending, None
+        if pending is not None and len(pending):
+            # Only the pending slice's own events are joined to it, not the whole batch
+            end = int(np.searchsorted(events["t"], (int(pending["t"][0]) // self.slice_time + 1)
+                                      * self.slice_time))
+            pending = np.concatenate([pending, events[:end]])
+            if end == len(events):
+                self._pending = pending
+                return []
+            crossings = self._process(pending, np.zeros(1, dtype=np.int64))
+            events = events[end:]
+        if not len(events):
+            return crossings
+        starts = self._slice_starts(events["t"])
+        # The newest slice may go on in the next batch
+        self._pending = events[starts[-1]:].copy()
+        return crossings + self._process(events[:starts[-1]], starts[:-1])
+
+    def _inside(self, events):
+        """events within the sensor, outside ones would land in other cells or slices"""
+        if len(events) and (int(events["x"].max()) >= self.width
+                            or int(events["y"].max()) >= self.height):
+            return events[(events["x"] < self.width) & (events["y"] < self.height)]
+        return events
+
+    def flush(self):
+        """Process the unfinished slice too, at the end of a stream"""
+        events, self._pending = self._pending, None
+        if events is None or not len(events):
+            return []
+        return self._process(events, self._slice_starts(events["t"]))
+
+    def _slice_starts(self, times):
+        """index of the first event of every slice with events"""
+        # Searching the slice boundaries avoids dividing every timestamp
+        first, last = int(times[0]) // self.slice_time, int(times[-1]) // self.slice_time
+        bounds = np.arange(first + 1, last + 1, dtype=np.int64) * self.slice_time
+        starts = np.concatenate(([0], np.searchsorted(times, bounds)))
+        # Empty slices start where the next one does, a gap in time costs nothing
+        return starts[np.append(starts[1:] != starts[:-1], True)]
+
+    def _process(self, events, starts):
+        """whole slices, a pass of up to slices_per_pass at a time"""
+        if not len(events):
+            return []
+        crossings = []
+        for first in range(0, len(starts), self.slices_per_pass):
+            last = first + self.slices_per_pass
+            begin = starts[first]
+            end = starts[last] if last < len(starts) else len(events)
+            crossings += self._process_slices(events[begin:end], starts[first:last] - begin)
+        return crossings
+
+    def _process_slices(self, events, starts):
+        """bin a run of whole slices in one pass, then cluster and track each"""
+        columns, rows = self.grid
+        num_cells = columns * rows
+        sizes = np.diff(np.append(starts, len(events)))
+        slice_offset = np.repeat(np.arange(len(starts), dtype=np.int64) * num_cells, sizes)
+        x, y = events["x"], events["y"]
+        keys = slice_offset + (y // self.cell).astype(np.int64) * columns + x // self.cell
+        size = len(starts) * num_cells
+        counts = np.bincount(keys, minlength=size).reshape(len(starts), num_cells)
+        sum_x = np.bincount(keys, weights=x, minlength=size).reshape(len(starts), num_cells)
+        sum_y = np.bincount(keys, weights=y, minlength=size).reshape(len(starts), num_cells)
+        # Times relative to the run's first event keep float64 sums exact
+        origin = int(events["t"][0])
+        sum_t = np.bincount(keys, weights=events["t"] - origin,
+                            minlength=size).reshape(len(starts), num_cells)
+        # End of every slice, tracks age by time as slices without events are never seen
+        ends = (events["t"][starts] // self.slice_time + 1) * self.slice_time
+        crossings = []
+        for index in range(len(starts)):
+            self.clusters = self._clusters(counts[index], sum_x[index], sum_y[index],
+                                           sum_t[index], origin)
+            crossings += self._track(self.clusters, int(ends[index]))
+            self.slices += 1
+        return crossings
+
+    def _clusters(self, counts, sum_x, sum_y, sum_t, origin):
+        """clusters of a slice from its cell sums"""
+        active = np.flatnonzero(counts >= self.min_cell_events)
+        if not len(active):
+            return []
+        mask = self._mask.reshape(-1)
+        mask.fill(0)
+        mask[active] = 255
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(
+            self._mask, connectivity=8, ltype=cv2.CV_16U)
+        label = labels.reshape(-1)[active]
+        events = np.bincount(label, weights=counts[active], minlength=count)
+        keep = np.flatnonzero(events >= self.min_cluster_events)
+        keep = keep[keep > 0]
+        if not len(keep):
+            return []
+        centre_x = np.bincount(label, weights=sum_x[active], minlength=count)[keep] / events[keep]
+        centre_y = np.bincount(label, weights=sum_y[active], minlength=count)[keep] / events[keep]
+        times = np.bincount(label, weights=sum_t[active], minlength=count)[keep] / events[keep]
+        return [EventCluster(centroid=(float(cx), float(cy)),
+                             box=tuple(int(v) * self.cell for v in stats[k, :4]),
+                             events=int(events[k]), time=origin + float(t))
+                for k, cx, cy, t in zip(keep, centre_x, centre_y, times)]
+
+    def _track(self, clusters, now):
+        """match a slice's clusters to tracks, count the steps that cross a line"""
+        # Lost for longer than max_missed slices of time, a track is not continued
+        for track_id in [i for i, t in self.tracks.items()
+                         if now - t.time > self.max_missed * self.slice_time]:
+            del self.tracks[track_id]
+        ids = list(self.tracks)
+        matched, crossings = set(), []
+        assigned = [None] * len(clusters)
+        if ids and clusters:
+            tracks = [self.tracks[i] for i in ids]
+            # Tracks moved on by their velocity to each cluster's time
+            times = np.array([c.time for c in clusters])
+            positions = np.array([c.centroid for c in clusters])
+            starts = np.array([t.centroid for t in tracks])
+            velocities = np.array([t.velocity for t in tracks])
+            elapsed = times[:, None] - np.array([t.time for t in tracks])[None]
+            predicted = starts[None] + velocities[None] * elapsed[..., None]
+            distances = np.linalg.norm(positions[:, None] - predicted, axis=2)
+            for flat in np.argsort(distances, axis=None):
+                row, col = divmod(int(flat), len(ids))
+                if distances[row, col] > self.max_distance:
+                    break
+                if assigned[row] is not None or ids[col] in matched:
+                    continue
+                assigned[row] = ids[col]
+                matched.add(ids[col])
+        for cluster, track_id in zip(clusters, assigned):
+            if track_id is None:
+                track = Track(self._next_id, cluster.centroid, cluster.time, events=cluster.events)
+                track.history.append((cluster.time, *cluster.centroid))
+                self.tracks[self._next_id] = track
+                self._next_id += 1
+                continue
+            track = self.tracks[track_id]
+            track.history.append((cluster.time, *cluster.centroid))
+            crossings += self._count(track, cluster)
+            elapsed = cluster.time - track.time
+            if elapsed > 0:
+                velocity = ((cluster.centroid[0] - track.centroid[0]) / elapsed,
+                            (cluster.centroid[1] - track.centroid[1]) / elapsed)
+                # Smoothed, a slice's centroid jitters by a pixel or so
+                weight = 0.5 if track.age > 1 else 1.0
+                track.velocity = tuple(old + weight * (new - old)
+                                       for old, new in zip(track.velocity, velocity))
+            track.centroid, track.time, track.events = cluster.centroid, cluster.time, \
+                cluster.events
+            track.age += 1
+            track.missed = 0
+        for track_id in ids:
+            if track_id not in matched:
+                self.tracks[track_id].missed += 1
+        return crossings
+
+    def _count(self, track, cluster):
+        """crossings of the step from a track's previous position to its cluster"""
+        crossings = []
+        for line in self.lines:
+            if line.name in track.counted:
+                continue  # jitter back over the line is not a second object
+            result = line.crossing(track.centroid, cluster.centroid)
+            if result is None:
+                continue
+            fraction, direction = result
+            time = line.fit_time(track.history) \
+                if isinstance(line, CountingLine) and len(track.history) >= 3 else None
+            if time is None:
+                time = track.time + fraction * (cluster.time - track.time)
+            line.add(direction)
+            track.counted.add(line.name)
+            crossings.append(Crossing(line.name, track.track_id, time, direction))
+        self.crossings += crossings
+        return crossings
+
+    def draw(self, image):
+        """Lines, regions, tracks and counts on a BGR frame of the sensor's size"""
+        for line in self.lines:
+            line.draw(image)
+        for track in self.tracks.values():
+            if track.missed == 0:
+                x, y = (int(v) for v in track.centroid)
+                cv2.circle(image, (x, y), 6, (0, 0, 255), 2)
+                cv2.putText(image, f"#{track.track_id}", (x + 8, y - 8),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+        for row, line in enumerate(self.lines):
+            text = f"{line.name}: {line.forward}" + \
+                (f" / {line.backward}" if isinstance(line, CountingLine) else "")
+            cv2.putText(image, text, (10, 30 + 30 * row), cv2.FONT_HERSHEY_SIMPLEX, 0.9,
+                        (0, 255, 255), 2)
+        return image
@@ -0,0 +1,118 @@
+"""
+Display frames from event camera events
+
+Two ways of turning a stream of (x, y, polarity, t) events into a BGR frame,
+both vectorised over the events and over the pixels:
+    count    events of the last window counted per pixel and polarity with one
+             np.bincount, each pixel coloured by whichever polarity dominated
+    surface  an exponential-decay time surface: the time of the latest event of
+             each pixel is scattered into a float32 map as events arrive, and a
+             frame is exp(-(now - t) / tau) signed by that event's polarity
+Frames are written into reused buffers.
+"""
+import cv2
+import numpy as np
+
+# BGR colours of the count frame, like the Prophesee viewer
+BACKGROUND = (52, 37, 30)
+ON_COLOUR = (255, 255, 255)
+OFF_COLOUR = (200, 126, 64)
+ACCUMULATION_MODES = ("count", "surface")
+
+class EventFrameAccumulator:
+    """Accumulate events into count or time surface display frames"""
+    def __init__(self, width, height, mode="count", window=33_000, tau=30_000,
+                 rebase_after=10_000_000):
+        if mode not in ACCUMULATION_MODES:
+            raise ValueError(f"Unknown mode: {mode}, choose from {ACCUMULATION_MODES}")
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.window = window  # microseconds of events in a count frame
+        self.tau = tau  # microseconds for the time surface to decay to 1/e
+        self.rebase_after = rebase_after  # microseconds before the surface's time origin moves
+        self.newest = 0  # timestamp of the newest event seen
+        num_pixels = width * height
+        # State 0 none, 1 ON, 2 OFF to BGR, as a colormap LUT (far faster than np.take)
+        self.palette = np.zeros((256, 1, 3), dtype=np.uint8)
+        self.palette[:3, 0] = (BACKGROUND, ON_COLOUR, OFF_COLOUR)
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
+        self._state = np.empty(num_pixels, dtype=np.uint8)
+        # Time surface: latest event time of each pixel relative to base, float32 keeps
+        # microseconds exact for 16 s so the base moves forward every rebase_after
+        self.base = None
+        self.last_time = np.full(num_pixels, -np.inf, dtype=np.float32)
+        self.last_polarity = np.zeros(num_pixels, dtype=np.int8)  # 1 ON, -1 OFF
+        self._surface = np.empty(num_pixels, dtype=np.float32)
+        self._grey = np.empty(num_pixels, dtype=np.uint8)
+
+    def columns(self, events):
+        """(flat pixel, polarity 0/1) of each event, events outside the sensor are dropped"""
+        x, y = events["x"].astype(np.int32), events["y"].astype(np.int32)
+        polarity = events["p"].astype(np.int32)
+        index = y * self.width + x
+        if len(index) and (x.max() >= self.width or y.max() >= self.height):
+            inside = (x < self.width) & (y < self.height)
+            return index[inside], polarity[inside], inside
+        return index, polarity, None
+
+    def add(self, events):
+        """Update the time surface with new events, in time order"""
+        if not len(events):
+            return
+        index, polarity, inside = self.columns(events)
+        times = events["t"] if inside is None else events["t"][inside]
+        self.newest = max(self.newest, int(events["t"][-1]))
+        if self.base is None:
+            self.base = int(events["t"][0])
+        elif self.newest - self.base > self.rebase_after:
+            shift = self.newest - self.base - self.tau
+            self.last_time -= np.float32(shift)
+            self.base += shift
+        # Later events overwrite earlier ones on the same pixel
+        self.last_time[index] = (times - self.base).astype(np.float32)
+        self.last_polarity[index] = 2 * polarity - 1
+
+    def count_frame(self, events):
+        """BGR frame of the dominant polarity per pixel over the given events"""
+        num_pixels = self.width * self.height
+        if len(events):
+            index, polarity, _ = self.columns(events)
+            # ON minus OFF per pixel in one pass, then 0 none, 1 ON, 2 OFF
+            balance = np.bincount(index, weights=2 * polarity - 1, minlength=num_pixels)
+            np.greater(balance, 0, out=self._state, casting="unsafe")
+            np.add(self._state, np.less(balance, 0) * np.uint8(2), out=self._state,
+                   casting="unsafe")
+        else:
+            self._state.fill(0)
+        cv2.applyColorMap(self._state.reshape(self.height, self.width), self.palette,
+                          dst=self.frame)
+        return self.frame
+
+    def surface_frame(self, now=None):
+        """BGR frame of the time surface at time now (default the newest event)"""
+        now = self.newest if now is None else now
+        surface = self._surface
+        if self.base is None:
+            surface.fill(0)
+        else:
+            np.subtract(self.last_time, np.float32(now - self.base), out=surface)
+            np.multiply(surface, np.float32(1.0 / self.tau), out=surface)
+            np.exp(surface, out=surface)  # 1 for a pixel that just fired, 0 long ago
+            np.multiply(surface, self.last_polarity, out=surface)
+        # -1..1 to 0..255 with grey for no recent events
+        np.multiply(surface, 127.0, out=surface)
+        np.add(surface, 128.0, out=surface)
+        np.copyto(self._grey, surface, casting="unsafe")
+        cv2.cvtColor(self._grey.reshape(self.height, self.width), cv2.COLOR_GRAY2BGR,
+                     dst=self.frame)
+        return self.frame
+
+    def render(self, events=None):
+        """
+        Frame in the current mode. Count mode shows the given events (the last
+        window), surface mode the surface built by add()
+        """
+        if self.mode == "count":
+            return self.count_frame(events if events is not None else np.empty(0))
+        return self.surface_frame()
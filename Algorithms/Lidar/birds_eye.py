@@ -0,0 +1,61 @@
+"""
+Top-down LiDAR image for small displays
+
+A point cloud drawn as a BGR image looking down on the sensor, for panes where
+an OpenGL canvas per sensor is too much (e.g. the multi-sensor dashboard).
+Each pixel takes the height of its highest point, scattered with one
+np.maximum.at into a reused uint8 grid, and is coloured through an OpenCV
+colormap whose first entry is the background. Range rings are drawn every
+ring_spacing metres around the sensor.
+"""
+import cv2
+import numpy as np
+
+BACKGROUND = (30, 25, 20)
+RING_COLOUR = (90, 90, 90)
+
+class BirdsEyeView:
+    """Render (n, 3) points seen from above, x to the right and y up the image"""
+    def __init__(self, size=(480, 480), extent=(-20.0, 20.0, 0.0, 40.0),
+                 height_range=(-2.0, 3.0), colormap=cv2.COLORMAP_VIRIDIS, ring_spacing=10.0):
+        self.width, self.height = size
+        self.extent = extent  # x min, x max, y min, y max in metres
+        self.height_range = height_range  # metres coloured from the first to the last colour
+        self.ring_spacing = ring_spacing  # metres between range rings, 0 = none
+        levels = np.arange(256, dtype=np.uint8).reshape(256, 1)
+        self.lut = cv2.applyColorMap(levels, colormap).reshape(256, 1, 3)
+        self.lut[0, 0] = BACKGROUND  # level 0 is an empty pixel
+        self.grid = np.zeros(self.width * self.height, dtype=np.uint8)
+        self.image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+    def pixel(self, x, y):
+        """image position of a point on the ground, in pixels"""
+        x_min, x_max, y_min, y_max = self.extent
+        return ((x - x_min) * self.width / (x_max - x_min),
+                (y_max - y) * self.height / (y_max - y_min))
+
+    def render(self, positions):
+        """Draw a frame of points into the reused image, valid until the next render"""
+        x_min, x_max, y_min, y_max = self.extent
+        column = ((positions[:, 0] - x_min) * (self.width / (x_max - x_min))).astype(np.int32)
+        row = ((y_max - positions[:, 1]) * (self.height / (y_max - y_min))).astype(np.int32)
+        inside = (column >= 0) & (column < self.width) & (row >= 0) & (row < self.height)
+        low, high = self.height_range
+        level = np.clip((positions[:, 2] - low) * (254 / (high - low)), 0, 254) + 1
+        self.grid.fill(0)
+        np.maximum.at(self.grid, row[inside] * self.width + column[inside],
+                      level[inside].astype(np.uint8))
+        cv2.applyColorMap(self.grid.reshape(self.height, self.width), self.lut, dst=self.image)
+        self.draw_rings()
+        return self.image
+
+    def draw_rings(self):
+        """range rings and a marker at the sensor"""
+        centre = tuple(int(round(v)) for v in self.pixel(0.0, 0.0))
+        scale = self.width / (self.extent[1] - self.extent[0])
+        if self.ring_spacing > 0:
+            furthest = max(abs(v) for v in self.extent) * np.sqrt(2)
+            for distance in np.arange(self.ring_spacing, furthest, self.ring_spacing):
+                cv2.circle(self.image, centre, int(distance * scale), RING_COLOUR, 1,
+                           cv2.LINE_AA)
+        cv2.circle(self.image, centre, 4, (255, 255, 255), -1)
@@ -0,0 +1,98 @@
+"""
+LiDAR point cloud colouring for display
+
+Points are coloured by height through a precomputed 256 entry float32 colormap,
+into position/colour/size buffers that are allocated once for the sensor's
+maximum point count and reused every frame.
+"""
+import numpy as np
+from vispy.color import get_colormap
+
+DEFAULT_MAX_POINTS = 100_000  # points per frame the buffers start with
+CENTRE_BLOCK = 4096  # points per row when subtracting the mean point
+
+def colormap_lut(name="viridis", entries=256):
+    """(entries, 4) float32 RGBA lookup table of a vispy colormap"""
+    return get_colormap(name).map(np.linspace(0.0, 1.0, entries)).astype(np.float32)
+
+class PointCloudBuffers:
+    """Centred positions, height colours and sizes of a frame of points, reused every frame"""
+    def __init__(self, max_points=DEFAULT_MAX_POINTS, colormap="viridis", point_size=2,
+                 smoothing=0.05, min_range=0.1):
+        self.lut = colormap_lut(colormap)
+        self.point_size = point_size
+        self.smoothing = smoothing  # how fast the colour range follows the height range
+        self.min_range = min_range  # smallest height range in metres, avoids dividing by zero
+        self.min_z = None
+        self.max_z = None
+        self.allocations = 0  # times the buffers were (re)allocated
+        self._allocate(max_points)
+
+    def _allocate(self, max_points):
+        self.max_points = max_points
+        self.positions = np.empty((max_points, 3), dtype=np.float32)
+        self.colours = np.empty((max_points, 4), dtype=np.float32)
+        self.sizes = np.full(max_points, self.point_size, dtype=np.float32)
+        self._scaled_z = np.empty(max_points, dtype=np.float32)
+        self._ones = np.ones(max_points, dtype=np.float32)
+        self._lut_index = np.empty(max_points, dtype=np.intp)
+        self.allocations += 1
+
+    def _update_range(self, z_values):
+        """follow the height range with a moving average, so colours do not jump"""
+        if not len(z_values):
+            return  # an empty frame keeps the previous range
+        low, high = float(z_values.min()), float(z_values.max())
+        if self.min_z is None or self.max_z is None:
+            self.min_z, self.max_z = low, high
+        else:
+            self.min_z = (1 - self.smoothing) * self.min_z + self.smoothing * low
+            self.max_z = (1 - self.smoothing) * self.max_z + self.smoothing * high
+        if abs(self.max_z - self.min_z) < self.min_range:
+            self.max_z = self.min_z + self.min_range
+
+    def _centre(self, positions, out):
+        """
+        Subtract the mean point. numpy is slow broadcasting along a length 3
+        axis, so the flat coordinates are processed in long rows against a
+        row of repeated means instead.
+        """
+        num_points = len(positions)
+        mean = (self._ones[:num_points] @ positions) / num_points  # BLAS, far faster than .mean
+        block = np.tile(mean.astype(np.float32), CENTRE_BLOCK)
+        flat, flat_out = positions.reshape(-1), out.reshape(-1)
+        whole = len(flat) - len(flat) % len(block)
+        np.subtract(flat[:whole].reshape(-1, len(block)), block,
+                    out=flat_out[:whole].reshape(-1, len(block)), casting="unsafe")
+        np.subtract(flat[whole:], block[:len(flat) - whole], out=flat_out[whole:],
+                    casting="unsafe")
+
+    def update(self, positions):
+        """
+        Centre (n, 3) positions and colour them by height, returns (positions,
+        colours, sizes) views into the reused buffers, valid until the next update
+        """
+        num_points = len(positions)
+        if num_points > self.max_points:
+            self._allocate(max(num_points, 2 * self.max_points))
+
+        if not num_points:
+            # Dropped packets or a fully filtered scan, nothing to centre or colour
+            return self.positions[:0], self.colours[:0], self.sizes[:0]
+        positions = np.ascontiguousarray(positions)
+        centred = self.positions[:num_points]
+        self._centre(positions, centred)
+
+        # Heights copied out of the (n, 3) rows once, everything after runs on contiguous memory
+        scaled = self._scaled_z[:num_points]
+        np.copyto(scaled, centred[:, 2])
+        self._update_range(scaled)
+        entries = len(self.lut)
+        np.subtract(scaled, self.min_z, out=scaled)
+        np.multiply(scaled, entries / (self.max_z - self.min_z), out=scaled)
+        np.clip(scaled, 0, entries - 1, out=scaled)  # outliers take the end colours
+        index = self._lut_index[:num_points]
+        np.copyto(index, scaled, casting="unsafe")
+        colours = self.colours[:num_points]
+        np.take(self.lut, index, axis=0, out=colours)
+        return centred, colours, self.sizes[:num_points]
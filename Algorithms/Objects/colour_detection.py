@@ -3,15 +3,32 @@ Colour detection
 
 Code from:
 https://www.geeksforgeeks.org/multiple-color-detection-in-real-time-using-python-opencv/
+
+Every pixel is classified in one pass through a precompiled HSV lookup table,
+each colour then gets a connected components pass instead of findContours.
+Detection can run on a downscaled copy of the frame (analysis_scale), boxes
+and min_area stay in the coordinates of the frame that was passed in.
 """
+from dataclasses import dataclass
 import cv2
 import pandas as pd
 import numpy as np
 
+@dataclass
+class ColourResult:
+    """boxes found per colour as (colour, (x, y, w, h)) and the count of each colour"""
+    boxes: list
+    counts: dict
+
 class ColourRecogniser:
     """Colour Recogniser called by UI"""
-    def __init__(self, colour_ranges_csv):
+    def __init__(self, colour_ranges_csv, analysis_scale=1.0, min_area=300):
+        self.analysis_scale = analysis_scale  # fraction of the frame size used for detection
+        self.min_area = min_area  # default minimum region area in frame pixels
         self.colour_ranges = self.load_colour_ranges(colour_ranges_csv)
+        self.colour_names = list(self.colour_ranges)
+        self.lut = self.build_lut(self.colour_ranges)
+        self._packed = None  # reused buffer for packing HSV pixels into LUT indices
         self.bgr_colour_dict = {
             'red': (0, 0, 255),
             "green": (0, 255, 0),
@@ -23,37 +40,65 @@ class ColourRecogniser:
          }
 
     def load_colour_ranges(self, csv_file):
-        """load predefined hsv colour range from csv file"""
+        """load predefined hsv colour ranges from csv file, a colour may have several rows"""
         colour_data = pd.read_csv(csv_file)
         colours = {}
         for _, row in colour_data.iterrows():
-            colours[row['colour']] = (
-                [row['h_min'], row['s_min'], row['v_min']],
-                [row['h_max'], row['s_max'], row['v_max']]
-            )
+            colours.setdefault(row['colour'], []).append((
+                [int(row['h_min']), int(row['s_min']), int(row['v_min'])],
+                [int(row['h_max']), int(row['s_max']), int(row['v_max'])]
+            ))
         return colours
 
-    def create_mask(self, hsv_img, lower, upper):
-        """mask to only show colours in predefined ranges"""
-        return cv2.inRange(hsv_img, lower, upper)
+    def build_lut(self, colour_ranges):
+        """
+        Precompute a flat HSV -> colour lookup table indexed by h << 16 | s << 8 | v.
+        Each entry is a bit mask with bit i set if the pixel falls in a range of
+        colour i, so overlapping ranges count towards every colour they match.
+        """
+        if len(colour_ranges) <= 8:
+            dtype = np.uint8
+        elif len(colour_ranges) <= 16:
+            dtype = np.uint16
+        else:
+            dtype = np.uint32
+        lut = np.zeros((180, 256, 256), dtype=dtype)
+        for bit, ranges in enumerate(colour_ranges.values()):
+            for (h_min, s_min, v_min), (h_max, s_max, v_max) in ranges:
+                lut[h_min:h_max + 1, s_min:s_max + 1, v_min:v_max + 1] |= dtype(1 << bit)
+        return lut.reshape(-1)
+
+    def classify(self, hsv_img):
+        """Label every pixel with its colour bit mask in a single vectorised pass"""
+        height, width = hsv_img.shape[:2]
+        if self._packed is None or self._packed.shape[:2] != (height, width):
+            self._packed = np.zeros((height, width, 4), dtype=np.uint8)
+        # Byte order v, s, h, 0 reads as the little endian index h << 16 | s << 8 | v
+        self._packed[..., 0] = hsv_img[..., 2]
+        self._packed[..., 1] = hsv_img[..., 1]
+        self._packed[..., 2] = hsv_img[..., 0]
+        return self.lut.take(self._packed.view('<u4')[..., 0])
 
-    def draw_bounding_box(self, image, contour, colour):
+    def find_regions(self, mask, min_area):
+        """connected regions of a colour mask larger than min_area, as (x, y, w, h) boxes"""
+        # Only label the part of the frame that contains this colour at all
+        roi_x, roi_y, roi_w, roi_h = cv2.boundingRect(mask)
+        if roi_w * roi_h <= min_area:
+            return []
+        roi = mask[roi_y:roi_y + roi_h, roi_x:roi_x + roi_w]
+        _, _, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+            roi, 8, cv2.CV_32S, cv2.CCL_GRANA)
+        stats = stats[1:]  # skip the background component
+        stats = stats[stats[:, cv2.CC_STAT_AREA] > min_area]
+        return [(x + roi_x, y + roi_y, w, h) for x, y, w, h in stats[:, :4].tolist()]
+
+    def draw_bounding_box(self, image, box, colour):
         """draw boxes around detected colours"""
-        x, y, w, h = cv2.boundingRect(contour)
+        x, y, w, h = box
         box_color = self.bgr_colour_dict.get(colour, (0, 0, 0))
         cv2.rectangle(image, (x, y), (x + w, y + h), box_color, 2, lineType=cv2.LINE_AA)
         cv2.putText(image, colour, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, box_color, 2)
 
-    def count_colours(self, image, contours, colour, min_area):
-        """count borders to check the amount for each colour"""
-        colour_count = 0
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > min_area:
-                colour_count += 1
-                self.draw_bounding_box(image, contour, colour)
-        return colour_count
-
     def display_colour_counts(self, image, colour_counts):
         """display the colour and its count """
         y_offset = 30
@@ -61,15 +106,49 @@ class ColourRecogniser:
             cv2.putText(image, f"{colour}: {count}", (10, y_offset + i * 20),
                          cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
 
-    def detect_and_draw(self, image, min_area=300):
-        """Main can change min area depending on scene"""
-        hsv_img = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    def scale_box(self, box, scale_x, scale_y):
+        """map a box found in the analysis image back to frame coordinates"""
+        x, y, w, h = box
+        x0, y0 = int(x / scale_x), int(y / scale_y)
+        x1, y1 = int(np.ceil((x + w) / scale_x)), int(np.ceil((y + h) / scale_y))
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def detect(self, image, min_area=None) -> ColourResult:
+        """Find colour regions without drawing, safe to call off the UI thread"""
+        if min_area is None:
+            min_area = self.min_area
+        height, width = image.shape[:2]
+        if self.analysis_scale != 1.0:
+            analysis_img = cv2.resize(image, (max(1, round(width * self.analysis_scale)),
+                                              max(1, round(height * self.analysis_scale))),
+                                      interpolation=cv2.INTER_LINEAR)  # INTER_AREA is slow off 1/n
+        else:
+            analysis_img = image
+        scale_x = analysis_img.shape[1] / width
+        scale_y = analysis_img.shape[0] / height
+
+        hsv_img = cv2.cvtColor(analysis_img, cv2.COLOR_BGR2HSV)
+        labels = self.classify(hsv_img)
+        boxes = []
         colour_counts = {}
-        for colour, (lower, upper) in self.colour_ranges.items():
-            lower = np.array(lower, dtype="uint8")
-            upper = np.array(upper, dtype="uint8")
-            mask = self.create_mask(hsv_img, lower, upper)
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            colour_counts[colour] = self.count_colours(image, contours, colour, min_area)
-        self.display_colour_counts(image, colour_counts)
+        for bit, colour in enumerate(self.colour_names):
+            mask = np.not_equal(labels & labels.dtype.type(1 << bit), 0).view(np.uint8)
+            colour_boxes = self.find_regions(mask, min_area * scale_x * scale_y)
+            if analysis_img is not image:
+                colour_boxes = [self.scale_box(box, scale_x, scale_y) for box in colour_boxes]
+            boxes.extend((colour, box) for box in colour_boxes)
+            colour_counts[colour] = len(colour_boxes)
+        return ColourResult(boxes=boxes, counts=colour_counts)
+
+    def draw(self, image, result):
+        """Draw the boxes and counts of a detection result onto the image"""
+        if result is None:
+            return image
+        for colour, box in result.boxes:
+            self.draw_bounding_box(image, box, colour)
+        self.display_colour_counts(image, result.counts)
         return image
+
+    def detect_and_draw(self, image, min_area=None):
+        """Main can change min area depending on scene"""
+        return self.draw(image, self.detect(image, min_area))
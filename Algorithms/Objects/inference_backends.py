@@ -0,0 +1,180 @@
+"""
+CPU inference backends for the YOLO object detector
+
+The PyTorch model is exported once to ONNX, optionally converted to OpenVINO IR
+and INT8 quantised (ONNX Runtime static quantisation or NNCF), and cached on disk. ExportedDetector runs the cached
+model with ONNX Runtime or OpenVINO and returns ultralytics Results, so boxes,
+labels and plot() output match the PyTorch path. Tracking ids are only
+available on the PyTorch path.
+"""
+import json
+import os
+from pathlib import Path
+import cv2
+import numpy as np
+import torch
+from ultralytics.data.augment import LetterBox
+from ultralytics.engine.results import Results
+from ultralytics.utils import ASSETS, ops
+
+EXPORT_DIR = "Models"  # cache for exported models
+
+def export_onnx(weights="yolov8n.pt", imgsz=640, export_dir=EXPORT_DIR):
+    """Export the weights to a static shape ONNX model once, returns the cached path"""
+    onnx_path = Path(export_dir) / f"{Path(weights).stem}_{imgsz}.onnx"
+    if onnx_path.exists():
+        return onnx_path
+
+    import onnx
+    from ultralytics import YOLO
+    onnx_path.parent.mkdir(parents=True, exist_ok=True)
+    model = YOLO(weights)
+    exported = model.export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+    # Re-save as one self contained file, newer exporters split weights into a .data file
+    onnx.save(onnx.load(exported), str(onnx_path))
+    for leftover in (exported, f"{exported}.data"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    stride = int(max(model.model.stride))
+    with open(onnx_path.with_suffix(".json"), "w") as file:
+        json.dump({"names": model.names, "imgsz": imgsz, "stride": stride}, file)
+    return onnx_path
+
+def calibration_blobs(metadata, calibration_images=None):
+    """preprocessed images used to calibrate INT8 quantisation"""
+    letterbox = LetterBox((metadata["imgsz"], metadata["imgsz"]), auto=False,
+                          stride=metadata["stride"])
+    if calibration_images is None:
+        calibration_images = sorted(str(path) for path in ASSETS.glob("*.jpg"))
+    return [to_blob(letterbox(image=cv2.imread(path))) for path in calibration_images]
+
+def save_int8_metadata(model_path, int8_path):
+    """copy the metadata of a model to its INT8 version"""
+    metadata_path = Path(int8_path).with_suffix(".json")
+    if not metadata_path.exists():
+        metadata = read_metadata(model_path)
+        with open(metadata_path, "w") as file:
+            json.dump(metadata, file)
+
+def quantize_onnx_int8(onnx_path, calibration_images=None):
+    """Statically quantise an ONNX model to INT8 (QDQ format) once, returns the cached path"""
+    int8_path = Path(onnx_path).with_name(f"{Path(onnx_path).stem}_int8.onnx")
+    if int8_path.exists():
+        return int8_path
+
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+    blobs = calibration_blobs(read_metadata(onnx_path), calibration_images)
+
+    class CalibrationFrames(CalibrationDataReader):
+        """feeds preprocessed calibration images to the quantiser"""
+        def __init__(self):
+            self.blobs = iter(blobs)
+
+        def get_next(self):
+            blob = next(self.blobs, None)
+            return None if blob is None else {"images": blob}
+
+    quantize_static(str(onnx_path), str(int8_path), CalibrationFrames(),
+                    quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8, per_channel=True)
+    save_int8_metadata(onnx_path, int8_path)
+    return int8_path
+
+def convert_openvino(onnx_path):
+    """Convert an ONNX model to OpenVINO IR once, returns the cached .xml path"""
+    xml_path = Path(onnx_path).with_suffix(".xml")  # shares the .json metadata of the ONNX
+    if not xml_path.exists():
+        import openvino as ov
+        ov.save_model(ov.convert_model(str(onnx_path)), str(xml_path), compress_to_fp16=False)
+    return xml_path
+
+def quantize_openvino_int8(xml_path, calibration_images=None):
+    """Quantise an OpenVINO IR model to INT8 with NNCF once, returns the cached .xml path"""
+    int8_path = Path(xml_path).with_name(f"{Path(xml_path).stem}_int8.xml")
+    if int8_path.exists():
+        return int8_path
+
+    import nncf
+    import openvino as ov
+    blobs = calibration_blobs(read_metadata(xml_path), calibration_images)
+    quantized = nncf.quantize(ov.Core().read_model(str(xml_path)), nncf.Dataset(blobs),
+                              preset=nncf.QuantizationPreset.MIXED, subset_size=len(blobs))
+    ov.save_model(quantized, str(int8_path))
+    save_int8_metadata(xml_path, int8_path)
+    return int8_path
+
+def read_metadata(model_path):
+    """class names, input size and stride saved next to an exported model"""
+    with open(Path(model_path).with_suffix(".json"), "r") as file:
+        metadata = json.load(file)
+    metadata["names"] = {int(key): name for key, name in metadata["names"].items()}
+    return metadata
+
+def to_blob(image):
+    """letterboxed BGR image to a 1x3xHxW float RGB blob"""
+    return np.ascontiguousarray(image[..., ::-1].transpose(2, 0, 1))[None].astype(np.float32) / 255
+
+class OnnxRuntimeBackend:
+    """ONNX Runtime CPU session with a configurable intra-op thread count"""
+    def __init__(self, model_path, threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def infer(self, blob):
+        """raw model output for one blob"""
+        return self.session.run(None, {self.input_name: blob})[0]
+
+class OpenVinoBackend:
+    """OpenVINO CPU compiled model tuned for latency"""
+    def __init__(self, model_path, threads=None):
+        import openvino as ov
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+        self.compiled = ov.Core().compile_model(str(model_path), "CPU", config)
+
+    def infer(self, blob):
+        """raw model output for one blob"""
+        return self.compiled(blob)[0]
+
+class ExportedDetector:
+    """Run an exported YOLO model and return ultralytics Results like YOLO.predict"""
+    def __init__(self, backend, metadata):
+        self.backend = backend
+        self.names = metadata["names"]
+        self.imgsz = metadata["imgsz"]  # fixed at export time
+        self.letterbox = LetterBox((self.imgsz, self.imgsz), auto=False,
+                                   stride=metadata["stride"])
+
+    def predict(self, frame, conf=0.25, classes=None, iou=0.7, max_det=300, **_):
+        """Detect objects in a BGR frame, extra YOLO.predict arguments are ignored"""
+        blob = to_blob(self.letterbox(image=frame))
+        preds = torch.from_numpy(self.backend.infer(blob))
+        det = ops.non_max_suppression(preds, conf, iou, classes=classes, max_det=max_det)[0]
+        det[:, :4] = ops.scale_boxes(blob.shape[2:], det[:, :4], frame.shape)
+        return [Results(frame, path="", names=self.names, boxes=det)]
+
+def load_detector(backend="onnx", weights="yolov8n.pt", imgsz=640, int8=False, threads=None,
+                  export_dir=EXPORT_DIR):
+    """Export (if not cached) and load a detector for the "onnx" or "openvino" backend"""
+    model_path = export_onnx(weights, imgsz, export_dir)
+    if backend == "onnx":
+        if int8:
+            model_path = quantize_onnx_int8(model_path)
+        runtime = OnnxRuntimeBackend(model_path, threads)
+    elif backend == "openvino":
+        model_path = convert_openvino(model_path)
+        if int8:
+            model_path = quantize_openvino_int8(model_path)
+        runtime = OpenVinoBackend(model_path, threads)
+    else:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    return ExportedDetector(runtime, read_metadata(model_path))
@@ -5,26 +5,120 @@ Code adapted from the following:
 https://www.freecodecamp.org/news/how-to-detect-objects-in-images-using-yolov8/
 https://www.geeksforgeeks.org/object-detection-using-yolov8/
 https://medium.com/softplus-publication/video-object-tracking-with-yolov8-and-sort-library-e28444b189aa
+
+With detect_every > 1 the full detector only runs every N frames, or sooner
+when motion or uncertainty is high. In between, the last boxes are moved with
+optical flow.
+
+backend selects how the model runs: "torch" (PyTorch eager, with tracking ids),
+or "onnx"/"openvino" which export the model once and run it on a CPU runtime.
+Models come from the shared ModelPool, so reopening the page reuses a warm model.
 """
+import copy
+import numpy as np
+import torch
 from ultralytics import YOLO
+from Algorithms.model_pool import ModelPool
+from Algorithms.tracking import BoxFlowTracker
+from Algorithms.Objects.inference_backends import load_detector
+
+def warm_up(model, imgsz):
+    """first inference on a blank frame, so the first camera frame is not slow"""
+    model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+
+def reset_trackers(model):
+    """clear the tracks a YOLO model kept from earlier track() calls"""
+    predictor = getattr(model, "predictor", None)
+    for tracker in getattr(predictor, "trackers", None) or []:
+        tracker.reset()
 
 class ObjectRecogniser:
     """Object Recogniser called from UI"""
-    def __init__(self):
-        self.model = YOLO('yolov8n.pt')
+    def __init__(self, conf=0.5, classes=None, imgsz=640, detect_every=1,
+                 max_motion=20.0, min_track_quality=0.5, uncertainty_margin=0.0,
+                 backend="torch", int8=False, threads=None):
+        self.backend = backend
+        if backend == "torch":
+            if threads:
+                torch.set_num_threads(threads)
+            self.pool_key = ("yolo", 'yolov8n.pt')
+            self.model = ModelPool.shared().acquire(self.pool_key, lambda: YOLO('yolov8n.pt'),
+                                                    lambda model: warm_up(model, imgsz))
+            reset_trackers(self.model)  # a pooled model may hold tracks from the last page
+        else:
+            self.pool_key = (backend, 'yolov8n.pt', imgsz, int8, threads)
+            self.model = ModelPool.shared().acquire(
+                self.pool_key,
+                lambda: load_detector(backend, 'yolov8n.pt', imgsz=imgsz, int8=int8,
+                                      threads=threads),
+                lambda model: warm_up(model, imgsz))
+        self.conf = conf  # confidence threshold, applied before NMS
+        self.classes = classes  # class ids to keep, None keeps all
+        self.imgsz = imgsz  # detector input size
+        self.detect_every = detect_every  # run the detector every N frames, 1 = every frame
+        self.max_motion = max_motion  # pixels per frame before the detector is rerun
+        self.min_track_quality = min_track_quality  # tracked point fraction before rerun
+        self.uncertainty_margin = uncertainty_margin  # rerun if a box is this close to conf
+        self.tracker = BoxFlowTracker()
+        self.last_detection = None
+        self.frames_since_detection = 0
+        self.force_detection = True
 
-    def detect_and_draw(self, frame):
-        """Input into model with confidence filtering"""
-        results = self.model.track(frame, persist=True)
+    def _needs_detection(self):
+        """decide whether this frame gets the full detector"""
+        if self.detect_every <= 1 or self.force_detection or self.last_detection is None:
+            return True
+        if self.frames_since_detection + 1 >= self.detect_every:
+            return True
+        confs = self.last_detection.boxes.conf
+        return bool(self.uncertainty_margin > 0 and len(confs)
+                    and float(confs.min()) < self.conf + self.uncertainty_margin)
+
+    def _run_detector(self, frame):
+        """full YOLO pass, thresholds go into the model call so NMS never sees dropped boxes"""
+        if self.backend == "torch":
+            results = self.model.track(frame, persist=True, conf=self.conf,
+                                       classes=self.classes, imgsz=self.imgsz, verbose=False)
+        else:
+            results = self.model.predict(frame, conf=self.conf, classes=self.classes)
+        return results[0] if results else None
 
-        if results:
-            result = results[0]  # Extract first result
-            confs = result.boxes.conf.cpu().numpy()  # Get confidence scores as NumPy array
+    def detect(self, frame):
+        """Detect or track objects in a frame, returns the result without drawing"""
+        if self._needs_detection():
+            result = self._run_detector(frame)
+            self.last_detection = result
+            self.frames_since_detection = 0
+            self.force_detection = False
+            if result is not None and self.detect_every > 1:
+                self.tracker.reset(frame, result.boxes.xyxy.cpu().numpy())
+            return result
 
-            # Filter out boxes below 50% confidence
-            mask = confs >= 0.5
-            result.boxes = result.boxes[mask]  # Apply mask to filter boxes
+        # Between detector runs move the last boxes forward with optical flow
+        self.frames_since_detection += 1
+        update = self.tracker.update(frame)
+        if update.motion > self.max_motion or update.quality < self.min_track_quality:
+            self.force_detection = True
+        if not len(update.boxes):
+            return self.last_detection
+        data = self.last_detection.boxes.data.cpu().numpy().copy()
+        data[:, :4] = update.boxes
+        result = copy.copy(self.last_detection)
+        result.update(boxes=data)
+        return result
 
-            return result.plot()
+    def draw(self, frame, result):
+        """Plot a detection result onto the frame"""
+        if result is None:
+            return frame  # Return original frame if no detections
+        return result.plot(img=frame)
+
+    def detect_and_draw(self, frame):
+        """Detect and plot in one call"""
+        return self.draw(frame, self.detect(frame))
 
-        return frame  # Return original frame if no detections
+    def release(self):
+        """Give the model back to the pool, it stays warm for the next page"""
+        if self.pool_key is not None:
+            ModelPool.shared().release(self.pool_key)
+            self.pool_key = None
@@ -0,0 +1,226 @@
+"""
+Thermal analytics for the thermal camera page
+
+Each frame is converted to an 8 bit intensity image (the camera should stream a
+white-hot palette, so brighter means hotter), then:
+    false colour  a 256 entry palette LUT built once and applied with one
+                  cv2.applyColorMap call into a reused buffer
+    hotspots      pixels above a threshold (fixed, or the hottest fraction of the
+                  frame) grouped with connectedComponentsWithStats, the peak
+                  of each of the few largest read from its own box
+    tracking      hotspots matched to the previous frame's by nearest centroid,
+                  so they keep their ids while they move
+    histogram     a subsampled cv2.calcHist blended into a moving average, so it
+                  updates every frame without jumping
+Intensities can be mapped to degrees with a linear temperature_range.
+"""
+from dataclasses import dataclass
+import cv2
+import numpy as np
+
+PALETTES = {  # name -> OpenCV colormap, None for the grey palettes
+    "inferno": cv2.COLORMAP_INFERNO,
+    "jet": cv2.COLORMAP_JET,
+    "hot": cv2.COLORMAP_HOT,
+    "magma": cv2.COLORMAP_MAGMA,
+    "turbo": cv2.COLORMAP_TURBO,
+    "white_hot": None,
+    "black_hot": None,
+}
+
+def palette_lut(name):
+    """(256, 1, 3) uint8 BGR lookup table of a palette"""
+    if name not in PALETTES:
+        raise ValueError(f"Unknown palette: {name}, choose from {tuple(PALETTES)}")
+    levels = np.arange(256, dtype=np.uint8).reshape(256, 1)
+    if name == "white_hot":
+        return cv2.cvtColor(levels, cv2.COLOR_GRAY2BGR).reshape(256, 1, 3)
+    if name == "black_hot":
+        return cv2.cvtColor(255 - levels, cv2.COLOR_GRAY2BGR).reshape(256, 1, 3)
+    return cv2.applyColorMap(levels, PALETTES[name]).reshape(256, 1, 3)
+
+@dataclass
+class Hotspot:
+    """a hot region, in frame pixels"""
+    track_id: int
+    box: tuple  # x, y, w, h
+    centroid: tuple  # x, y
+    area: int  # pixels above the threshold
+    peak: int  # hottest intensity, 0-255
+    age: int = 1  # frames this hotspot has been tracked
+
+@dataclass
+class ThermalResult:
+    """output of a ThermalAnalytics frame"""
+    image: np.ndarray  # false coloured frame with hotspot boxes, a reused buffer
+    hotspots: list
+    histogram: np.ndarray  # (bins,) moving average fraction of pixels per bin
+    threshold: int  # intensity hotspots were cut at
+
+class TemperatureHistogram:
+    """Intensity histogram updated incrementally as a moving average"""
+    def __init__(self, bins=64, smoothing=0.2, stride=2):
+        self.bins = bins
+        self.smoothing = smoothing  # weight of the newest frame
+        self.stride = stride  # every stride-th row and column is counted
+        self.counts = np.zeros(256, dtype=np.float32)  # newest frame, full resolution
+        self.values = np.zeros(bins, dtype=np.float32)
+        self._started = False
+
+    def update(self, intensity):
+        """Add a frame, returns the smoothed (bins,) fractions"""
+        sample = intensity[::self.stride, ::self.stride]
+        self.counts[:] = cv2.calcHist([sample], [0], None, [256], [0, 256]).ravel()
+        self.counts /= sample.size
+        binned = self.counts.reshape(self.bins, -1).sum(axis=1)
+        if not self._started:
+            self.values[:] = binned
+            self._started = True
+        else:
+            self.values += self.smoothing * (binned - self.values)
+        return self.values
+
+    def percentile(self, fraction):
+        """intensity above which the newest frame's hottest fraction of pixels lie"""
+        above = np.cumsum(self.counts[::-1])
+        return 255 - int(np.searchsorted(above, fraction))
+
+class HotspotTracker:
+    """Keep hotspot ids across frames by matching nearest centroids"""
+    def __init__(self, max_distance=40.0, max_missed=5):
+        self.max_distance = max_distance  # pixels a hotspot may move between frames
+        self.max_missed = max_missed  # frames a lost hotspot is remembered
+        self.tracks = {}  # id -> (Hotspot, frames missed)
+        self._next_id = 0
+
+    def update(self, hotspots):
+        """Give the hotspots the ids of the tracks they continue, returns them"""
+        ids = list(self.tracks)
+        matched = set()
+        if ids and hotspots:
+            previous = np.array([self.tracks[i][0].centroid for i in ids], dtype=np.float32)
+            current = np.array([h.centroid for h in hotspots], dtype=np.float32)
+            distances = np.linalg.norm(current[:, None] - previous[None], axis=2)
+            # Greedy matching, closest pairs first
+            for flat in np.argsort(distances, axis=None):
+                row, col = divmod(int(flat), len(ids))
+                if distances[row, col] > self.max_distance:
+                    break
+                if hotspots[row].track_id >= 0 or ids[col] in matched:
+                    continue
+                hotspots[row].track_id = ids[col]
+                hotspots[row].age = self.tracks[ids[col]][0].age + 1
+                matched.add(ids[col])
+        for track_id in ids:
+            if track_id not in matched:
+                hotspot, missed = self.tracks[track_id]
+                if missed >= self.max_missed:
+                    del self.tracks[track_id]
+                else:
+                    self.tracks[track_id] = (hotspot, missed + 1)
+        for hotspot in hotspots:
+            if hotspot.track_id < 0:
+                hotspot.track_id = self._next_id
+                self._next_id += 1
+            self.tracks[hotspot.track_id] = (hotspot, 0)
+        return hotspots
+
+class ThermalAnalytics:
+    """False colour, hotspots and histogram of thermal frames"""
+    def __init__(self, palette="inferno", threshold=None, hot_fraction=0.01, min_threshold=128,
+                 min_area=30, max_hotspots=5, temperature_range=None, draw=True):
+        self.threshold = threshold  # fixed hotspot intensity, None = hottest hot_fraction
+        self.hot_fraction = hot_fraction  # share of the frame counted as hot
+        self.min_threshold = min_threshold  # a uniform scene has no hotspots
+        self.min_area = min_area  # smallest hotspot in pixels
+        self.max_hotspots = max_hotspots  # largest hotspots kept
+        self.temperature_range = temperature_range  # (degrees at 0, degrees at 255)
+        self.draw = draw  # draw hotspot boxes on the image
+        self.histogram = TemperatureHistogram()
+        self.tracker = HotspotTracker()
+        self.set_palette(palette)
+        self._coloured = None
+        self._mask = None
+
+    def set_palette(self, name):
+        """Switch palette, the LUT is built once per switch"""
+        self.lut = palette_lut(name)
+        self.palette = name
+
+    def temperature(self, intensity):
+        """degrees of an intensity if temperature_range is set, otherwise the intensity"""
+        if self.temperature_range is None:
+            return float(intensity)
+        low, high = self.temperature_range
+        return low + (high - low) * intensity / 255
+
+    def intensity(self, frame):
+        """8 bit single channel view or copy of a frame"""
+        return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def find_hotspots(self, intensity, threshold):
+        """largest regions above threshold, with their peak intensity"""
+        if self._mask is None or self._mask.shape != intensity.shape:
+            self._mask = np.empty(intensity.shape, dtype=np.uint8)
+        cv2.threshold(intensity, threshold - 1, 255, cv2.THRESH_BINARY, dst=self._mask)
+        # 16 bit labels are about three times faster, enough unless the mask is noise
+        label_type = cv2.CV_16U if cv2.countNonZero(self._mask) < 65535 else cv2.CV_32S
+        count, labels, stats, centroids = cv2.connectedComponentsWithStats(
+            self._mask, connectivity=8, ltype=label_type)
+        if count <= 1:
+            return []
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        keep = np.flatnonzero(areas >= self.min_area)
+        keep = keep[np.argsort(areas[keep])[::-1][:self.max_hotspots]] + 1
+        hotspots = []
+        for label in keep:
+            x, y, w, h = (int(v) for v in stats[label, :4])
+            # Peak inside the hotspot's own pixels of its box
+            inside = cv2.compare(labels[y:y + h, x:x + w], int(label), cv2.CMP_EQ)
+            _, peak, _, _ = cv2.minMaxLoc(intensity[y:y + h, x:x + w], mask=inside)
+            hotspots.append(Hotspot(track_id=-1, box=(x, y, w, h),
+                                    centroid=(float(centroids[label, 0]),
+                                              float(centroids[label, 1])),
+                                    area=int(stats[label, cv2.CC_STAT_AREA]), peak=int(peak)))
+        return hotspots
+
+    def colour(self, intensity):
+        """False colour an intensity image into the reused buffer"""
+        if self._coloured is None or self._coloured.shape[:2] != intensity.shape:
+            self._coloured = np.empty((*intensity.shape, 3), dtype=np.uint8)
+        return cv2.applyColorMap(intensity, self.lut, dst=self._coloured)
+
+    def draw_hotspots(self, image, hotspots):
+        """Box and label each hotspot"""
+        for hotspot in hotspots:
+            x, y, w, h = hotspot.box
+            cv2.rectangle(image, (x, y), (x + w, y + h), (255, 255, 255), 2)
+            unit = "C" if self.temperature_range is not None else ""
+            cv2.putText(image, f"#{hotspot.track_id} {self.temperature(hotspot.peak):.0f}{unit}",
+                        (x, max(12, y - 5)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    def process(self, frame) -> ThermalResult:
+        """Analyse a BGR or grey frame"""
+        intensity = self.intensity(frame)
+        histogram = self.histogram.update(intensity)
+        threshold = self.threshold if self.threshold is not None else \
+            max(self.min_threshold, self.histogram.percentile(self.hot_fraction))
+        hotspots = self.tracker.update(self.find_hotspots(intensity, threshold))
+        image = self.colour(intensity)
+        if self.draw:
+            self.draw_hotspots(image, hotspots)
+        return ThermalResult(image=image, hotspots=hotspots, histogram=histogram,
+                             threshold=threshold)
+
+def histogram_image(values, lut, size=(256, 80)):
+    """Bar chart of histogram values coloured by the palette, as a BGR image"""
+    width, height = size
+    bins = len(values)
+    peak = float(values.max()) or 1.0
+    bar_heights = np.repeat((values / peak * (height - 1)).astype(np.int32), width // bins)
+    rows = np.arange(height - 1, -1, -1, dtype=np.int32)[:, None]
+    filled = rows < bar_heights[None, :]  # (height, bars) True under each bar
+    colours = lut.reshape(256, 3)[np.linspace(0, 255, filled.shape[1]).astype(np.int32)]
+    image = np.zeros((height, filled.shape[1], 3), dtype=np.uint8)
+    image[filled] = np.broadcast_to(colours, image.shape)[filled]
+    return image
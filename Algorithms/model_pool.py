@@ -0,0 +1,139 @@
+"""
+Process wide pool of warm models
+
+Building YOLO, FER or MediaPipe models and running their first inference takes
+seconds, so the pool builds each model once, warms it up on a dummy frame and
+keeps it after the page using it closes. Models nobody holds are evicted after
+idle_timeout seconds, or straight away past max_idle models, so low RAM
+machines can get the memory back.
+"""
+import gc
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+@dataclass
+class PooledModel:
+    """a built model with its users and timings"""
+    model: Any
+    users: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    build_time: float = 0.0  # seconds to construct the model
+    warmup_time: float = 0.0  # seconds for the warm-up inference
+
+class ModelPool:
+    """
+    Hands out one shared instance per model key. Recognisers acquire a model
+    when created and release it when their page closes, a model is only
+    evicted once it has no users.
+    """
+    _shared = None  # Class-level instance used by the whole application
+
+    def __init__(self, idle_timeout=300.0, max_idle=None, check_interval=10.0):
+        self.idle_timeout = idle_timeout  # seconds an unused model is kept, None keeps forever
+        self.max_idle = max_idle  # unused models kept at most, None for no limit
+        self.check_interval = check_interval  # seconds between idle checks
+        self._lock = threading.RLock()
+        self._models = {}
+        self._evictor = None
+        self._stop_event = threading.Event()
+
+    @classmethod
+    def shared(cls):
+        """Return the application wide pool"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def acquire(self, key, build, warmup=None):
+        """
+        Return the model for key, building it with build() and warming it up
+        with warmup(model) the first time it is asked for
+        """
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                # Built under the lock so two pages never load the same model twice
+                start = time.perf_counter()
+                model = build()
+                built = time.perf_counter()
+                if warmup is not None:
+                    warmup(model)
+                entry = PooledModel(model=model, build_time=built - start,
+                                    warmup_time=time.perf_counter() - built)
+                self._models[key] = entry
+                self._start_evictor()
+            entry.users += 1
+            entry.last_used = time.monotonic()
+            return entry.model
+
+    def release(self, key):
+        """Give a model back, it stays warm until evicted"""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return
+            entry.users = max(0, entry.users - 1)
+            entry.last_used = time.monotonic()
+            if self.max_idle is not None:
+                self._evict_over_limit()
+
+    def stats(self, key) -> Optional[PooledModel]:
+        """build and warm-up timings of a pooled model, None if it is not loaded"""
+        with self._lock:
+            return self._models.get(key)
+
+    def is_loaded(self, key):
+        """True if the model for key is built and warm"""
+        with self._lock:
+            return key in self._models
+
+    def evict_idle(self, now=None):
+        """Drop models that have had no users for longer than idle_timeout"""
+        if self.idle_timeout is None:
+            return []
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            keys = [key for key, entry in self._models.items()
+                    if entry.users == 0 and now - entry.last_used >= self.idle_timeout]
+            return self._evict(keys)
+
+    def clear(self):
+        """Drop every model without users, e.g. when memory is low"""
+        with self._lock:
+            return self._evict([key for key, entry in self._models.items() if entry.users == 0])
+
+    def stop(self):
+        """Stop the idle check thread"""
+        self._stop_event.set()
+
+    def _evict_over_limit(self):
+        """evict the longest unused models past max_idle"""
+        idle = sorted((entry.last_used, key) for key, entry in self._models.items()
+                      if entry.users == 0)
+        excess = len(idle) - self.max_idle
+        if excess > 0:
+            self._evict([key for _, key in idle[:excess]])
+
+    def _evict(self, keys):
+        for key in keys:
+            model = self._models.pop(key).model
+            close = getattr(model, "close", None)  # MediaPipe tasks hold native resources
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    print(f"[ModelPool] Error closing {key}: {e}")
+        if keys:
+            gc.collect()
+        return keys
+
+    def _start_evictor(self):
+        if self._evictor is None and self.idle_timeout is not None:
+            self._evictor = threading.Thread(target=self._evict_loop, daemon=True)
+            self._evictor.start()
+
+    def _evict_loop(self):
+        while not self._stop_event.wait(self.check_interval):
+            self.evict_idle()
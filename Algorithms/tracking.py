@@ -0,0 +1,78 @@
+"""
+Cheap box tracking between detector runs
+
+Boxes are moved with sparse Lucas-Kanade optical flow on a grid of points inside
+each box, on a downscaled grey copy of the frame. This is a fraction of the cost
+of running a detector, so detectors only need to run every few frames.
+"""
+from dataclasses import dataclass
+import cv2
+import numpy as np
+
+@dataclass
+class TrackUpdate:
+    """boxes after an update, with how reliable the update was"""
+    boxes: np.ndarray  # (n, 4) x1, y1, x2, y2 in frame pixels
+    quality: float  # lowest fraction of a box's points that were tracked, 1.0 is perfect
+    motion: float  # largest box displacement this frame in frame pixels
+
+class BoxFlowTracker:
+    """Move (x1, y1, x2, y2) boxes from frame to frame with optical flow"""
+    def __init__(self, grid_size=5, flow_width=320):
+        self.grid_size = grid_size  # points per box side
+        self.flow_width = flow_width  # width of the grey image flow runs on
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self._prev_gray = None
+        self._scale = 1.0
+
+    def _grey(self, frame):
+        """downscaled grey copy of a BGR frame"""
+        self._scale = min(1.0, self.flow_width / frame.shape[1])
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self._scale < 1.0:
+            gray = cv2.resize(gray, None, fx=self._scale, fy=self._scale,
+                              interpolation=cv2.INTER_AREA)
+        return gray
+
+    def _seed_points(self):
+        """grid of points over the inner 80% of every box, in flow image pixels"""
+        steps = np.linspace(0.1, 0.9, self.grid_size, dtype=np.float32)
+        gx, gy = np.meshgrid(steps, steps)
+        gx, gy = gx.ravel(), gy.ravel()
+        boxes = self.boxes * self._scale
+        widths = (boxes[:, 2] - boxes[:, 0])[:, None]
+        heights = (boxes[:, 3] - boxes[:, 1])[:, None]
+        xs = boxes[:, 0][:, None] + gx[None, :] * widths
+        ys = boxes[:, 1][:, None] + gy[None, :] * heights
+        return np.stack([xs.ravel(), ys.ravel()], axis=1).reshape(-1, 1, 2).astype(np.float32)
+
+    def reset(self, frame, boxes):
+        """Start tracking a fresh set of detector boxes"""
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4).copy()
+        self._prev_gray = self._grey(frame)
+
+    def update(self, frame) -> TrackUpdate:
+        """Move the boxes onto a new frame"""
+        gray = self._grey(frame)
+        if self._prev_gray is None or len(self.boxes) == 0 or gray.shape != self._prev_gray.shape:
+            self._prev_gray = gray
+            return TrackUpdate(boxes=self.boxes, quality=1.0 if len(self.boxes) == 0 else 0.0,
+                               motion=0.0)
+
+        points = self._seed_points()
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None,
+                                                    winSize=(15, 15), maxLevel=2)
+        self._prev_gray = gray
+
+        per_box = self.grid_size * self.grid_size
+        tracked = status.reshape(-1, per_box).astype(bool)
+        shifts = (moved - points).reshape(-1, per_box, 2) / self._scale
+        quality, motion = 1.0, 0.0
+        for i, good in enumerate(tracked):
+            quality = min(quality, good.mean())
+            if not good.any():
+                continue
+            dx, dy = np.median(shifts[i][good], axis=0)
+            self.boxes[i] += (dx, dy, dx, dy)
+            motion = max(motion, float(np.hypot(dx, dy)))
+        return TrackUpdate(boxes=self.boxes, quality=float(quality), motion=motion)
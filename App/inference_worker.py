@@ -0,0 +1,74 @@
+"""Background inference worker so pages paint video at camera rate while models run"""
+import queue
+import threading
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+class InferenceWorker(QThread):
+    """
+    Run a recogniser's analysis function on its own thread and emit the results.
+    Frames wait in a small bounded queue, when it is full the oldest frame is
+    dropped so a slow model skips frames instead of building up latency.
+    """
+    result_ready = pyqtSignal(int, object)  # frame sequence number, analysis result
+
+    def __init__(self, analyse, max_in_flight=1, parent=None):
+        super().__init__(parent)
+        self.analyse = analyse
+        self.dropped_frames = 0
+        self._queue = queue.Queue(maxsize=max_in_flight)
+        self._running = True
+
+    def submit(self, seq, frame):
+        """Queue a frame for analysis, never blocks the caller"""
+        while True:
+            try:
+                self._queue.put_nowait((seq, frame))
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()  # drop the oldest waiting frame
+                    self.dropped_frames += 1
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        """worker loop, analyses queued frames until stopped"""
+        while self._running:
+            try:
+                seq, frame = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                result = self.analyse(frame)
+            except Exception as e:
+                print(f"Error during inference: {e}")
+                continue
+            self.result_ready.emit(seq, result)
+
+    def stop(self):
+        """Stop the worker and wait for the current inference to finish"""
+        self._running = False
+        self.wait(2000)
+
+class AsyncResults(QObject):
+    """
+    Bring results from a library's own callback thread (e.g. MediaPipe
+    LIVE_STREAM) to the UI thread. A result older than the newest one already
+    delivered is dropped, so the page never goes back in time.
+    """
+    result_ready = pyqtSignal(int, object)  # frame sequence number, analysis result
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.dropped_results = 0
+        self._last_seq = -1
+        self._lock = threading.Lock()
+
+    def publish(self, seq, result):
+        """Called from any thread, queued to the UI thread through the signal"""
+        with self._lock:
+            if seq <= self._last_seq:
+                self.dropped_results += 1
+                return
+            self._last_seq = seq
+        self.result_ready.emit(seq, result)
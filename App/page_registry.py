@@ -0,0 +1,73 @@
+"""
+Page registry
+
+Pages (and the algorithms, models and sensor SDKs they import) are only imported
+when their button is first pressed, so the home page appears without waiting for
+torch, tensorflow, mediapipe etc. The likely next pages can be imported on a
+background thread once the home page is showing.
+"""
+import importlib
+import threading
+import time
+from dataclasses import dataclass
+
+@dataclass
+class PageEntry:
+    """where to find a page class, the arguments it is created with and what it imports lazily"""
+    module: str
+    class_name: str
+    args: tuple = ()
+    algorithms: tuple = ()  # modules the page imports on creation, warmed by preload
+
+PAGES = {
+    "hand_gesture": PageEntry("App.pages.hand_gesture_page", "HandGestureRecognitionPage"),
+    "facial_expression": PageEntry("App.pages.facial_expression_page",
+                                   "FacialExpressionRecognitionPage"),
+    "object_detection": PageEntry("App.pages.general_page", "GeneralDemoPage", ("object",),
+                                  ("Algorithms.Objects.object_detection",)),
+    "colour_detection": PageEntry("App.pages.general_page", "GeneralDemoPage", ("colour",),
+                                  ("Algorithms.Objects.colour_detection",)),
+    "lidar": PageEntry("App.pages.lidar_page", "LidarCameraPage"),
+    "thermal": PageEntry("App.pages.thermal_page", "ThermalCameraPage"),
+    "event": PageEntry("App.pages.event_page", "EventCameraPage"),
+    "multi_sensor": PageEntry("App.pages.allTest", "MultiSensorPage"),
+}
+
+# Pages most likely to be opened first, preloaded in this order after startup
+PRELOAD_ORDER = ("colour_detection", "hand_gesture", "facial_expression", "object_detection",
+                 "thermal", "lidar", "event")
+
+class PageRegistry:
+    """Create pages by name, importing their modules on first use"""
+    def __init__(self, pages=None):
+        self.pages = PAGES if pages is None else pages
+        self.import_times = {}  # module name -> seconds spent importing it
+        self._preload_thread = None
+
+    def page_class(self, key):
+        """Import (if needed) and return the class of a page"""
+        entry = self.pages[key]
+        start = time.perf_counter()
+        module = importlib.import_module(entry.module)
+        self.import_times.setdefault(entry.module, time.perf_counter() - start)
+        return getattr(module, entry.class_name)
+
+    def create(self, key):
+        """Create a page by name"""
+        return self.page_class(key)(*self.pages[key].args)
+
+    def preload(self, keys=PRELOAD_ORDER):
+        """Import the given pages on a background thread, in order"""
+        if self._preload_thread is not None:
+            return
+        self._preload_thread = threading.Thread(target=self._preload, args=(keys,), daemon=True)
+        self._preload_thread.start()
+
+    def _preload(self, keys):
+        for key in keys:
+            try:
+                self.page_class(key)
+                for module in self.pages[key].algorithms:
+                    importlib.import_module(module)
+            except Exception as e:  # missing SDKs only matter once the page is opened
+                print(f"[PageRegistry] Could not preload {key}: {e}")
@@ -1,79 +1,265 @@
-import sys
-import cv2
-import numpy as np
-from PyQt5.QtWidgets import QApplication, QMainWindow, QGridLayout, QWidget, QLabel
-from PyQt5.QtGui import QPixmap, QImage
+"""
+Multi-Sensor Page
+
+RGB, thermal, LiDAR and event streams side by side in a 2x2 grid. Each stream
+is prepared on its own ingest thread at its own rate by a StreamScheduler
+(false colour and hotspots, a top-down point cloud, event count frames), and
+one UI timer shows whichever frames are new, so the panes never wait on each
+other. Every pane shows its rate against its target and its CPU share.
+"""
+import os
+import time
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLabel
 from PyQt5.QtCore import QTimer
-from ThermalCameraPage import ThermalCameraPage
-from LidarCameraPage import LidarCameraPage
+from Algorithms.Event.event_frames import EventFrameAccumulator
+from Algorithms.Lidar.birds_eye import BirdsEyeView
+from Algorithms.Thermal.thermal_analytics import ThermalAnalytics
+from App.pages.event_page import RIG_HOST
+from App.pages.thermal_page import THERMAL_URL
+from App.video_widget import VideoWidget
+from Sensors.capture import CameraBroker
+from Sensors.event_stream import EVENT_PORT, EventReceiver
+from Sensors.lidar_acquisition import LidarAcquisition
+from Sensors.lidar_recording import LidarReplay
+from Sensors.prophesee_raw import RawPlayer
+from Sensors.rtsp_ingest import RtspSource
+from Sensors.stream_scheduler import Stream, StreamScheduler
+from utils import load_stylesheet, close_event
 
-class MultiSensorPage(QMainWindow):
-    """Multi-Sensor Display (LiDAR, Thermal, Event, RGB)"""
-    def __init__(self):
-        super().__init__()
+# Native rate of each sensor on the rig, frames per second
+TARGET_FPS = {"rgb": 30, "thermal": 30, "lidar": 10, "event": 30}
+# (stream, pane title, grid row, grid column)
+PANES = (("rgb", "RGB", 0, 0), ("thermal", "Thermal", 0, 1),
+         ("lidar", "LiDAR", 1, 0), ("event", "Event", 1, 1))
+
+class FrameStream(Stream):
+    """Frames of a LatestFrameSource (a camera or an RTSP stream), optionally processed"""
+    def __init__(self, name, target_fps, open_source, process=None):
+        super().__init__(name, target_fps)
+        self.open_source = open_source  # returns a started source with wait() and release()
+        self.process = process  # frame -> display frame, None shows frames as they are
+        self.source = None
+        self.last_seq = -1
+
+    def open(self):
+        self.source = self.open_source()
+
+    def poll(self, timeout):
+        frame = self.source.wait(self.last_seq, timeout)
+        if frame is not None:
+            self.last_seq = frame.seq
+        return frame
+
+    def prepare(self, data):
+        return data.image if self.process is None else self.process(data.image)
+
+    def status(self):
+        if self.source is None:
+            return super().status()
+        if hasattr(self.source, "stats"):
+            stats = self.source.stats()
+            if stats.state == "waiting":
+                return f"not connected, retrying in {stats.retry_in:.0f} s"
+            return "" if stats.state == "streaming" else stats.state
+        return "" if self.source.is_opened() else "not connected"
+
+    def close(self):
+        if self.source is not None:
+            self.source.release()
+
+class LidarStream(Stream):
+    """Top-down image of the LiDAR frames received in the last window seconds"""
+    def __init__(self, target_fps, open_listener, window=0.3, view=None):
+        super().__init__("lidar", target_fps)
+        self.open_listener = open_listener  # returns a listener with get_points()
+        self.window = window
+        self.view = view if view is not None else BirdsEyeView()
+        self.acquisition = None
+        self.last_seq = -1
+
+    def open(self):
+        self.acquisition = LidarAcquisition(self.open_listener()).start()
+
+    def poll(self, timeout):
+        deadline = time.monotonic() + timeout
+        frames = self.acquisition.window(self.window, self.last_seq)
+        while not frames and time.monotonic() < deadline:
+            time.sleep(self.acquisition.poll_interval)
+            frames = self.acquisition.window(self.window, self.last_seq)
+        if not frames:
+            return None
+        self.last_seq = frames[-1].seq
+        return frames
+
+    def prepare(self, data):
+        image = self.view.render(self.acquisition.accumulate(data))
+        self.acquisition.mark_displayed(data)
+        return image
+
+    def status(self):
+        if self.acquisition is not None and self.acquisition.latest() is None:
+            return "waiting for frames"
+        return super().status()
+
+    def close(self):
+        if self.acquisition is not None:
+            self.acquisition.stop()
+
+class EventStream(Stream):
+    """Count frames of the newest events of an EventReceiver or RawPlayer"""
+    def __init__(self, target_fps, open_receiver, window=33_000):
+        super().__init__("event", target_fps)
+        self.open_receiver = open_receiver  # returns a started receiver
+        self.window = window  # microseconds of events per frame
+        self.receiver = None
+        self.accumulator = None
+        self.last_head = 0  # events the buffer held at the last poll
 
+    def open(self):
+        self.receiver = self.open_receiver()
+
+    def poll(self, timeout):
+        # Events stream in continuously, every tick with new events shows the newest window
+        head = self.receiver.buffer.head
+        if self.receiver.sensor_size is None or head == self.last_head:
+            return None
+        self.last_head = head
+        return self.receiver.buffer.latest(self.window)
+
+    def prepare(self, data):
+        width, height = self.receiver.sensor_size
+        if self.accumulator is None or (self.accumulator.width, self.accumulator.height) != \
+                (width, height):
+            self.accumulator = EventFrameAccumulator(width, height, window=self.window)
+        return self.accumulator.count_frame(data)
+
+    def status(self):
+        if self.receiver is not None and not self.receiver.connected:
+            return "disconnected"
+        return super().status()
+
+    def close(self):
+        if self.receiver is not None:
+            self.receiver.stop()
+
+def cepton_listener():
+    """frames listener of the first Cepton sensor, initialising the SDK if needed"""
+    import cepton_sdk  # only needed without a LiDAR replay
+    if not cepton_sdk.is_initialized():
+        cepton_sdk.initialize(enable_wait=True)
+    try:
+        sensor = cepton_sdk.Sensor.create_by_index(0)
+    except Exception as e:
+        raise Exception(f"No LiDAR sensor detected: {e}")
+    return cepton_sdk.SensorFramesListener(sensor.serial_number)
+
+class MultiSensorPage(QWidget):
+    """Multi-Sensor Display (RGB, Thermal, LiDAR, Event)"""
+    def __init__(self, camera=0, thermal_url=THERMAL_URL, lidar_replay=None,
+                 event_host=RIG_HOST, event_port=EVENT_PORT, event_protocol="tcp",
+                 event_replay=None, refresh_interval=15):
+        super().__init__()
         self.setWindowTitle("Multi-Sensor View")
-        self.setGeometry(100, 100, 1400, 900)
-
-        # Central widget & layout
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        layout = QGridLayout()
-        central_widget.setLayout(layout)
-
-        # ✅ Add actual sensor pages
-        self.lidar_page = LidarCameraPage()  
-        self.thermal_page = ThermalCameraPage()
-
-        # Create QLabel placeholders
-        self.event_label = QLabel("Event Camera")
-        self.rgb_label = QLabel("RGB Camera")
-
-        # Add widgets to layout (2x2 grid)
-        layout.addWidget(self.lidar_page, 0, 0)   # Top-left (LiDAR)
-        layout.addWidget(self.thermal_page, 0, 1)  # Top-right (Thermal)
-        layout.addWidget(self.event_label, 1, 0)   # Bottom-left (Event)
-        layout.addWidget(self.rgb_label, 1, 1)     # Bottom-right (RGB)
-
-        # Timer for updating streams
-        self.timer = QTimer(self)
+        self.setup_ui()
+
+        analytics = ThermalAnalytics()
+        def open_listener():
+            if lidar_replay is None:
+                return cepton_listener()
+            return LidarReplay(lidar_replay, loop=True)
+
+        def open_receiver():
+            if event_replay is None:
+                return EventReceiver(event_host, event_port, event_protocol).start()
+            return RawPlayer(event_replay, loop=True).start()
+
+        # Sources are opened on their ingest threads, a missing sensor never blocks the UI
+        self.scheduler = StreamScheduler([
+            FrameStream("rgb", TARGET_FPS["rgb"],
+                        lambda: CameraBroker.shared().subscribe(camera)),
+            # A video file stands in for the thermal camera at its own frame rate
+            FrameStream("thermal", TARGET_FPS["thermal"],
+                        lambda: RtspSource(thermal_url,
+                                           realtime=os.path.isfile(thermal_url)).start(),
+                        process=lambda image: analytics.process(image).image),
+            LidarStream(TARGET_FPS["lidar"], open_listener),
+            EventStream(TARGET_FPS["event"], open_receiver),
+        ]).start()
+
+        # One refresh for every pane, only streams with a new frame are redrawn
+        self.next_stats = 0.0
+        self.timer = QTimer()
         self.timer.timeout.connect(self.update_frames)
-        self.timer.start(33)  # ~30 FPS
+        self.timer.start(refresh_interval)
+
+    def setup_ui(self):
+        """Setup UI"""
+        load_stylesheet(self, "App/styles/sensors.qss")
+        self.main_layout = QVBoxLayout()
+        self.title_label = QLabel("Multi-Sensor View")
+        self.title_label.setObjectName("title")
+        self.main_layout.addWidget(self.title_label)
+
+        self.grid_layout = QGridLayout()
+        self.feeds = {}
+        self.status_labels = {}
+        self.titles = {}
+        for name, title, row, column in PANES:
+            pane = QVBoxLayout()
+            feed = VideoWidget()
+            feed.setObjectName(f"{name}_feed")
+            label = QLabel(f"{title}: starting...")
+            label.setObjectName("status")
+            pane.addWidget(feed, 1)
+            pane.addWidget(label)
+            self.grid_layout.addLayout(pane, row, column)
+            self.feeds[name] = feed
+            self.status_labels[name] = label
+            self.titles[name] = title
+        self.main_layout.addLayout(self.grid_layout, 1)
+
+        self.status_label = QLabel("")
+        self.status_label.setObjectName("status")
+        self.main_layout.addWidget(self.status_label)
+        self.setLayout(self.main_layout)
 
     def update_frames(self):
-        """Updates all sensor displays."""
-        self.event_label.setPixmap(self.get_event_frame())
-        self.rgb_label.setPixmap(self.get_rgb_frame())
-
-    def get_event_frame(self):
-        """Simulated event camera feed (replace with real event camera data)."""
-        img = np.random.randint(0, 2, (300, 400), dtype=np.uint8) * 255  # Black & white noise
-        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
-        return self.convert_to_pixmap(img)
-
-    def get_rgb_frame(self):
-        """Captures an RGB frame from webcam."""
-        cap = cv2.VideoCapture(0)
-        ret, frame = cap.read()
-        cap.release()
-        if ret:
-            return self.convert_to_pixmap(frame)
-        return self.get_blank_frame()
-
-    def convert_to_pixmap(self, img):
-        """Converts OpenCV image to QPixmap for QLabel display."""
-        h, w, ch = img.shape
-        bytes_per_line = ch * w
-        q_img = QImage(img.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        return QPixmap.fromImage(q_img)
-
-    def get_blank_frame(self):
-        """Returns a blank black frame in case of error."""
-        img = np.zeros((300, 400, 3), dtype=np.uint8)
-        return self.convert_to_pixmap(img)
+        """Show the new frames of every stream, and the rates once a second"""
+        for name, image in self.scheduler.take().items():
+            self.feeds[name].set_frame(image)
+        now = time.monotonic()
+        if now < self.next_stats:
+            return
+        self.next_stats = now + self.scheduler.stats_interval
+        for name, stats in self.scheduler.stats().items():
+            text = (f"{self.titles[name]}: {stats.fps:.0f}/{stats.target_fps:.0f} FPS, "
+                    f"shown {stats.shown_fps:.0f}, CPU {100 * stats.cpu:.0f}%, "
+                    f"{1000 * stats.prepare_time:.1f} ms per frame")
+            self.status_labels[name].setText(f"{text}, {stats.status}" if stats.status else text)
+        self.status_label.setText(f"Process CPU {100 * self.scheduler.process_cpu:.0f}% of one "
+                                  f"core, {os.cpu_count()} cores")
+
+    def closeEvent(self, event):
+        """Stop the streams, each releases its sensor"""
+        self.timer.stop()
+        self.scheduler.stop()
+        close_event(event, self)
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MultiSensorPage()
-    window.show()
-    sys.exit(app.exec_())
+    import argparse
+    import sys
+    from PyQt5.QtWidgets import QApplication
+    parser = argparse.ArgumentParser(description="All four sensors on one page")
+    parser.add_argument("--camera", type=int, default=0, help="RGB camera index")
+    parser.add_argument("--thermal", default=THERMAL_URL, help="thermal RTSP URL or video file")
+    parser.add_argument("--lidar-replay", help="LiDAR recording to play instead of the sensor")
+    parser.add_argument("--event-replay", help="Prophesee RAW recording to play instead of the rig")
+    parser.add_argument("--event-host", default=RIG_HOST)
+    parser.add_argument("--event-protocol", choices=("tcp", "udp"), default="tcp")
+    args = parser.parse_args()
+    qt_app = QApplication(sys.argv)
+    page = MultiSensorPage(camera=args.camera, thermal_url=args.thermal,
+                           lidar_replay=args.lidar_replay, event_host=args.event_host,
+                           event_protocol=args.event_protocol, event_replay=args.event_replay)
+    page.showMaximized()
+    sys.exit(qt_app.exec_())
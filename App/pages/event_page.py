@@ -1,34 +1,69 @@
-import os
-import sys
-import subprocess
-import time
-import threading
-import pygetwindow as gw
-import win32gui
-import win32con
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QApplication
-from PyQt5.QtCore import QTimer, Qt
+"""Event Camera Page"""
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox
+from PyQt5.QtCore import QTimer
+from Algorithms.Event.event_counter import CountingLine, EventCounter
+from Algorithms.Event.event_frames import ACCUMULATION_MODES, EventFrameAccumulator
+from App.video_widget import VideoWidget
+from Sensors.event_stream import EVENT_PORT, EventReceiver
+from Sensors.prophesee_raw import RawPlayer
 from utils import load_stylesheet, close_event, QRCodeWidget
 
+RIG_HOST = "169.254.10.10"
+
 class EventCameraPage(QWidget):
-    """Event Camera Page with Embedded VcXsrv"""
-    def __init__(self):
+    """
+    Event Camera Page. Events are streamed from the rig (python -m
+    Sensors.event_stream --camera runs there), received on a background thread
+    and accumulated into frames here. With replay, a Prophesee RAW recording
+    is played instead.
+    """
+    def __init__(self, host=RIG_HOST, port=EVENT_PORT, protocol="tcp", mode="count",
+                 replay=None, speed=1.0):
         super().__init__()
         self.setWindowTitle("Event Camera Stream")
 
-        self.vcxsrv_process = None
-        self.ssh_process = None
-        self.is_running = False
+        self.setup_ui(mode)
+
+        # Events land in a ring buffer on the receiver's thread, the timer draws them
+        if replay is not None:
+            # A recording looped at its original timing (or speed times faster), no rig needed
+            self.receiver = RawPlayer(replay, speed=speed, loop=True).start()
+        else:
+            self.receiver = EventReceiver(host, port, protocol).start()
+        self.accumulator = None
+        self.counter = None  # counts objects crossing the middle of the frame
+        self.mode = mode
+        self.cursor = 0  # ring buffer position the counter and time surface have reached
 
-        self.setup_ui()
-        QTimer.singleShot(100, self.start_prophesee_viewer)
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_frame)
+        self.timer.start(33)
 
-    def setup_ui(self):
+    def setup_ui(self, mode):
         """Setup UI"""
         load_stylesheet(self, "App/styles/sensors.qss")
 
+        # Main layout (horizontal split)
+        self.main_layout = QHBoxLayout()
+
+        # Left side: event frames
+        self.video_layout = QVBoxLayout()
+        self.event_feed = VideoWidget()
+        self.event_feed.setObjectName("event_feed")
+        self.video_layout.addWidget(self.event_feed)
+        self.status_layout = QHBoxLayout()
+        self.status_label = QLabel("Waiting for the event stream...")
+        self.status_label.setObjectName("status")
+        self.mode_box = QComboBox()
+        self.mode_box.addItems(ACCUMULATION_MODES)
+        self.mode_box.setCurrentText(mode)
+        self.mode_box.currentTextChanged.connect(self.set_mode)
+        self.status_layout.addWidget(self.status_label, 1)
+        self.status_layout.addWidget(self.mode_box)
+        self.video_layout.addLayout(self.status_layout)
+
+        # Right side: title and description
         self.layout = QVBoxLayout()
-        self.layout.setAlignment(Qt.AlignRight)
         self.title_label = QLabel("Event Stream")
         #self.title_label.setAlignment(Qt.AlignCenter)
         self.title_label.setObjectName("title")
@@ -49,95 +84,67 @@ class EventCameraPage(QWidget):
         self.qr_widget = QRCodeWidget("Datasets/QRcodes/event_QR.svg",
                                       "Scan this to learn more about event cameras!",
                                       label_width=800)
-        
+
         self.layout.addStretch()
         self.layout.addWidget(self.title_label)
         self.layout.addWidget(self.description)
         self.layout.addStretch()
         self.layout.addWidget(self.qr_widget)
 
-        self.setLayout(self.layout)
-
-    def start_prophesee_viewer(self):
-        """Start Prophesee Viewer embedded in PyQt"""
-        if not self.is_running:
-            self.is_running = True
-            thread = threading.Thread(target=self._run_prophesee_setup)
-            thread.daemon = True
-            thread.start()
-
-    def _run_prophesee_setup(self):
-        """Start VcXsrv and Prophesee Viewer, then embed it"""
-        try:
-            # Start VcXsrv
-            self.vcxsrv_process = self.start_vcxsrv()
-
-            time.sleep(3)  # Allow VcXsrv to initialize
-
-            # Set DISPLAY environment variable
-            env = os.environ.copy()
-            env['DISPLAY'] = 'localhost:0.0'
-
-            # Start Prophesee Viewer via SSH
-            self.ssh_process = subprocess.Popen(
-                ["ssh", "-Y", "root@169.254.10.10", "sudo", "-E", "prophesee_viewer"],
-                env=env
-            )
-
-            time.sleep(1)  # Wait for the window to appear
-            self.embed_vcxsrv_window()
-
-        except Exception as e:
-            print(e)
-
-    def start_vcxsrv(self):
-        """Start VcXsrv in single window mode, minimized"""
-        vcxsrv_path = "C:\\Program Files\\VcXsrv\\vcxsrv.exe"
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = win32con.SW_MINIMIZE  # Start minimized
-        return subprocess.Popen([vcxsrv_path, ":0", "-screen", "0", "800x600+0+0"],
-                                startupinfo=startupinfo)
-
-    def get_vcxsrv_window(self):
-        """Find the VcXsrv window handle (HWND)"""
-        time.sleep(1)
-        for window in gw.getAllWindows():
-            if "VcXsrv" in window.title:
-                return window._hWnd  # Return window handle
-        return None
-
-    def embed_vcxsrv_window(self):
-        """Reparent and center the VcXsrv window inside the PyQt application"""
-        hwnd_vcxsrv = self.get_vcxsrv_window()
-        if hwnd_vcxsrv:
-            win32gui.SetParent(hwnd_vcxsrv, self.winId())  
-            win32gui.SetWindowLong(hwnd_vcxsrv, win32con.GWL_STYLE, win32con.WS_VISIBLE)
-
-            # Get panel size
-            panel_width = self.layout.geometry().width() //2
-            panel_height = self.layout.geometry().height()
-
-            # Center the VcXsrv window within the left panel
-            win32gui.MoveWindow(hwnd_vcxsrv, (panel_width - 640) // 2, (panel_height - 480) // 2, 
-                                640, 480, True)
-            print(f"VcXsrv window {hwnd_vcxsrv} embedded and centered.")
+        self.main_layout.addLayout(self.video_layout, 1)
+        self.main_layout.addLayout(self.layout, 1)
+        self.setLayout(self.main_layout)
+
+    def set_mode(self, mode):
+        """Switch between event count and time surface frames"""
+        self.mode = mode
+        if self.accumulator is not None:
+            self.accumulator.mode = mode
+
+    def update_frame(self):
+        """Accumulate the newest events into a frame and show it"""
+        if self.receiver.sensor_size is None:
+            return
+        width, height = self.receiver.sensor_size
+        # Both are rebuilt when the sensor size in the stream header changes
+        if self.counter is None or (self.counter.width, self.counter.height) != (width, height):
+            self.accumulator = EventFrameAccumulator(width, height, mode=self.mode)
+            self.counter = EventCounter(width, height, lines=[
+                CountingLine((width // 2, 0), (width // 2, height), "crossed")])
+            self.cursor = self.receiver.buffer.head
+        # Every event since the last frame is counted, whichever frame is shown
+        events, self.cursor, _ = self.receiver.buffer.read(self.cursor)
+        self.counter.process(events)
+        if self.mode == "count":
+            frame = self.accumulator.count_frame(
+                self.receiver.buffer.latest(self.accumulator.window))
         else:
-            print("VcXsrv window not found.")
-
-
-    def stop_prophesee_viewer(self):
-        """Stop Prophesee Viewer"""
-        if self.is_running:
-            if self.ssh_process:
-                self.ssh_process.terminate()
-                self.ssh_process = None
-            if self.vcxsrv_process:
-                self.vcxsrv_process.terminate()
-                self.vcxsrv_process = None
-            self.is_running = False
+            self.accumulator.add(events)
+            frame = self.accumulator.surface_frame()
+        self.event_feed.set_frame(self.counter.draw(frame))
+        state = "" if self.receiver.connected else ", disconnected"
+        self.status_label.setText(f"{self.receiver.rate / 1e6:.2f} M events/s, "
+                                  f"{self.receiver.batches_lost} batches lost{state}, "
+                                  f"{len(self.counter.crossings)} counted")
 
     def closeEvent(self, event):
         """Handle close event"""
-        self.stop_prophesee_viewer()
+        self.receiver.stop()
         close_event(event, self)
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from PyQt5.QtWidgets import QApplication
+    parser = argparse.ArgumentParser(description="Event camera page on its own")
+    parser.add_argument("--replay", help="Prophesee RAW recording to play instead of the rig")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed")
+    parser.add_argument("--host", default=RIG_HOST)
+    parser.add_argument("--protocol", choices=("tcp", "udp"), default="tcp")
+    parser.add_argument("--mode", choices=ACCUMULATION_MODES, default="count")
+    args = parser.parse_args()
+    qt_app = QApplication(sys.argv)
+    page = EventCameraPage(host=args.host, protocol=args.protocol, mode=args.mode,
+                           replay=args.replay, speed=args.speed)
+    page.showMaximized()
+    sys.exit(qt_app.exec_())
@@ -1,21 +1,32 @@
 """Facial expression page opened from home_Page.ui"""
-import cv2
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout
-from PyQt5.QtGui import QPixmap, QImage, QFont
+from PyQt5.QtGui import QFont
 from PyQt5.QtCore import QTimer, Qt
 from Algorithms.Body.emotion_recognition import EmotionRecogniser
-from utils import load_stylesheet, close_event, QRCodeWidget
+from Algorithms.Body.face_detectors import res10_available
+from App.inference_worker import InferenceWorker
+from App.video_widget import VideoWidget
+from utils import load_stylesheet, close_event, QRCodeWidget, IconCache, set_icon
 
 class FacialExpressionRecognitionPage(QWidget):
     """Emotion Recognition"""
     def __init__(self):
         super().__init__()
-        self.expression_recogniser = EmotionRecogniser()
-        self.emoji_icons = self._load_emojis()  # Load emojis in the UI class
-        self.blank_image = QPixmap(200, 200)
-        self.blank_image.fill(Qt.white)  # Blank white image for no emotion
-
+        # Face detection every 5th analysed frame, a KCF tracker follows the face between.
+        # The Res10 SSD is much faster than MTCNN when its weights have been downloaded
+        face_detector = "res10" if res10_available() else "mtcnn"
+        self.expression_recogniser = EmotionRecogniser(detect_every=5,
+                                                       face_detector=face_detector)
         self.setup_ui()
+        # Emojis are decoded and scaled to the label size once, not every frame
+        self.emoji_icons = self._load_emojis()
+        self.blank_image = IconCache.blank(self.face_emoji.size())  # Blank image for no emotion
+
+        # Emotion detection runs on a worker, the video paints at camera rate
+        self.analysis = None
+        self.worker = InferenceWorker(self.expression_recogniser.analyse)
+        self.worker.result_ready.connect(self.on_analysis)
+        self.worker.start()
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
@@ -24,7 +35,7 @@ class FacialExpressionRecognitionPage(QWidget):
         load_stylesheet(self, 'App/styles/facial_expression.qss')
 
     def _load_emojis(self):
-        """Load emoji images from file paths"""
+        """Load emoji images from file paths through the icon cache"""
         emoji_paths = {
             'happy': 'Datasets/Emojis/happy.png',
             'sad': 'Datasets/Emojis/sad.png',
@@ -35,14 +46,7 @@ class FacialExpressionRecognitionPage(QWidget):
             'disgust': 'Datasets/Emojis/disgust.png',
         }
 
-        emojis = {}
-        for expression, path in emoji_paths.items():
-            pixmap = QPixmap(path)
-            if pixmap.isNull():
-                print(f"Warning: Could not load emoji {path}")
-            else:
-                emojis[expression] = pixmap.scaled(200, 200, Qt.KeepAspectRatio)
-        return emojis
+        return IconCache.load(emoji_paths, self.face_emoji.size())
 
     def setup_ui(self):
         """Setup face expression page UI"""
@@ -53,11 +57,9 @@ class FacialExpressionRecognitionPage(QWidget):
         # Left panel for the video feed
         left_layout = QVBoxLayout()
         left_layout.addStretch()
-        self.video_feed = QLabel()
+        self.video_feed = VideoWidget()
         self.video_feed.setObjectName("video_feed")
-        self.video_feed.setScaledContents(True)
         self.video_feed.setFixedSize(900, 900)
-        self.video_feed.setAlignment(Qt.AlignCenter)
         left_layout.addWidget(self.video_feed, alignment=Qt.AlignCenter)
         left_layout.addStretch()
 
@@ -119,29 +121,27 @@ class FacialExpressionRecognitionPage(QWidget):
 
     def update_frame(self):
         """Update frames from video stream and detected emotion"""
-        result = self.expression_recogniser.process_frame()
-        if result:
-            self.video_feed.setPixmap(self._convert_cv_to_qt(result.main_frame))
-            self.face_emoji.setPixmap(self.emoji_icons.get(result.emotion_text, self.blank_image))
-
-    def _convert_cv_to_qt(self, cv_img):
-        """Convert cv2 img to QPixmap for display in QLabel"""
-        if cv_img is None:
-            return QPixmap()
-        if len(cv_img.shape) == 2:  # Grayscale
-            h, w = cv_img.shape
-            qt_image = QImage(cv_img.data, w, h, w, QImage.Format_Grayscale8)
-        else:  # Color
-            h, w, ch = cv_img.shape
-            rgb_image = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-            qt_image = QImage(rgb_image.data, w, h, ch * w, QImage.Format_RGB888)
-        return QPixmap.fromImage(qt_image)
+        frame = self.expression_recogniser.read_frame()
+        if frame is None:
+            return
+        self.worker.submit(frame.seq, frame.image)
+        result = self.expression_recogniser.draw(frame.image.copy(), self.analysis)
+        self.video_feed.set_frame(result.main_frame)
+        set_icon(self.face_emoji, result.emotion_text,
+                 self.emoji_icons.get(result.emotion_text, self.blank_image))
+
+    def on_analysis(self, _seq, analysis):
+        """Store the newest emotion analysis from the worker"""
+        self.analysis = analysis
 
     def release(self):
         """Release resources properly"""
         if hasattr(self, "timer") and self.timer.isActive():
             self.timer.stop()
+        self.worker.stop()
 
-    def use_close_event(self, event):
+    def closeEvent(self, event):
         """Handle close event to release resources"""
+        self.worker.stop()  # finish the current analysis before the model goes back to the pool
+        self.expression_recogniser.release()
         close_event(event, self)
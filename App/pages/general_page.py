@@ -1,11 +1,11 @@
 """Page that is used when only a stream is outputted, object detection, colour detection etc"""
 import sys
-import cv2
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout
-from PyQt5.QtGui import QPixmap, QImage,QFontMetrics
+from PyQt5.QtGui import QFontMetrics
 from PyQt5.QtCore import QTimer, Qt
-from Algorithms.Objects.colour_detection import ColourRecogniser
-from Algorithms.Objects.object_detection import ObjectRecogniser
+from Sensors.capture import CameraBroker
+from App.inference_worker import InferenceWorker
+from App.video_widget import VideoWidget
 from utils import load_stylesheet,close_event,QRCodeWidget
 
 class GeneralDemoPage(QWidget):
@@ -14,9 +14,13 @@ class GeneralDemoPage(QWidget):
         super().__init__()
 
         self.algorithm = algorithm
+        # Algorithms are imported per page so colour detection never loads torch
         if self.algorithm == "colour":
+            from Algorithms.Objects.colour_detection import ColourRecogniser
             self.title="Colour Detection"
-            self.recogniser = ColourRecogniser('Datasets/colour_ranges.csv')
+            # Detect on a half size copy of the camera frame, min_area is in camera pixels
+            self.recogniser = ColourRecogniser('Datasets/colour_ranges.csv',
+                                               analysis_scale=0.5, min_area=150)
             self.instructions = "Hold up one of the following colours:\n"
             for name in self.recogniser.bgr_colour_dict:
                 self.instructions += f"{name}, "            
@@ -26,9 +30,11 @@ class GeneralDemoPage(QWidget):
                 "finds the boundaries of these colour regions and draws outlines around them, "
                 "making it easy to identify and count different colours in the video.")
         elif self.algorithm == "object":
+            from Algorithms.Objects.object_detection import ObjectRecogniser
             self.title="Object Detection"
             self.instructions = "Hold up an object to detect and classify"
-            self.recogniser = ObjectRecogniser()
+            # Full YOLO pass every 3rd frame at 480px, optical flow moves the boxes in between
+            self.recogniser = ObjectRecogniser(conf=0.5, imgsz=480, detect_every=3)
             self.description = (
                 "YOLO is a fast object detection system that processes an image by dividing "
                 "it into a grid. Each grid cell predicts whether an object is present and, "
@@ -50,11 +56,9 @@ class GeneralDemoPage(QWidget):
          # Left panel for the video feed
         left_layout = QVBoxLayout()
         left_layout.addStretch()
-        self.video_feed = QLabel()
+        self.video_feed = VideoWidget()
         self.video_feed.setObjectName("video_feed")
-        self.video_feed.setScaledContents(True)
         self.video_feed.setFixedSize(900, 900)
-        self.video_feed.setAlignment(Qt.AlignCenter)
         left_layout.addWidget(self.video_feed, alignment=Qt.AlignCenter)
         left_layout.addStretch()
 
@@ -96,13 +100,19 @@ class GeneralDemoPage(QWidget):
         # Load stylesheet
         load_stylesheet(self, 'App/styles/general.qss')
 
-        # Start video capture
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        # Share the camera through the broker, frames arrive on its capture thread
+        self.source = CameraBroker.shared().subscribe(0)
+        if not self.source.is_opened():
             print("Error: Could not open video stream.")
             sys.exit()
 
-        self.failed_frames = 0  # Counter for consecutive failed frames
+        self.last_seq = -1  # Sequence number of the last frame shown
+
+        # Run detection off the UI thread, overlays update at model rate
+        self.detection = None
+        self.worker = InferenceWorker(self.recogniser.detect)
+        self.worker.result_ready.connect(self.on_detection)
+        self.worker.start()
 
         # Start Timer to Refresh Video Feed
         self.timer = QTimer(self)
@@ -118,44 +128,28 @@ class GeneralDemoPage(QWidget):
 
     def update_frame(self):
         """Capture and process frames for display"""
-        ret, frame = self.cap.read()
-        if not ret:
-            self.failed_frames += 1
-            print(f"Failed to grab frame {self.failed_frames} times.")
-
-            if self.failed_frames > 10:
+        latest = self.source.read(self.last_seq)
+        if latest is None:
+            # No new frame yet, only give up if the capture thread keeps failing
+            if self.source.failed_reads > 10:
                 print("Too many failed frames. Stopping the stream.")
                 self.close()
             return
+        self.last_seq = latest.seq
 
-        self.failed_frames = 0  # Reset counter on successful capture
-
-        # Resize frame to match QLabel's minimum size
-        frame = cv2.resize(frame,
-                           (
-                               self.video_feed.width(),
-                               self.video_feed.height()
-                            ), interpolation=cv2.INTER_LINEAR)
-
-        # Apply processing
-        if self.algorithm == "colour":
-            processed_frame = self.recogniser.detect_and_draw(frame)
-        elif self.algorithm == "object":
-            processed_frame = self.recogniser.detect_and_draw(frame)
-        else:
-            processed_frame = frame
-
-        # Convert to QImage
-        height, width, channels = processed_frame.shape
-        bytes_per_line = channels * width
-        qimg = QImage(processed_frame.data, width, height, bytes_per_line, QImage.Format_BGR888)
+        # Detect on the frame as captured, the video widget scales it while painting
+        self.worker.submit(latest.seq, latest.image)
+        self.video_feed.set_frame(self.recogniser.draw(latest.image.copy(), self.detection))
 
-        # Directly assign without scaling first
-        pixmap = QPixmap.fromImage(qimg)
-        self.video_feed.setPixmap(pixmap)
+    def on_detection(self, _seq, detection):
+        """Store the newest detection result from the worker"""
+        self.detection = detection
 
-    def use_close_event(self, event):
+    def closeEvent(self, event):
         """Handle window close event to release resources"""
-        self.cap.release()
+        self.source.release()
         self.timer.stop()
+        self.worker.stop()
+        if hasattr(self.recogniser, "release"):  # pooled models go back to the pool
+            self.recogniser.release()
         close_event(event, self)
@@ -1,10 +1,11 @@
 """page for hand gesture detection, opened from home_page.py button"""
-import cv2
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout
-from PyQt5.QtGui import QPixmap, QImage, QFont
+from PyQt5.QtGui import QFont
 from PyQt5.QtCore import QTimer, Qt
 from Algorithms.Body.hand_gesture_test import GestureRecogniser
-from utils import load_stylesheet,close_event, QRCodeWidget
+from App.inference_worker import AsyncResults
+from App.video_widget import VideoWidget
+from utils import load_stylesheet,close_event, QRCodeWidget, IconCache, set_icon
 
 class HandGestureRecognitionPage(QWidget):
     """Hand gesture recogniser"""
@@ -20,12 +21,19 @@ class HandGestureRecognitionPage(QWidget):
             'ILoveYou': 'Datasets/HandIcons/rock.png'
         }
 
-        self.blank_pixmap = QPixmap(200, 200)
-        self.blank_pixmap.fill(Qt.white)
-
-        self.gesture_recogniser = GestureRecogniser()
+        # MediaPipe LIVE_STREAM tracks hands across frames on its own thread, results
+        # come back through a signal so the video paints at camera rate
+        self.hands = None
+        self.results = AsyncResults()
+        self.results.result_ready.connect(self.on_analysis)
+        self.gesture_recogniser = GestureRecogniser(running_mode="live_stream",
+                                                    on_result=self.results.publish)
         self.setup_ui()
 
+        # Icons are decoded and scaled to the label size once, not every frame
+        self.icons = IconCache.load(self.icon_paths, self.left_emoji.size())
+        self.blank_pixmap = IconCache.blank(self.left_emoji.size())
+
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
         self.timer.start(30)
@@ -68,9 +76,8 @@ class HandGestureRecognitionPage(QWidget):
         left_layout.addWidget(self.qr_widget)
 
         # Center video feed
-        self.video_feed = QLabel()
+        self.video_feed = VideoWidget()
         self.video_feed.setObjectName("video_feed")
-        self.video_feed.setScaledContents(True)
         self.video_feed.setMinimumWidth(700)  # Ensuring the video feed is wide
         self.video_feed.setMinimumHeight(500)
 
@@ -109,36 +116,25 @@ class HandGestureRecognitionPage(QWidget):
 
     def update_frame(self):
         """Update the video feed and hand gesture icons"""
-        result = self.gesture_recogniser.process_frame()
-        if result:
-            self.video_feed.setPixmap(self._convert_cv_to_qt(result.main_frame))
-            self.left_emoji.setPixmap(self._get_icon(result.left_label))
-            self.right_emoji.setPixmap(self._get_icon(result.right_label))
+        frame = self.gesture_recogniser.read_frame()
+        if frame is None:
+            return
+        self.gesture_recogniser.analyse_async(frame.seq, frame.image)
+        result = self.gesture_recogniser.draw(frame.image, self.hands)
+        self.video_feed.set_frame(result.main_frame)
+        set_icon(self.left_emoji, result.left_label, self._get_icon(result.left_label))
+        set_icon(self.right_emoji, result.right_label, self._get_icon(result.right_label))
+
+    def on_analysis(self, _seq, hands):
+        """Store the newest hand gestures and landmarks from MediaPipe"""
+        self.hands = hands
 
     def _get_icon(self, label):
         """Retrieve the correct icon based on the label"""
-        if label in self.icon_paths:
-            return QPixmap(self.icon_paths[label])
-        return self.blank_pixmap  # Return blank image if label not found
-
-
-    def _convert_cv_to_qt(self, cv_img):
-        """convert cv2 img to qpixmap for display in qlabel"""
-        if cv_img is None:
-            return QPixmap()
-        if len(cv_img.shape) == 2:  # Grayscale
-            h, w = cv_img.shape
-            qt_image = QImage(cv_img.data, w, h, w, QImage.Format_Grayscale8)
-        else:  # Color
-            h, w, ch = cv_img.shape
-            rgb_image = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-            qt_image = QImage(rgb_image.data, w, h, ch * w, QImage.Format_RGB888)
-
-        pixmap = QPixmap.fromImage(qt_image)
-        return pixmap.scaled(400, 400,
-                              Qt.KeepAspectRatio,
-                              Qt.SmoothTransformation)  # Keep emoji aspect ratio
-
-    def use_close_event(self, event):
+        return self.icons.get(label, self.blank_pixmap)  # Blank image if label not found
+
+
+    def closeEvent(self, event):
         """handle close event to release resources"""
+        self.gesture_recogniser.release()  # stops results reaching this page
         close_event(event,self)
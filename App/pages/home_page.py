@@ -3,12 +3,7 @@ from PyQt5.QtWidgets import QMainWindow, QApplication, QMessageBox
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPixmap, QPainter, QColor
 from PyQt5 import uic
-from App.pages.hand_gesture_page import HandGestureRecognitionPage
-from App.pages.facial_expression_page import FacialExpressionRecognitionPage
-from App.pages.general_page import GeneralDemoPage
-from App.pages.thermal_page import ThermalCameraPage
-from App.pages.event_page import EventCameraPage
-from App.pages.lidar_page import LidarCameraPage
+from App.page_registry import PageRegistry
 from utils import load_stylesheet, DeviceStatusChecker
 
 class HomePage(QMainWindow):
@@ -25,6 +20,9 @@ class HomePage(QMainWindow):
         self.facial_expression_page=None
         self.colour_detection_page=None
         self.object_detection_page=None
+        self.lidar_page=None
+        self.thermal_page=None
+        self.event_page=None
 
         # Connect button signals to slots
         self.handGestureButton.clicked.connect(self.open_hand_gesture_page)
@@ -44,17 +42,20 @@ class HomePage(QMainWindow):
         self.thermalButton.setToolTip("Demonstrate the temperatures in a frame")
         self.eventButton.setToolTip("Detect only movement in a frame")
 
-        # Initialize status indicators
+        # Initialize status indicators, updated whenever a device's status changes
         self.set_status_to_searching()
+        self.status_circles = {"rgb": self.rgbCircle, "lidar": self.lidarCircle,
+                               "thermal": self.thermalCircle, "event": self.eventCircle}
         self.device_checker = DeviceStatusChecker()
-
-        # Timer to update connection status
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.update_connection_status)
-        self.status_timer.start(5000)  # Update UI every 5 seconds
+        self.device_checker.status_changed.connect(self.update_connection_status)
+        self.device_checker.start()
 
         load_stylesheet(self,'App/styles/home.qss')
 
+        # Pages are imported when first opened, likely ones preload once the home page shows
+        self.pages = PageRegistry()
+        QTimer.singleShot(500, self.pages.preload)  # let the home page paint first
+
     def draw_circle(self, color, size=20):
         """Draw a circle with the specified color and size."""
         pixmap = QPixmap(size, size)
@@ -66,19 +67,11 @@ class HomePage(QMainWindow):
         painter.end()
         return pixmap
 
-    def update_connection_status(self):
-        """Update UI with current connection status."""
-        # Get current status (these are fast lookups, not network operations)
-        rgb_connected = self.device_checker.get_status("rgb")
-        lidar_connected = self.device_checker.get_status("lidar")
-        thermal_connected = self.device_checker.get_status("thermal")
-        event_connected = self.device_checker.get_status("event")
-
-        # Update status indicators
-        self.rgbCircle.setPixmap(self.draw_circle("green" if rgb_connected else "red"))
-        self.lidarCircle.setPixmap(self.draw_circle("green" if lidar_connected else "red"))
-        self.thermalCircle.setPixmap(self.draw_circle("green" if thermal_connected else "red"))
-        self.eventCircle.setPixmap(self.draw_circle("green" if event_connected else "red"))
+    def update_connection_status(self, device_id, connected):
+        """Update a device's indicator, called by the checker when its status changes."""
+        circle = self.status_circles.get(device_id)
+        if circle is not None:
+            circle.setPixmap(self.draw_circle("green" if connected else "red"))
 
     def set_status_to_searching(self):
         """Set all status indicators to searching (yellow/orange) while loading."""
@@ -91,45 +84,54 @@ class HomePage(QMainWindow):
     def open_hand_gesture_page(self):
         """show and run hand gesture page/alg"""
         self.close_other_pages()
-        self.hand_gesture_page = HandGestureRecognitionPage()
+        self.hand_gesture_page = self._replace_page(self.hand_gesture_page, "hand_gesture")
         self.hand_gesture_page.showMaximized()
 
     def open_facial_expression_page(self):
         """show and run face/emotion expression page/alg"""
         self.close_other_pages()
-        self.facial_expression_page = FacialExpressionRecognitionPage()
+        self.facial_expression_page = self._replace_page(self.facial_expression_page,
+                                                         "facial_expression")
         self.facial_expression_page.showMaximized()
 
     def open_object_detection_page(self):
         """show and run object detection page/alg, pass in title and description"""
         self.close_other_pages()
-        self.object_detection_page = GeneralDemoPage("object")
+        self.object_detection_page = self._replace_page(self.object_detection_page,
+                                                        "object_detection")
         self.object_detection_page.showMaximized()
 
     def open_colour_detection_page(self):
         """show and run colour detection page/alg, pass in title and description"""
         self.close_other_pages()
-        self.colour_detection_page = GeneralDemoPage("colour")
+        self.colour_detection_page = self._replace_page(self.colour_detection_page,
+                                                        "colour_detection")
         self.colour_detection_page.showMaximized()
 
     def open_lidar_page(self):
         """show and run lidar page"""
         self.close_other_pages()
-        self.lidar_page=LidarCameraPage()
+        self.lidar_page=self._replace_page(self.lidar_page, "lidar")
         self.lidar_page.showMaximized()
 
     def open_thermal_page(self):
         """show and run thermal page"""
         self.close_other_pages()
-        self.thermal_page=ThermalCameraPage()
+        self.thermal_page=self._replace_page(self.thermal_page, "thermal")
         self.thermal_page.showMaximized()
 
     def open_event_page(self):
         """show and run event camera high speed counting page/alg"""
         self.close_other_pages()
-        self.event_page=EventCameraPage()
+        self.event_page=self._replace_page(self.event_page, "event")
         self.event_page.showMaximized()
 
+    def _replace_page(self, page, key):
+        """close the previous instance of a page so its camera and models are released"""
+        if page is not None:
+            page.close()
+        return self.pages.create(key)
+
     def close_other_pages(self):
         """"close all other pages before opening another
         if self.hand_gesture_page:
@@ -1,18 +1,18 @@
 """LiDAR Page"""
-import numpy as np
+import time
 import vispy.scene
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
 from PyQt5.QtCore import QTimer, Qt
-import cepton_sdk
-import matplotlib.pyplot as plt
-from cepton_sdk.common import *
+from Algorithms.Lidar.point_cloud import PointCloudBuffers, DEFAULT_MAX_POINTS
+from Algorithms.Lidar.voxel_grid import VoxelDownsampler
+from Sensors.lidar_acquisition import LidarAcquisition
+from Sensors.lidar_recording import LidarRecorder, LidarReplay, RecordingListener
 from utils import load_stylesheet, QRCodeWidget
 
-_all_builder = AllBuilder(__name__)
-
 class PlotCanvas(vispy.scene.SceneCanvas):
-    """Plot the Lidar points"""
-    def __init__(self, sensor, **kwargs):
+    """Plot the Lidar points, from a sensor or any listener with get_points() (e.g. a replay)"""
+    def __init__(self, sensor=None, accumulation_window=0.0, max_points=DEFAULT_MAX_POINTS,
+                 target_frame_time=0.03, listener=None, **kwargs):
         super().__init__(keys='interactive', **kwargs)
         self.unfreeze()  # Unfreeze the class to allow dynamic attributes
         self.view = self.central_widget.add_view()
@@ -22,18 +22,27 @@ class PlotCanvas(vispy.scene.SceneCanvas):
         self.view.camera.elevation = 8.5
         self.view.camera.fov = 0
         self.view.camera.scale_factor = 3.55
-        #test to see if this will normalize the point colouring
-        self.min_z = None
-        self.max_z = None
+        # Height colouring through a colormap lookup into reused buffers
+        self.point_buffers = PointCloudBuffers()
+        # One point per voxel within a point budget that follows the frame time
+        self.downsampler = VoxelDownsampler(max_points=max_points,
+                                            target_frame_time=target_frame_time)
+        self.prepare_time = 0.0  # seconds spent downsampling and colouring the last frame
 
         self.points_visual = vispy.scene.visuals.Markers()
         self.points_visual.antialias = 0
         self.view.add(self.points_visual)
 
         self.sensor = sensor
-        self.listener = cepton_sdk.SensorFramesListener(self.sensor.serial_number)
+        if listener is None:
+            import cepton_sdk  # only needed for a sensor, not for a replay
+            listener = cepton_sdk.SensorFramesListener(self.sensor.serial_number)
+        self.listener = listener
+        # Frames are drained on a background thread, the timer only renders
+        self.acquisition = LidarAcquisition(self.listener).start()
+        self.accumulation_window = accumulation_window  # seconds drawn together, 0 = newest
+        self.last_seq = -1
         self.lidar_data = None
-        self.colors = None
 
         # Set up the timer
         self.timer = QTimer()
@@ -41,76 +50,58 @@ class PlotCanvas(vispy.scene.SceneCanvas):
         self.timer.start(100)  # 100ms interval = 10 FPS
 
     def update_points(self, positions, colors=None, sizes=None):
-        positions = positions - np.mean(positions, axis=0)
-        num_points = positions.shape[0]
-
-        if colors is None:
-            # Calculate z-values
-            z_values = positions[:, 2]
-            
-            # Update min/max z with a moving average or set them initially
-            if self.min_z is None or self.max_z is None:
-                self.min_z = np.min(z_values)
-                self.max_z = np.max(z_values)
-            else:
-                # Gradual adjustment to avoid sudden color changes
-                # You can adjust the alpha value (0.05) to control adaptation speed
-                self.min_z = 0.95 * self.min_z + 0.05 * np.min(z_values)
-                self.max_z = 0.95 * self.max_z + 0.05 * np.max(z_values)
-                
-            # Ensure there's always at least a small range to avoid division by zero
-            if abs(self.max_z - self.min_z) < 0.1:
-                self.max_z = self.min_z + 0.1
-                
-            # Normalize with consistent range
-            norm_z = (z_values - self.min_z) / (self.max_z - self.min_z)
-            # Clip to handle outliers
-            norm_z = np.clip(norm_z, 0, 1)
-            self.colors = plt.cm.viridis(norm_z)
-            
-        colors = self.colors
-
-        if colors.shape[0] != num_points:
-            colors = np.resize(colors, (num_points, 4))
-
-        if sizes is None:
-            sizes = np.full([num_points], 2)
-
+        """Show a frame of points, coloured by height unless colors are given"""
+        positions, height_colors, point_sizes = self.point_buffers.update(positions)
         options = {
             "edge_width": 0,
-            "face_color": colors,
+            "face_color": height_colors if colors is None else colors,
             "pos": positions,
-            "size": sizes,
+            "size": point_sizes if sizes is None else sizes,
         }
         self.points_visual.set_data(**options)
         self.update()  # Request canvas update
 
     def fetch_lidar_data(self):
-        try:
-            points_list = self.listener.get_points()
-            if points_list:
-                points = points_list[0]
-                self.lidar_data = points.positions
-                return self.lidar_data
-            return None
-        except Exception as e:
-            print(f"Error fetching LiDAR data: {e}")
-            return None
+        """Frames to show next, the newest one or all within the accumulation window"""
+        if self.accumulation_window > 0:
+            return self.acquisition.window(self.accumulation_window, self.last_seq)
+        latest = self.acquisition.latest(self.last_seq)
+        return [latest] if latest is not None else []
 
     def on_timer(self):
         try:
-            positions = self.fetch_lidar_data()
-            if positions is not None:
-                self.update_points(positions)
+            frames = self.fetch_lidar_data()
+            if frames:
+                start = time.perf_counter()
+                self.lidar_data = self.acquisition.accumulate(frames)
+                self.update_points(self.downsampler.downsample(self.lidar_data))
+                self.prepare_time = time.perf_counter() - start
+                self.last_seq = frames[-1].seq
+                self.acquisition.mark_displayed(frames)
         except Exception as e:
             print(f"Error in timer callback: {e}")
 
+    def on_draw(self, event):
+        """Draw, then report the frame time so the point budget can adapt"""
+        start = time.perf_counter()
+        super().on_draw(event)
+        self.downsampler.report_frame_time(self.prepare_time + time.perf_counter() - start)
+        self.prepare_time = 0.0  # redraws without a new frame only cost the draw
+
+    def stop(self):
+        """Stop rendering and acquisition, False if the acquisition thread is still running"""
+        self.timer.stop()
+        return self.acquisition.stop()
+
 
 class LidarCameraPage(QWidget):
     _is_initialized = False  # Class-level flag to track SDK initialization
 
-    def __init__(self):
+    def __init__(self, replay=None, record_to=None):
         super().__init__()
+        self.replay = replay  # recording directory to play instead of the sensor
+        self.record_to = record_to  # recording directory the sensor's frames are written to
+        self.recorder = None
         self.setWindowTitle("LiDAR Camera Stream")
 
         # Load stylesheet
@@ -163,10 +154,34 @@ class LidarCameraPage(QWidget):
         self.info_layout.addWidget(self.qr_widget)
 
     def initialize_lidar(self):
-        """Initialize the LiDAR sensor and setup the visualization"""
+        """Initialize the LiDAR sensor (or a replay) and setup the visualization"""
         # Left side: LiDAR feed
         self.video_layout = QVBoxLayout()
 
+        if self.replay is not None:
+            # A recording looped at its original timing, no SDK or sensor needed
+            self.sensor = None
+            listener = LidarReplay(self.replay, loop=True)
+        else:
+            listener = self.open_sensor()
+
+        # Initialize canvas to display LiDAR stream and embed in PyQt
+        # Frames from the last 300 ms are drawn together for a denser cloud
+        self.canvas = PlotCanvas(sensor=self.sensor, accumulation_window=0.3, listener=listener)
+
+        # Create and configure a QWidget to embed the canvas
+        from vispy.app import use_app
+        app = use_app('pyqt5')
+        self.canvas_widget = self.canvas.native
+        self.video_layout.addWidget(self.canvas_widget)
+
+        # Add sections to main layout
+        self.main_layout.addLayout(self.video_layout, 2)
+        self.main_layout.addLayout(self.info_layout, 1)
+
+    def open_sensor(self):
+        """Initialize the SDK and the first sensor, returns its frames listener"""
+        import cepton_sdk  # only needed without a replay
         # Initialize Cepton SDK if not already initialized
         if not LidarCameraPage._is_initialized:
             print("Initializing Cepton SDK...")
@@ -185,18 +200,12 @@ class LidarCameraPage(QWidget):
         except Exception as e:
             raise Exception(f"No LiDAR sensor detected: {e}")
 
-        # Initialize canvas to display LiDAR stream and embed in PyQt
-        self.canvas = PlotCanvas(sensor=self.sensor)
-
-        # Create and configure a QWidget to embed the canvas
-        from vispy.app import use_app
-        app = use_app('pyqt5')
-        self.canvas_widget = self.canvas.native
-        self.video_layout.addWidget(self.canvas_widget)
-
-        # Add sections to main layout
-        self.main_layout.addLayout(self.video_layout, 2)
-        self.main_layout.addLayout(self.info_layout, 1)
+        listener = cepton_sdk.SensorFramesListener(self.sensor.serial_number)
+        if self.record_to is not None:
+            # Frames are written on the acquisition thread as they are drained
+            self.recorder = LidarRecorder(self.record_to, self.sensor.serial_number)
+            listener = RecordingListener(listener, self.recorder)
+        return listener
 
     def handle_lidar_error(self, error_message):
         """Handle cases where LiDAR initialization fails"""
@@ -238,6 +247,26 @@ class LidarCameraPage(QWidget):
 
     def closeEvent(self, event):
         """Handle close event"""
-        if hasattr(self, 'canvas') and hasattr(self.canvas, 'timer'):
-            self.canvas.timer.stop()
-        event.accept()
\ No newline at end of file
+        stopped = self.canvas.stop() if hasattr(self, 'canvas') else True
+        if self.recorder is not None:
+            if stopped:
+                self.recorder.close()
+            else:
+                # Closing under a frame being written would lose it, an unclosed recording
+                # still reads back every complete frame
+                print("LiDAR acquisition still running, recording left open")
+            self.recorder = None
+        event.accept()
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from PyQt5.QtWidgets import QApplication
+    parser = argparse.ArgumentParser(description="LiDAR page on its own")
+    parser.add_argument("--replay", help="recording directory to play instead of the sensor")
+    parser.add_argument("--record", help="directory to record the sensor's frames to")
+    args = parser.parse_args()
+    qt_app = QApplication(sys.argv)
+    page = LidarCameraPage(replay=args.replay, record_to=args.record)
+    page.showMaximized()
+    sys.exit(qt_app.exec_())
\ No newline at end of file
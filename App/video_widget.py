@@ -0,0 +1,80 @@
+"""Video display widget shared by the camera pages"""
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QStyle, QStyleOption
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtCore import QRect, Qt
+from PyQt5 import sip
+
+class VideoWidget(QWidget):
+    """
+    Show BGR (or grey) numpy frames. A frame is wrapped as a QImage in place,
+    without a BGR to RGB copy or a QPixmap, and scaled to the widget while
+    painting. Frames whose pixels are not packed (e.g. frame[:, ::2]) are
+    copied into a buffer that is reused while the frame geometry is unchanged.
+    """
+    def __init__(self, parent=None, keep_aspect=True, smooth=False):
+        super().__init__(parent)
+        self.keep_aspect = keep_aspect  # letterbox instead of stretching to the widget
+        self.smooth = smooth  # bilinear scaling, costs more per paint
+        self.frames = 0  # frames shown
+        self.copies = 0  # frames that had to be copied into the buffer
+        self.buffer_allocations = 0  # times the copy buffer was (re)allocated
+        self._frame = None  # keeps the memory behind _image alive
+        self._buffer = None
+        self._image = QImage()
+
+    def set_frame(self, frame):
+        """Show a uint8 HxWx3 BGR or HxW grey frame, the frame must not be written to after"""
+        if frame is None:
+            return
+        channels = 1 if frame.ndim == 2 else frame.shape[2]
+        if frame.dtype != np.uint8 or channels not in (1, 3):
+            raise ValueError(f"Expected a uint8 BGR or grey frame, got {frame.dtype} {frame.shape}")
+        # Rows may be strided (bytesPerLine), pixels within a row must be packed
+        if frame.strides[-1] != 1 or (channels == 3 and frame.strides[1] != 3):
+            frame = self._copy_to_buffer(frame)
+
+        height, width = frame.shape[:2]
+        image_format = QImage.Format_Grayscale8 if channels == 1 else QImage.Format_BGR888
+        self._frame = frame
+        # Pointer to the first pixel, a cropped frame's rows are not contiguous in memory
+        self._image = QImage(sip.voidptr(frame.ctypes.data), width, height, frame.strides[0],
+                             image_format)
+        self.frames += 1
+        self.update()
+
+    def _copy_to_buffer(self, frame):
+        """copy a frame into the reusable buffer, reallocated only when its geometry changes"""
+        if self._buffer is None or self._buffer.shape != frame.shape:
+            self._buffer = np.empty(frame.shape, dtype=np.uint8)
+            self.buffer_allocations += 1
+        np.copyto(self._buffer, frame)
+        self.copies += 1
+        return self._buffer
+
+    def clear(self):
+        """Show only the background"""
+        self._frame = None
+        self._image = QImage()
+        self.update()
+
+    def target_rect(self):
+        """where the frame is painted inside the widget"""
+        area = self.contentsRect()
+        if not self.keep_aspect or self._image.isNull():
+            return area
+        size = self._image.size().scaled(area.size(), Qt.KeepAspectRatio)
+        return QRect(area.x() + (area.width() - size.width()) // 2,
+                     area.y() + (area.height() - size.height()) // 2,
+                     size.width(), size.height())
+
+    def paintEvent(self, _event):
+        """Draw the stylesheet background, then the frame scaled to fit"""
+        painter = QPainter(self)
+        option = QStyleOption()
+        option.initFrom(self)
+        self.style().drawPrimitive(QStyle.PE_Widget, option, painter, self)
+        if not self._image.isNull():
+            painter.setRenderHint(QPainter.SmoothPixmapTransform, self.smooth)
+            painter.drawImage(self.target_rect(), self._image)
+        painter.end()
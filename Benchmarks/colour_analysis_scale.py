@@ -0,0 +1,36 @@
+"""
+Colour detection frame rate against analysis scale.
+
+Run from the repository root:
+    python -m Benchmarks.colour_analysis_scale [width height]
+Frames default to 1280x720, the detection at scale 1.0 is the reference for the
+count agreement column.
+"""
+import sys
+import time
+from Algorithms.Objects.colour_detection import ColourRecogniser
+from Benchmarks.colour_lut import COLOUR_CSV, synthetic_images
+
+SCALES = (1.0, 0.75, 0.5, 0.33, 0.25)
+
+def main():
+    """print fps and count agreement per analysis scale"""
+    size = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (1280, 720)
+    recogniser = ColourRecogniser(COLOUR_CSV)
+    images = synthetic_images(recogniser, count=20, size=size)
+    reference = [recogniser.detect(image).counts for image in images]
+
+    print(f"frame size {size[0]}x{size[1]}, {len(images)} frames")
+    print(f"{'scale':>6} {'ms/frame':>9} {'fps':>7} {'count agreement':>16}")
+    for scale in SCALES:
+        recogniser.analysis_scale = scale
+        recogniser.detect(images[0])
+        start = time.perf_counter()
+        results = [recogniser.detect(image) for image in images]
+        elapsed = (time.perf_counter() - start) / len(images)
+        agree = sum(result.counts == counts for result, counts in zip(results, reference))
+        print(f"{scale:>6.2f} {elapsed * 1000:>9.2f} {1 / elapsed:>7.1f} "
+              f"{agree / len(images):>16.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare the LUT colour classifier against the original per-colour inRange/findContours
+detector on a reference image set, and time both.
+
+Run from the repository root:
+    python -m Benchmarks.colour_lut [image_dir]
+Without an image directory a synthetic reference set is generated.
+"""
+import sys
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+from Algorithms.Objects.colour_detection import ColourRecogniser
+
+COLOUR_CSV = "Datasets/colour_ranges.csv"
+
+def legacy_detect(recogniser, image, min_area=300):
+    """original detector: a full frame inRange and findContours per colour"""
+    hsv_img = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    boxes = {}
+    for colour, ranges in recogniser.colour_ranges.items():
+        mask = np.zeros(hsv_img.shape[:2], dtype=np.uint8)
+        for lower, upper in ranges:
+            mask |= cv2.inRange(hsv_img, np.array(lower, dtype="uint8"),
+                                np.array(upper, dtype="uint8"))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        boxes[colour] = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) > min_area]
+    return boxes
+
+def synthetic_images(recogniser, count=20, size=(900, 900), seed=0):
+    """random rectangles and ellipses with hues taken from the middle of each colour range"""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        hsv = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        hsv[..., 2] = rng.integers(0, 40, size=(size[1], size[0]))  # dark noisy background
+        for _ in range(rng.integers(3, 10)):
+            ranges = recogniser.colour_ranges[rng.choice(recogniser.colour_names)]
+            lower, upper = ranges[rng.integers(len(ranges))]
+            colour = tuple(int((lo + hi) // 2) for lo, hi in zip(lower, upper))
+            x, y = rng.integers(0, size[0] - 120), rng.integers(0, size[1] - 120)
+            w, h = rng.integers(25, 120), rng.integers(25, 120)
+            if rng.random() < 0.5:
+                cv2.rectangle(hsv, (int(x), int(y)), (int(x + w), int(y + h)), colour, -1)
+            else:
+                cv2.ellipse(hsv, (int(x + w // 2), int(y + h // 2)), (int(w // 2), int(h // 2)),
+                            0, 0, 360, colour, -1)
+        images.append(cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR))
+    return images
+
+def box_iou(a, b):
+    """intersection over union of two (x, y, w, h) boxes"""
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    return inter / float(a[2] * a[3] + b[2] * b[3] - inter)
+
+def compare(recogniser, images):
+    """count agreement and mean best-match IoU between the two detectors"""
+    matching_counts, total_counts, ious = 0, 0, []
+    for image in images:
+        legacy = legacy_detect(recogniser, image)
+        result = recogniser.detect(image)
+        for colour in recogniser.colour_names:
+            new_boxes = [box for name, box in result.boxes if name == colour]
+            total_counts += 1
+            matching_counts += len(new_boxes) == len(legacy[colour])
+            for box in legacy[colour]:
+                ious.append(max((box_iou(box, other) for other in new_boxes), default=0.0))
+    return matching_counts / total_counts, float(np.mean(ious)) if ious else 1.0
+
+def time_per_frame(func, images, repeats=3):
+    """mean milliseconds per image"""
+    func(images[0])
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for image in images:
+            func(image)
+    return (time.perf_counter() - start) * 1000 / (repeats * len(images))
+
+def main():
+    """run the comparison and timing"""
+    recogniser = ColourRecogniser(COLOUR_CSV)
+    if len(sys.argv) > 1:
+        paths = sorted(Path(sys.argv[1]).glob("*.[pj][np]g"))
+        images = [cv2.imread(str(path)) for path in paths]
+    else:
+        images = synthetic_images(recogniser)
+
+    count_agreement, mean_iou = compare(recogniser, images)
+    legacy_ms = time_per_frame(lambda image: legacy_detect(recogniser, image), images)
+    lut_ms = time_per_frame(recogniser.detect, images)
+
+    print(f"images: {len(images)}, colours: {len(recogniser.colour_names)}")
+    print(f"count agreement per colour: {count_agreement:.1%}, mean box IoU: {mean_iou:.3f}")
+    print(f"legacy inRange/findContours: {legacy_ms:.2f} ms/frame")
+    print(f"LUT + connected components:  {lut_ms:.2f} ms/frame ({legacy_ms / lut_ms:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Device status sweep time and how fast a change reaches the UI.
+
+Run from the repository root:
+    python -m Benchmarks.device_status [--devices 4] [--timeout 0.5]
+Devices are local sockets: half listen (online), half are listeners whose
+backlog is full so connection attempts hang until the timeout (an unreachable
+sensor). "sequential" is the old sweep, one connect_ex after another, the
+concurrent sweep is DeviceStatusChecker.sweep() and should take about one
+timeout however many devices there are. Then one listener is closed while the
+checker runs, and the time until status_changed arrives on the Qt thread is
+printed.
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from PyQt5.QtCore import QCoreApplication, QTimer
+from utils import DeviceStatusChecker
+
+def accept_forever(server):
+    """accept and drop connections until the server socket is closed"""
+    try:
+        while True:
+            connection, _ = server.accept()
+            connection.close()
+    except OSError:
+        pass
+
+def listener(unresponsive=False):
+    """local listening socket, unresponsive ones have a full backlog"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(0)
+    sockets = [server]
+    if unresponsive:
+        # One connection fills a backlog of 0 and is never accepted, later SYNs are dropped
+        filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        filler.connect(server.getsockname())
+        sockets.append(filler)
+    else:
+        threading.Thread(target=accept_forever, args=(server,), daemon=True).start()
+    return sockets
+
+def sequential_sweep(devices, timeout):
+    """the old DeviceStatusChecker loop"""
+    statuses = {}
+    for device_id, config in devices.items():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            statuses[device_id] = sock.connect_ex((config["address"], config["port"])) == 0
+        except OSError:
+            statuses[device_id] = False
+        sock.close()
+    return statuses
+
+def timed(call):
+    """result and seconds of call"""
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+def main():
+    """print sweep times and the change notification delay"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    sockets, devices = {}, {}
+    for index in range(args.devices):
+        device_id = f"{'offline' if index % 2 else 'online'}_{index}"
+        sockets[device_id] = listener(unresponsive=index % 2 == 1)
+        devices[device_id] = {"type": "ip", "address": "127.0.0.1",
+                              "port": sockets[device_id][0].getsockname()[1], "interval": 0.2}
+
+    statuses, sequential = timed(lambda: sequential_sweep(devices, args.timeout))
+    print(f"sequential sweep {sequential:.3f} s {statuses}")
+    checker = DeviceStatusChecker(devices, timeout=args.timeout, max_backoff=1)
+    statuses, concurrent = timed(lambda: asyncio.run(checker.sweep()))
+    print(f"concurrent sweep {concurrent:.3f} s {statuses}")
+
+    # Status pushed to the Qt thread when an online device goes away
+    app = QCoreApplication(sys.argv)
+    checker = DeviceStatusChecker(devices, timeout=args.timeout, max_backoff=1)
+    closed_at = {}
+
+    def on_change(device_id, online):
+        if device_id in closed_at and not online:
+            delay = time.monotonic() - closed_at[device_id]
+            print(f"{device_id} offline signal after {delay:.3f} s "
+                  f"(probe interval {devices[device_id]['interval']} s)")
+            app.quit()
+
+    def close_device():
+        device_id = "online_0"
+        for sock in sockets[device_id]:
+            sock.shutdown(socket.SHUT_RDWR)  # wakes the accepting thread
+            sock.close()
+        closed_at[device_id] = time.monotonic()
+
+    checker.status_changed.connect(on_change)
+    checker.start()
+    QTimer.singleShot(1000, close_device)
+    QTimer.singleShot(5000, app.quit)
+    app.exec_()
+    checker.stop()
+    for device_sockets in sockets.values():
+        for sock in device_sockets:
+            sock.close()
+
+if __name__ == "__main__":
+    main()
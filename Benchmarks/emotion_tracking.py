@@ -0,0 +1,58 @@
+"""
+Emotion recognition frame rate with face tracking between detections.
+
+Run from the repository root:
+    python -m Benchmarks.emotion_tracking [--video FILE] [--frames 200] [--tracker KCF]
+Frames are read once (from the file, or the webcam without --video), resized to
+960x540 like the facial expression page, then analysed at each cadence. Detecting
+on every frame is the reference for the emotion agreement column.
+"""
+import argparse
+import time
+import cv2
+from Algorithms.Body.emotion_recognition import EmotionRecogniser
+
+CADENCES = (1, 3, 5, 10)
+
+def read_frames(video, count):
+    """up to count frames from a video file or camera index, resized to 960x540"""
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (960, 540)))
+    cap.release()
+    return frames
+
+def main():
+    """print fps and emotion agreement per detection cadence"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--video", default=None, help="video file, defaults to webcam 0")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--tracker", default="KCF")
+    args = parser.parse_args()
+
+    frames = read_frames(0 if args.video is None else args.video, args.frames)
+    if not frames:
+        print("No frames could be read")
+        return
+
+    print(f"{len(frames)} frames at 960x540, tracker {args.tracker}")
+    print(f"{'detect every':>12} {'ms/frame':>9} {'fps':>7} {'agreement':>10}")
+    reference = None
+    for cadence in CADENCES:
+        recogniser = EmotionRecogniser(detect_every=cadence, tracker=args.tracker,
+                                       camera_index=None)
+        start = time.perf_counter()
+        emotions = [recogniser.analyse(frame).emotion_text for frame in frames]
+        elapsed = (time.perf_counter() - start) / len(frames)
+        recogniser.release()
+        if reference is None:
+            reference = emotions
+        agree = sum(a == b for a, b in zip(emotions, reference)) / len(frames)
+        print(f"{cadence:>12} {elapsed * 1000:>9.1f} {1 / elapsed:>7.1f} {agree:>10.0%}")
+
+if __name__ == "__main__":
+    main()
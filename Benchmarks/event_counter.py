@@ -0,0 +1,125 @@
+"""
+Event counter accuracy against known crossings, and its throughput.
+
+Run from the repository root:
+    python -m Benchmarks.event_counter [--objects 100] [--rate 5e6] [--seconds 2]
+Synthetic 1280x720 events: discs moving along horizontal lanes at 3000 to
+15000 pixels per second, most of them across the vertical line in the middle
+(in both directions) and some only on one side of it, plus uniform noise. The
+exact time each disc's centre crosses the line is known. The events are fed
+to EventCounter in 33 ms batches, as the event page does, and the counts, the
+crossing time errors and the events per second one core keeps up with are
+printed.
+"""
+import argparse
+import time
+import numpy as np
+from Algorithms.Event.event_counter import CountingLine, EventCounter
+from Sensors.event_stream import EVENT_DTYPE
+
+SIZE = (1280, 720)
+LANES = 10
+RADIUS = 15
+
+def synthetic_scene(objects, rate, seconds, noise=0.1, seed=0):
+    """(time ordered events, [(crossing time, direction)] of the middle line)"""
+    rng = np.random.default_rng(seed)
+    width, height = SIZE
+    line_x = width / 2
+    rounds = -(-objects // LANES)
+    period = seconds * 1e6 / rounds  # each lane has a disc after another
+    plans = []
+    for index in range(objects):
+        distance = rng.uniform(300, 560)
+        speed = rng.uniform(3000, 15000) / 1e6  # pixels per microsecond
+        lifetime = min(distance / speed, 0.9 * period)
+        start = (index // LANES) * period + rng.uniform(0, period - lifetime)
+        plans.append((index % LANES, start, lifetime, speed * lifetime, rng.choice((-1, 1))))
+    # The discs share the non-noise events in proportion to their time in view
+    object_rate = rate * (1 - noise) * seconds / sum(plan[2] for plan in plans)
+    parts, truth = [], []
+    for lane, start, lifetime, distance, direction in plans:
+        if rng.random() < 0.8:
+            # Crosses the line a random fraction of the way along
+            fraction = rng.uniform(0.2, 0.8)
+            x0 = line_x - direction * distance * fraction
+            truth.append((start + fraction * lifetime, direction))
+        else:
+            # Stays on one side, moving away from the line
+            x0 = line_x + direction * (2 * RADIUS + 10)
+        per_object = int(object_rate * lifetime)
+        t = np.sort(rng.uniform(start, start + lifetime, per_object))
+        centre = x0 + direction * distance * (t - start) / lifetime
+        angle = rng.uniform(0, 2 * np.pi, per_object)
+        events = np.empty(per_object, dtype=EVENT_DTYPE)
+        events["t"] = np.round(t)
+        # Rounded to the nearest pixel centre, truncating would shift every centroid
+        events["x"] = np.clip(np.round(centre + RADIUS * np.cos(angle)), 0, width - 1)
+        events["y"] = np.clip(np.round((lane + 0.5) * height / LANES + RADIUS * np.sin(angle)
+                                       + rng.normal(0, 0.7, per_object)), 0, height - 1)
+        events["p"] = rng.integers(0, 2, per_object)
+        parts.append(events)
+    count = int(rate * noise * seconds)
+    background = np.empty(count, dtype=EVENT_DTYPE)
+    background["t"] = rng.integers(0, int(seconds * 1e6), count)
+    background["x"] = rng.integers(0, width, count)
+    background["y"] = rng.integers(0, height, count)
+    background["p"] = rng.integers(0, 2, count)
+    parts.append(background)
+    events = np.concatenate(parts)
+    events = events[np.argsort(events["t"], kind="stable")]
+    return events, sorted(truth)
+
+def compare(crossings, truth, tolerance=5000):
+    """(matched, missed, extra, crossing time errors) matching by direction and time"""
+    unmatched = list(crossings)
+    errors = []
+    for true_time, direction in truth:
+        candidates = [c for c in unmatched if c.direction == direction
+                      and abs(c.time - true_time) <= tolerance]
+        if candidates:
+            best = min(candidates, key=lambda c: abs(c.time - true_time))
+            unmatched.remove(best)
+            errors.append(best.time - true_time)
+    return len(errors), len(truth) - len(errors), len(unmatched), np.abs(errors)
+
+def main():
+    """print counts, crossing time errors and throughput"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=5e6, help="events per second")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--batch", type=int, default=33_000, help="microseconds per batch")
+    args = parser.parse_args()
+
+    events, truth = synthetic_scene(args.objects, args.rate, args.seconds)
+    width, height = SIZE
+    counter = EventCounter(width, height,
+                           lines=[CountingLine((width // 2, 0), (width // 2, height), "middle")])
+    cuts = np.searchsorted(events["t"], np.arange(args.batch, events["t"][-1] + 1, args.batch))
+    batches = np.split(events, cuts)
+    times = []
+    for batch in batches:
+        start = time.perf_counter()
+        counter.process(batch)
+        times.append(time.perf_counter() - start)
+    counter.flush()
+    elapsed = sum(times)
+
+    forward, backward = counter.counts["middle"]
+    true_forward = sum(1 for _, direction in truth if direction > 0)
+    matched, missed, extra, errors = compare(counter.crossings, truth)
+    print(f"events {len(events)}, objects {args.objects}, crossings {len(truth)}")
+    print(f"forward {forward} (true {true_forward}), backward {backward} "
+          f"(true {len(truth) - true_forward})")
+    print(f"matched {matched}, missed {missed}, extra {extra}")
+    if len(errors):
+        print(f"crossing time error median {np.median(errors):.0f} us, "
+              f"max {errors.max():.0f} us")
+    print(f"{elapsed * 1000:.0f} ms for {args.seconds} s of events: "
+          f"{len(events) / elapsed / 1e6:.1f} M events/s, "
+          f"{np.median(times) * 1000:.2f} ms per {args.batch / 1000:.0f} ms batch "
+          f"(max {max(times) * 1000:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Event stream throughput over local TCP and UDP, and the cost of a display frame.
+
+Run from the repository root:
+    python -m Benchmarks.event_stream [--rates 1e6 5e6] [--seconds 3] [--flood]
+An EventEmitter on localhost sends synthetic 640x480 events at each rate to an
+EventReceiver in real time, 10 ms of events per send like the rig (with
+--flood as fast as the socket takes them). The received event rate and lost
+UDP batches are printed. Then an EventFrameAccumulator frame is timed over a
+33 ms window at each rate, in count and in time surface mode.
+"""
+import argparse
+import time
+import numpy as np
+from Algorithms.Event.event_frames import EventFrameAccumulator
+from Sensors.event_stream import EventEmitter, EventReceiver, synthetic_events
+
+SIZE = (640, 480)
+
+def stream(protocol, rate, seconds, flood=False):
+    """(events sent, events received, seconds, batches lost) of one run"""
+    port = 0 if protocol == "tcp" else 33337
+    emitter = EventEmitter(*SIZE, host="127.0.0.1", port=port, protocol=protocol)
+    receiver = EventReceiver("127.0.0.1", emitter.port, protocol, reconnect_delay=0.1).start()
+    rng = np.random.default_rng(0)
+    # One second of events generated up front so only the sending is timed
+    events = synthetic_events(int(rate), *SIZE, 0, 1_000_000, rng)
+    if protocol == "udp":
+        time.sleep(0.2)  # let the receiver bind
+    else:
+        while not emitter.send(events[:1]):
+            pass
+    chunks = np.array_split(events, 100)
+    start = time.perf_counter()
+    for index in range(seconds * len(chunks)):
+        emitter.send(chunks[index % len(chunks)])
+        if not flood:
+            time.sleep(max(0.0, start + (index + 1) * 0.01 - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    time.sleep(0.5)  # let the receiver drain its socket
+    receiver.stop()
+    emitter.close()
+    received = receiver.events_received - (protocol == "tcp")
+    return emitter.events_sent - (protocol == "tcp"), received, elapsed, receiver.batches_lost
+
+def frame_ms(rate, mode, repeats=30):
+    """median ms of one display frame of 33 ms of events at rate"""
+    rng = np.random.default_rng(1)
+    events = synthetic_events(int(rate * 0.033), *SIZE, 0, 33_000, rng)
+    accumulator = EventFrameAccumulator(*SIZE, mode=mode)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if mode == "count":
+            accumulator.count_frame(events)
+        else:
+            accumulator.add(events)
+            accumulator.surface_frame()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+def main():
+    """print stream throughput and frame times per rate"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rates", type=float, nargs="+", default=(1e6, 5e6))
+    parser.add_argument("--seconds", type=int, default=3, help="seconds of events sent per run")
+    parser.add_argument("--flood", action="store_true", help="send without pacing")
+    args = parser.parse_args()
+
+    print(f"{'protocol':>8} {'rate':>6} {'sent':>9} {'received':>9} {'M ev/s':>7} "
+          f"{'lost':>5}")
+    for protocol in ("tcp", "udp"):
+        for rate in args.rates:
+            sent, received, elapsed, lost = stream(protocol, rate, args.seconds,
+                                                   args.flood)
+            print(f"{protocol:>8} {rate / 1e6:>5.1f}M {sent:>9} {received:>9} "
+                  f"{received / elapsed / 1e6:>7.2f} {lost:>5}")
+
+    print(f"{'rate':>6} {'count ms':>9} {'surface ms':>11}")
+    for rate in args.rates:
+        print(f"{rate / 1e6:>5.1f}M {frame_ms(rate, 'count'):>9.2f} "
+              f"{frame_ms(rate, 'surface'):>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Latency and recall of the face detector backends used for emotion recognition.
+
+Run from the repository root:
+    python -m Benchmarks.face_detectors [--video FILE] [--frames 200] [--reference mtcnn]
+Frames are read once (from a recorded clip, or the webcam without --video) at
+960x540 like the facial expression page. Recall is the fraction of reference
+backend faces that a backend also finds (IoU >= 0.3, box conventions differ).
+"""
+import argparse
+import time
+import numpy as np
+from fer import FER
+from Algorithms.Body.face_detectors import FACE_DETECTORS, create_face_detector
+from Benchmarks.emotion_tracking import read_frames
+
+def box_iou(a, b):
+    """IoU of two (x, y, w, h) boxes"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    return inter / (a[2] * a[3] + b[2] * b[3] - inter + 1e-9)
+
+def matched(reference, faces, threshold=0.3):
+    """how many reference faces have a detected face over the IoU threshold"""
+    return sum(any(box_iou(ref, face) >= threshold for face in faces) for ref in reference)
+
+def main():
+    """print latency and recall per face detector backend"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--video", default=None, help="recorded clip, defaults to webcam 0")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--reference", default="mtcnn", choices=FACE_DETECTORS)
+    args = parser.parse_args()
+
+    frames = read_frames(0 if args.video is None else args.video, args.frames)
+    if not frames:
+        print("No frames could be read")
+        return
+
+    detections = {}
+    print(f"{len(frames)} frames at 960x540, recall against {args.reference}")
+    print(f"{'backend':<8} {'mean ms':>8} {'p95 ms':>8} {'faces':>6} {'recall':>7}")
+    unavailable = []
+    for name in FACE_DETECTORS:
+        try:
+            detector = create_face_detector(name, FER(mtcnn=True) if name == "mtcnn" else None)
+        except Exception as e:
+            unavailable.append(f"{name:<8} unavailable: {e}")
+            continue
+        detector.detect(frames[0])
+        times, faces = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            faces.append(detector.detect(frame))
+            times.append((time.perf_counter() - start) * 1000)
+        detections[name] = (times, faces)
+
+    reference = detections.get(args.reference, (None, None))[1]
+    for name, (times, faces) in detections.items():
+        recall = "n/a"
+        if reference is not None:
+            total = sum(len(ref) for ref in reference)
+            hits = sum(matched(ref, found) for ref, found in zip(reference, faces))
+            recall = f"{hits / total:.1%}" if total else "n/a"
+        print(f"{name:<8} {np.mean(times):>8.1f} {np.percentile(times, 95):>8.1f} "
+              f"{sum(map(len, faces)):>6} {recall:>7}")
+    for line in unavailable:
+        print(line)
+
+if __name__ == "__main__":
+    main()
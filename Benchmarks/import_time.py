@@ -0,0 +1,72 @@
+"""
+Import time report for the application start up and each page with its algorithm.
+
+Run from the repository root:
+    python -m Benchmarks.import_time [--top 10] [--budget-ms 1500]
+Each module is imported in a fresh interpreter with -X importtime. The report
+shows the cumulative import time and the heaviest top level packages it pulled
+in. With --budget-ms the script exits non-zero if the home page import is over
+budget, so start up regressions can be caught.
+"""
+import argparse
+import subprocess
+import sys
+from App.page_registry import PAGES
+
+HOME_MODULE = "App.pages.home_page"
+
+def import_profile(*modules):
+    """{imported module: cumulative microseconds} for importing modules in a fresh interpreter"""
+    statement = "; ".join(f"import {module}" for module in modules)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                               capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else ""
+        raise ImportError(error)
+    profile = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        profile.setdefault(name, int(cumulative))
+    return profile
+
+def top_level(profile, module, top):
+    """heaviest top level packages a module pulled in, excluding its own package"""
+    packages = {}
+    for name, cumulative in profile.items():
+        root = name.split(".")[0]
+        if root not in (module.split(".")[0], "site", "encodings"):
+            packages[root] = max(packages.get(root, 0), cumulative)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def main():
+    """print the report"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    reports = [("home", (HOME_MODULE,))]
+    reports += [(key, (entry.module,) + entry.algorithms) for key, entry in PAGES.items()]
+    home_ms = None
+    for key, modules in reports:
+        try:
+            profile = import_profile(*modules)
+        except ImportError as e:
+            print(f"{key}: import failed ({e})\n")
+            continue
+        total_ms = sum(profile.get(module, 0) for module in modules) / 1000
+        if key == "home":
+            home_ms = total_ms
+        print(f"{key} ({', '.join(modules)}): {total_ms:.0f} ms")
+        for name, cumulative in top_level(profile, modules[0], args.top):
+            print(f"    {name:<24} {cumulative / 1000:>8.1f} ms")
+        print()
+
+    if args.budget_ms is not None and (home_ms is None or home_ms > args.budget_ms):
+        print(f"Home page import over budget: {home_ms} ms > {args.budget_ms} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
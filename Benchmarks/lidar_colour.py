@@ -0,0 +1,59 @@
+"""
+Cost of preparing a LiDAR frame for display against point count.
+
+Run from the repository root:
+    python -m Benchmarks.lidar_colour [--repeats 20]
+"legacy" is the old PlotCanvas.update_points (matplotlib viridis on float64,
+np.full sizes, a fresh centred copy), only timed when matplotlib is installed.
+"buffers" is PointCloudBuffers. Points are random within a 100 m box.
+"""
+import argparse
+import time
+import numpy as np
+from Algorithms.Lidar.point_cloud import PointCloudBuffers
+
+POINT_COUNTS = (10_000, 50_000, 100_000, 250_000, 500_000)
+
+def legacy_update(positions, viridis):
+    """the removed per-frame colouring, with fixed min/max z"""
+    positions = positions - np.mean(positions, axis=0)
+    z_values = positions[:, 2]
+    norm_z = np.clip((z_values - z_values.min()) / (z_values.max() - z_values.min()), 0, 1)
+    colors = viridis(norm_z)
+    sizes = np.full([positions.shape[0]], 2)
+    return positions, colors, sizes
+
+def time_update(update, frames):
+    """mean ms per call over the frames, after one warm-up call"""
+    update(frames[0])
+    start = time.perf_counter()
+    for frame in frames:
+        update(frame)
+    return (time.perf_counter() - start) / len(frames) * 1000
+
+def main():
+    """print ms per frame for each point count"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    try:
+        from matplotlib import colormaps
+        viridis = colormaps["viridis"]
+    except ImportError:
+        viridis = None
+
+    rng = np.random.default_rng(0)
+    print(f"{'points':>8} {'legacy ms':>10} {'buffers ms':>11} {'speedup':>8}")
+    for count in POINT_COUNTS:
+        frames = [rng.uniform(-50, 50, (count, 3)).astype(np.float32) for _ in range(4)]
+        frames = [frames[i % len(frames)] for i in range(args.repeats)]
+        buffers = PointCloudBuffers(max_points=max(POINT_COUNTS))
+        buffered = time_update(buffers.update, frames)
+        if viridis is None:
+            print(f"{count:>8} {'n/a':>10} {buffered:>11.2f} {'':>8}")
+            continue
+        legacy = time_update(lambda frame: legacy_update(frame, viridis), frames)
+        print(f"{count:>8} {legacy:>10.2f} {buffered:>11.2f} {legacy / buffered:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
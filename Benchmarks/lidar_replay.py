@@ -0,0 +1,99 @@
+"""
+LiDAR page pipeline on a recording, without a sensor or a window.
+
+Run from the repository root:
+    python -m Benchmarks.lidar_replay [recording] [--speed 1.0] [--window 0.3]
+A recording is made with `python -m App.pages.lidar_page --record <dir>`.
+Without one, a synthetic recording (a scanning street scene at 10 Hz) is
+written to a temporary directory first. The recording is played through
+LidarAcquisition exactly as PlotCanvas does on its 100 ms timer: accumulate
+the window, voxel downsample, colour. --speed 0 replays as fast as possible
+and times every frame on its own, without the acquisition thread.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+from Algorithms.Lidar.point_cloud import PointCloudBuffers
+from Algorithms.Lidar.voxel_grid import VoxelDownsampler
+from Sensors.lidar_acquisition import LidarAcquisition
+from Sensors.lidar_recording import LidarRecorder, LidarReplay, RecordedPoints
+
+def synthetic_recording(path, frames=50, points=100_000, rate=10.0):
+    """write frames of a ground plane and a wall seen by a spinning sensor"""
+    rng = np.random.default_rng(0)
+    with LidarRecorder(path, serial_number="synthetic") as recorder:
+        for index in range(frames):
+            angle = rng.uniform(0, 2 * np.pi, points)
+            distance = rng.uniform(2, 50, points)
+            height = np.where(distance > 20, rng.uniform(0, 5, points), 0.0)
+            positions = np.column_stack([distance * np.cos(angle + index * 0.05),
+                                         distance * np.sin(angle + index * 0.05),
+                                         height]).astype(np.float32)
+            timestamps = np.full(points, index * int(1e6 / rate), dtype=np.int64)
+            recorder.write(RecordedPoints(positions, rng.random(points, dtype=np.float32),
+                                          timestamps), receive_time=index / rate)
+    return path
+
+def timed_replay(replay, window, interval):
+    """replay at the recording's timing through LidarAcquisition, like PlotCanvas"""
+    acquisition = LidarAcquisition(replay).start()
+    downsampler, buffers = VoxelDownsampler(), PointCloudBuffers()
+    tick_times, points_shown, last_seq = [], [], -1
+    while not (replay.finished and acquisition.latest(last_seq) is None):
+        tick = time.perf_counter()
+        frames = acquisition.window(window, last_seq) if window > 0 else \
+            [frame for frame in [acquisition.latest(last_seq)] if frame is not None]
+        if frames:
+            start = time.perf_counter()
+            positions, _, _ = buffers.update(
+                downsampler.downsample(acquisition.accumulate(frames)))
+            tick_times.append(time.perf_counter() - start)
+            points_shown.append(len(positions))
+            last_seq = frames[-1].seq
+            acquisition.mark_displayed(frames)
+        time.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+    acquisition.stop()
+
+    stats = acquisition.stats()
+    tick_ms = np.array(tick_times) * 1000
+    print(f"ticks {len(tick_ms)}, prepare ms mean {tick_ms.mean():.2f} "
+          f"p95 {np.percentile(tick_ms, 95):.2f}, points shown {np.mean(points_shown):.0f}")
+    print(f"frames {stats.frames_received}, dropped {stats.dropped_frames}, "
+          f"{stats.fps:.1f} fps, latency {stats.latency * 1000:.1f} ms")
+
+def fast_replay(replay):
+    """every frame downsampled and coloured back to back, reading straight from the files"""
+    downsampler, buffers = VoxelDownsampler(), PointCloudBuffers()
+    frame_times = []
+    while not replay.finished:
+        for points in replay.get_points():
+            start = time.perf_counter()
+            buffers.update(downsampler.downsample(points.positions))
+            frame_times.append(time.perf_counter() - start)
+    frame_ms = np.array(frame_times) * 1000
+    print(f"frames {len(frame_ms)}, ms mean {frame_ms.mean():.2f} "
+          f"p95 {np.percentile(frame_ms, 95):.2f}, {1000 / frame_ms.mean():.0f} fps")
+
+def main():
+    """print per frame ms and the acquisition counters"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("recording", nargs="?")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--window", type=float, default=0.3)
+    parser.add_argument("--interval", type=float, default=0.1, help="render timer seconds")
+    args = parser.parse_args()
+
+    path = args.recording or synthetic_recording(tempfile.mkdtemp(suffix=".lidar"))
+    replay = LidarReplay(path, speed=args.speed or None)
+    print(f"{path}: {len(replay.recording)} frames, {replay.recording.duration:.1f} s")
+    if args.speed:
+        timed_replay(replay, args.window, args.interval)
+    else:
+        fast_replay(replay)
+    if args.recording is None:
+        shutil.rmtree(path)
+
+if __name__ == "__main__":
+    main()
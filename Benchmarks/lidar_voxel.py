@@ -0,0 +1,61 @@
+"""
+Cost of voxel-grid downsampling a LiDAR frame against point count.
+
+Run from the repository root:
+    python -m Benchmarks.lidar_voxel [--repeats 20] [--budget 100000]
+Points lie on a ground plane and a wall within a 100 m box, like a street
+scene. "voxel ms" is VoxelDownsampler.downsample after its voxel size has
+settled, "colour ms" is PointCloudBuffers.update on the raw and on the
+downsampled frame, so the two columns show what downsampling saves the page.
+"""
+import argparse
+import time
+import numpy as np
+from Algorithms.Lidar.point_cloud import PointCloudBuffers
+from Algorithms.Lidar.voxel_grid import VoxelDownsampler
+
+POINT_COUNTS = (100_000, 250_000, 500_000, 1_000_000)
+
+def street_scene(count, rng):
+    """(count, 3) float32 points, half on the ground and half on a wall 20 m away"""
+    ground = np.column_stack([rng.uniform(-50, 50, (count // 2, 2)),
+                              rng.normal(0, 0.02, count // 2)])
+    wall_count = count - count // 2
+    wall = np.column_stack([rng.uniform(-50, 50, wall_count),
+                            20 + rng.normal(0, 0.02, wall_count),
+                            rng.uniform(0, 5, wall_count)])
+    return np.vstack([ground, wall]).astype(np.float32)
+
+def time_call(call, frame, repeats):
+    """median ms per call"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call(frame)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+def main():
+    """print ms per frame and kept points for each point count"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'points':>9} {'voxel ms':>9} {'kept':>8} {'voxel m':>8} "
+          f"{'colour raw ms':>14} {'colour kept ms':>15}")
+    for count in POINT_COUNTS:
+        frame = street_scene(count, rng)
+        downsampler = VoxelDownsampler(max_points=args.budget)
+        for _ in range(30):  # let the voxel size settle
+            kept = downsampler.downsample(frame)
+        voxel = time_call(downsampler.downsample, frame, args.repeats)
+        buffers = PointCloudBuffers(max_points=max(POINT_COUNTS))
+        raw = time_call(buffers.update, frame, args.repeats)
+        coloured = time_call(buffers.update, kept.copy(), args.repeats)
+        print(f"{count:>9} {voxel:>9.2f} {len(kept):>8} {downsampler.voxel_size:>8.3f} "
+              f"{raw:>14.2f} {coloured:>15.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Multi-sensor page streams at their native rates, without a window.
+
+Run from the repository root:
+    python -m Benchmarks.multi_sensor [--seconds 10] [--event-rate 2e6] [--cores 4]
+Stand-ins for the four sensors are written to a temporary directory: a
+1280x720 and a 640x512 video played in real time at 30 fps for the RGB and
+thermal cameras, a synthetic 10 Hz LiDAR recording of 100k points per frame
+and an EVT2 recording of a circling disc. The page's four streams run on one
+StreamScheduler while the main thread takes new frames every 15 ms like the
+page's refresh timer. After a warm up, each stream's rate against its target,
+the rate its frames reached the UI, its ingest thread's CPU share and the
+process CPU are printed. --cores pins the process to that many cores (Linux).
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from Algorithms.Thermal.thermal_analytics import ThermalAnalytics
+from App.pages.allTest import TARGET_FPS, EventStream, FrameStream, LidarStream
+from Benchmarks.lidar_replay import synthetic_recording
+from Benchmarks.prophesee_raw import encode_evt2, write_raw
+from Benchmarks.rtsp_ingest import test_video
+from Sensors.event_stream import synthetic_events
+from Sensors.lidar_recording import LidarReplay
+from Sensors.prophesee_raw import RawPlayer
+from Sensors.rtsp_ingest import RtspSource
+from Sensors.stream_scheduler import StreamScheduler
+
+EVENT_SIZE = (1280, 720)
+
+def stand_ins(directory, seconds, event_rate):
+    """write the stand-in recordings, returns their paths by stream"""
+    rgb = test_video(os.path.join(directory, "rgb.avi"), seconds, 30, (1280, 720))
+    thermal = test_video(os.path.join(directory, "thermal.avi"), seconds, 30, (640, 512))
+    lidar = synthetic_recording(os.path.join(directory, "lidar"))
+    events = synthetic_events(int(event_rate * 2), *EVENT_SIZE, 0, 2_000_000,
+                              np.random.default_rng(0))
+    event = os.path.join(directory, "events.raw")
+    write_raw(event, "EVT2", encode_evt2(events), *EVENT_SIZE)
+    return rgb, thermal, lidar, event
+
+def streams(rgb, thermal, lidar, event):
+    """the page's streams reading the stand-ins"""
+    analytics = ThermalAnalytics()
+    return [
+        FrameStream("rgb", TARGET_FPS["rgb"], lambda: RtspSource(rgb, realtime=True).start()),
+        FrameStream("thermal", TARGET_FPS["thermal"],
+                    lambda: RtspSource(thermal, realtime=True).start(),
+                    process=lambda image: analytics.process(image).image),
+        LidarStream(TARGET_FPS["lidar"], lambda: LidarReplay(lidar, loop=True)),
+        EventStream(TARGET_FPS["event"], lambda: RawPlayer(event, loop=True).start()),
+    ]
+
+def run(scheduler, seconds, warm_up, refresh_interval):
+    """take frames like the page's timer, returns the stats measured after the warm up"""
+    scheduler.stats_interval = seconds - warm_up - 0.1
+    start = time.monotonic()
+    measuring = False
+    while time.monotonic() - start < seconds:
+        scheduler.take()
+        if not measuring and time.monotonic() - start >= warm_up:
+            scheduler.stats()  # the interval measured starts here
+            measuring = True
+        time.sleep(refresh_interval)
+    return scheduler.stats(), scheduler.process_cpu
+
+def main():
+    """print each stream's rate and CPU share with all four running"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warm-up", type=float, default=2.0)
+    parser.add_argument("--event-rate", type=float, default=2e6, help="events per second")
+    parser.add_argument("--cores", type=int, help="cores the process may use (Linux)")
+    args = parser.parse_args()
+
+    if args.cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, sorted(os.sched_getaffinity(0))[:args.cores])
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    directory = tempfile.mkdtemp()
+    try:
+        paths = stand_ins(directory, int(args.seconds) + 5, args.event_rate)
+        scheduler = StreamScheduler(streams(*paths)).start()
+        try:
+            stats, process_cpu = run(scheduler, args.seconds, args.warm_up, 0.015)
+        finally:
+            scheduler.stop()
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{'stream':>8} {'target':>6} {'fps':>6} {'shown':>6} {'CPU %':>6} "
+          f"{'ms/frame':>8} {'skipped':>7}")
+    for stream in stats.values():
+        print(f"{stream.name:>8} {stream.target_fps:>6.0f} {stream.fps:>6.1f} "
+              f"{stream.shown_fps:>6.1f} {100 * stream.cpu:>6.1f} "
+              f"{1000 * stream.prepare_time:>8.2f} {stream.skipped:>7} {stream.status}")
+    print(f"process CPU {100 * process_cpu:.0f}% of one core, {cores} cores")
+
+if __name__ == "__main__":
+    main()
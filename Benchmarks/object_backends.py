@@ -0,0 +1,91 @@
+"""
+Latency and accuracy of the object detection backends against the PyTorch path.
+
+Run from the repository root:
+    python -m Benchmarks.object_backends [--images DIR] [--imgsz 640] [--threads 4]
+Accuracy is agreement with the PyTorch detections (same class, IoU >= 0.5).
+Without an image directory the sample images shipped with ultralytics are used.
+"""
+import argparse
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.utils import ASSETS
+from Algorithms.Objects.inference_backends import load_detector
+
+BACKENDS = (("onnx", False), ("onnx", True), ("openvino", False), ("openvino", True))
+
+def box_iou(a, b):
+    """IoU matrix between two (n, 4) xyxy arrays"""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+def agreement(reference, result):
+    """(matched, reference boxes, result boxes) for one image"""
+    ref_boxes, ref_cls = reference.boxes.xyxy.numpy(), reference.boxes.cls.numpy()
+    boxes, cls = result.boxes.xyxy.numpy(), result.boxes.cls.numpy()
+    if not len(ref_boxes) or not len(boxes):
+        return 0, len(ref_boxes), len(boxes)
+    ious = box_iou(ref_boxes, boxes) * (ref_cls[:, None] == cls[None, :])
+    return int((ious.max(axis=1) >= 0.5).sum()), len(ref_boxes), len(boxes)
+
+def time_detector(predict, images, repeats):
+    """(mean ms, p95 ms, last results) over repeats passes of the image set"""
+    predict(images[0])
+    times, results = [], []
+    for _ in range(repeats):
+        results = []
+        for image in images:
+            start = time.perf_counter()
+            results.append(predict(image)[0])
+            times.append((time.perf_counter() - start) * 1000)
+    return float(np.mean(times)), float(np.percentile(times, 95)), results
+
+def main():
+    """print a latency/accuracy table per backend"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--images", default=str(ASSETS))
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    images = [cv2.imread(str(path)) for path in sorted(Path(args.images).glob("*.jpg"))]
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model = YOLO(args.weights)
+    torch_mean, torch_p95, reference = time_detector(
+        lambda image: model.predict(image, conf=args.conf, imgsz=args.imgsz, verbose=False),
+        images, args.repeats)
+
+    print(f"{len(images)} images, imgsz {args.imgsz}, threads {args.threads or 'default'}")
+    print(f"{'backend':<16} {'mean ms':>8} {'p95 ms':>8} {'recall':>7} {'precision':>9}")
+    print(f"{'torch':<16} {torch_mean:>8.1f} {torch_p95:>8.1f} {'ref':>7} {'ref':>9}")
+    for backend, int8 in BACKENDS:
+        name = f"{backend}{' int8' if int8 else ''}"
+        try:
+            detector = load_detector(backend, args.weights, imgsz=args.imgsz, int8=int8,
+                                     threads=args.threads)
+        except Exception as e:
+            print(f"{name:<16} unavailable: {e}")
+            continue
+        mean, p95, results = time_detector(
+            lambda image, detector=detector: detector.predict(image, conf=args.conf),
+            images, args.repeats)
+        matched, ref_total, total = np.sum(
+            [agreement(ref, res) for ref, res in zip(reference, results)], axis=0)
+        recall = matched / ref_total if ref_total else 1.0
+        precision = matched / total if total else 1.0
+        print(f"{name:<16} {mean:>8.1f} {p95:>8.1f} {recall:>7.1%} {precision:>9.1%}")
+
+if __name__ == "__main__":
+    main()
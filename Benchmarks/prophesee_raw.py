@@ -0,0 +1,153 @@
+"""
+Prophesee RAW decode throughput, EVT2 and EVT3.
+
+Run from the repository root:
+    python -m Benchmarks.prophesee_raw [recording.raw] [--rate 5e6] [--seconds 2]
+Without a recording, synthetic 1280x720 events (a circling disc and bars
+sweeping across rows, so EVT3 uses its vector words) are written as an EVT2
+and an EVT3 file in a temporary directory, starting just before the EVT3
+timestamp wrap. Each file is checked to decode back to the same events, then
+the index build, a full decode and a seek to the middle are timed, and the
+decode throughput is printed in events per second.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from Sensors.event_stream import EVENT_DTYPE, synthetic_events
+from Sensors.prophesee_raw import RawRecording
+
+SIZE = (1280, 720)
+
+def write_raw(path, format_name, words, width, height):
+    """RAW header and words"""
+    with open(path, "wb") as f:
+        evt = "2.0" if format_name == "EVT2" else "3.0"
+        f.write(f"% evt {evt}\n% format {format_name};height={height};width={width}\n"
+                f"% geometry {width}x{height}\n% end\n".encode("ascii"))
+        words.tofile(f)
+
+def encode_evt2(events):
+    """EVT2 words of time ordered events, a TIME_HIGH whenever it changes"""
+    t = events["t"]
+    high = t >> 6
+    new_high = np.concatenate(([True], high[1:] != high[:-1]))
+    position = np.arange(len(events)) + np.cumsum(new_high)
+    words = np.empty(len(events) + int(new_high.sum()), dtype="<u4")
+    words[position[new_high] - 1] = (8 << 28) | (high[new_high] & 0x0FFFFFFF)
+    words[position] = (events["p"].astype(np.uint32) << 28) | ((t & 0x3F) << 22) \
+        | (events["x"].astype(np.uint32) << 11) | events["y"]
+    return words
+
+def encode_evt3(events):
+    """
+    EVT3 words of events sorted by (t, y, p, x) without duplicates. Events of
+    the same time, row and polarity within a 12 pixel block share a vector
+    word, runs of blocks share their VECT_BASE_X.
+    """
+    t, x, y, p = (events[name].astype(np.int64) for name in ("t", "x", "y", "p"))
+    block = x // 12
+    keys = (t, y, p, block)
+    new_group = np.ones(len(events), dtype=bool)
+    new_group[1:] = np.any([key[1:] != key[:-1] for key in keys], axis=0)
+    first = np.flatnonzero(new_group)
+    size = np.diff(np.append(first, len(events)))
+    mask = np.bitwise_or.reduceat(1 << (x - block * 12), first)
+    gt, gy, gp, gblock, gx = t[first], y[first], p[first], block[first], x[first]
+
+    def changed(values):
+        return np.concatenate(([True], values[1:] != values[:-1]))
+
+    time_high, time_low, address_y = changed(gt >> 12), changed(gt), changed(gy)
+    vector = size > 1
+    same_row = ~time_low & ~address_y & ~changed(gp)
+    follows = np.zeros(len(first), dtype=bool)
+    follows[1:] = vector[1:] & vector[:-1] & same_row[1:] & (gblock[1:] == gblock[:-1] + 1)
+    followed = np.append(follows[1:], False)
+    vect_8 = vector & (mask < 256) & ~followed
+    base = vector & ~follows
+    counts = time_high.astype(np.int64) + time_low + address_y + base + 1
+    position = np.cumsum(counts) - counts
+    words = np.empty(int(counts.sum()), dtype="<u2")
+    for flag, word in ((time_high, (8 << 12) | ((gt >> 12) & 0xFFF)),
+                       (time_low, (6 << 12) | (gt & 0xFFF)),
+                       (address_y, gy),
+                       (base, (3 << 12) | (gp << 11) | (gblock * 12))):
+        words[position[flag]] = word[flag]
+        position = position + flag
+    words[position] = np.where(~vector, (2 << 12) | (gp << 11) | gx,
+                               np.where(vect_8, 5 << 12, 4 << 12) | mask)
+    return words
+
+def bench_events(rate, seconds, start_time, seed=0):
+    """unique events sorted by (t, y, p, x): a circling disc plus horizontal bars"""
+    rng = np.random.default_rng(seed)
+    count = int(rate * seconds)
+    disc = synthetic_events(count // 2, *SIZE, start_time, int(seconds * 1e6), rng)
+    # Bars: 40 pixel runs of a row firing together
+    runs = count // 2 // 40
+    bars = np.empty(runs * 40, dtype=EVENT_DTYPE)
+    bars["t"] = np.repeat(rng.integers(start_time, start_time + int(seconds * 1e6), runs), 40)
+    bars["x"] = (np.repeat(rng.integers(0, SIZE[0] - 40, runs), 40) + np.tile(np.arange(40), runs))
+    bars["y"] = np.repeat(rng.integers(0, SIZE[1], runs), 40)
+    bars["p"] = np.repeat(rng.integers(0, 2, runs), 40)
+    events = np.concatenate([disc, bars])
+    events = events[np.lexsort((events["x"], events["p"], events["y"], events["t"]))]
+    keys = np.column_stack([events[name].astype(np.int64) for name in ("t", "y", "p", "x")])
+    unique = np.ones(len(events), dtype=bool)
+    unique[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+    return events[unique]
+
+def check(recording, events):
+    """decoded events equal the encoded ones"""
+    decoded = np.concatenate(list(recording.chunks()))
+    same = len(decoded) == len(events) and all(
+        np.array_equal(decoded[name], events[name]) for name in EVENT_DTYPE.names)
+    return "ok" if same else f"MISMATCH ({len(decoded)} decoded of {len(events)})"
+
+def timed(call):
+    """result and seconds of call"""
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+def benchmark(path, expected=None):
+    """print index, decode and seek times of a recording"""
+    recording = RawRecording(path)
+    size = os.path.getsize(path)
+    _, index_time = timed(recording.index)
+    count, decode_time = timed(lambda: sum(len(events) for events in recording.chunks()))
+    middle = int(recording.index()[1][len(recording) // 2])
+    _, seek_time = timed(lambda: next(recording.seek(middle)))
+    status = check(recording, expected) if expected is not None else ""
+    print(f"{recording.format:>6} {count:>10} {size / count:>6.2f} {index_time * 1000:>8.1f} "
+          f"{decode_time * 1000:>9.1f} {count / decode_time / 1e6:>8.1f} "
+          f"{seek_time * 1000:>7.1f} {status}")
+
+def main():
+    """print decode throughput of a recording or of synthetic EVT2 and EVT3 files"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("recording", nargs="?", help="RAW file, synthetic files if omitted")
+    parser.add_argument("--rate", type=float, default=5e6, help="synthetic events per second")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'format':>6} {'events':>10} {'B/ev':>6} {'index ms':>8} {'decode ms':>9} "
+          f"{'M ev/s':>8} {'seek ms':>7}")
+    if args.recording:
+        benchmark(args.recording)
+        return
+    events = bench_events(args.rate, args.seconds, start_time=(1 << 24) - 500_000)
+    directory = tempfile.mkdtemp()
+    try:
+        for format_name, encode in (("EVT2", encode_evt2), ("EVT3", encode_evt3)):
+            path = os.path.join(directory, f"synthetic_{format_name.lower()}.raw")
+            write_raw(path, format_name, encode(events), *SIZE)
+            benchmark(path, events)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Display lag of the thermal stream with a UI slower than the camera.
+
+Run from the repository root:
+    python -m Benchmarks.rtsp_ingest [source] [--seconds 10] [--ui-interval 0.06]
+Without a source a 25 fps test video is written to a temporary file and played
+in real time as a stand-in camera (an rtsp:// URL from a local server works
+too). "read in timer" is the old page: one cap.read() per UI tick, so frames
+queue up and the display falls further behind the stream. "RtspSource" keeps
+only the newest decoded frame. Lag is wall time since the first frame minus
+the stream time of the frame on screen. A missing source shows the reconnect
+backoff.
+"""
+import argparse
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from Sensors.rtsp_ingest import RtspSource
+
+def test_video(path, seconds=30, fps=25, size=(640, 480)):
+    """write a moving gradient video to play as a stand-in camera"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    gradient = np.tile(np.linspace(0, 255, size[0], dtype=np.uint8), (size[1], 1))
+    for index in range(seconds * fps):
+        frame = cv2.applyColorMap(np.roll(gradient, index * 8, axis=1), cv2.COLORMAP_INFERNO)
+        writer.write(frame)
+    writer.release()
+    return path
+
+def read_in_timer(source, seconds, ui_interval):
+    """the old page: cap.read() once per UI tick, returns the lag of each shown frame"""
+    cap = cv2.VideoCapture(source)
+    lags, start = [], time.monotonic()
+    first_pts = None
+    while time.monotonic() - start < seconds:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        pts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        first_pts = pts if first_pts is None else first_pts
+        lags.append((time.monotonic() - start) - (pts - first_pts))
+        time.sleep(ui_interval)
+    cap.release()
+    return lags
+
+def rtsp_source(source, seconds, ui_interval, realtime):
+    """RtspSource read once per UI tick, returns the lags and the final stats"""
+    ingest = RtspSource(source, realtime=realtime).start()
+    lags, last_seq, start = [], -1, time.monotonic()
+    while time.monotonic() - start < seconds:
+        frame = ingest.read(last_seq)
+        if frame is not None:
+            last_seq = frame.seq
+            ingest.mark_displayed(frame)
+            lags.append(ingest.stream_delay)
+        time.sleep(ui_interval)
+    stats = ingest.stats()
+    ingest.release()
+    return lags, stats
+
+def summary(lags):
+    """first and last second of lag in ms"""
+    if not lags:
+        return "no frames"
+    return (f"lag start {1000 * np.mean(lags[:10]):6.0f} ms, "
+            f"end {1000 * np.mean(lags[-10:]):6.0f} ms")
+
+def main():
+    """print how the display lag develops for both ways of reading"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", nargs="?")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--ui-interval", type=float, default=0.06)
+    args = parser.parse_args()
+
+    source = args.source or test_video(os.path.join(tempfile.mkdtemp(), "thermal.avi"))
+    is_file = os.path.exists(source)
+    lags = read_in_timer(source, args.seconds, args.ui_interval)
+    print(f"{'read in timer':>15}: {summary(lags)}")
+    lags, stats = rtsp_source(source, args.seconds, args.ui_interval, realtime=is_file)
+    print(f"{'RtspSource':>15}: {summary(lags)}")
+    print(f"{'':>15}  {stats.fps:.1f} fps decoded, {1000 * stats.decode_time:.2f} ms CPU per "
+          f"decode, frame age {1000 * (stats.frame_age or 0):.1f} ms, "
+          f"{stats.dropped_frames} dropped, {stats.reconnects} reconnects")
+
+    print("missing source, reconnect backoff:")
+    missing = RtspSource(os.path.join(tempfile.gettempdir(), "no_camera.avi"),
+                         backoff=(0.25, 2.0)).start()
+    for _ in range(8):
+        time.sleep(0.5)
+        stats = missing.stats()
+        print(f"  {stats.state:>10}, retry in {stats.retry_in:.2f} s")
+    missing.release()
+    if args.source is None:
+        os.remove(source)
+        os.rmdir(os.path.dirname(source))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Cost of the thermal analytics stage per 640x512 frame.
+
+Run from the repository root:
+    python -m Benchmarks.thermal_analytics [--frames 100]
+Frames are synthetic: a warm background with noise and three moving hotspots.
+Each stage of ThermalAnalytics is timed on its own, then the whole process()
+call, for every palette. The hotspot ids are checked to stay the same while
+the hotspots move.
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from Algorithms.Thermal.thermal_analytics import PALETTES, ThermalAnalytics, histogram_image
+
+SIZE = (640, 512)
+
+def synthetic_frames(count, seed=0):
+    """white-hot BGR frames with three hotspots moving across them"""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:SIZE[1], 0:SIZE[0]].astype(np.float32)
+    background = 60 + 20 * np.sin(xs / 50)
+    frames = []
+    for index in range(count):
+        image = background + rng.normal(0, 3, background.shape)
+        for start_x, y, speed in ((80, 100, 3), (300, 300, -2), (500, 420, 1)):
+            x = start_x + speed * index
+            image += 150 * np.exp(-((xs - x) ** 2 + (ys - y) ** 2) / (2 * 12 ** 2))
+        frames.append(cv2.cvtColor(np.clip(image, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR))
+    return frames
+
+def median_ms(call, inputs):
+    """median ms of call over the inputs"""
+    times = []
+    for item in inputs:
+        start = time.perf_counter()
+        call(item)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+def main():
+    """print ms per stage and for the whole stage per palette"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(min(args.frames, 30))
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+    analytics = ThermalAnalytics()
+    intensities = [analytics.intensity(frame) for frame in frames]
+    threshold = 128
+    print(f"{'stage':>12} {'ms':>6}")
+    for name, call, inputs in (
+            ("intensity", analytics.intensity, frames),
+            ("histogram", analytics.histogram.update, intensities),
+            ("hotspots", lambda image: analytics.find_hotspots(image, threshold), intensities),
+            ("colour", analytics.colour, intensities),
+            ("hist image", lambda _: histogram_image(analytics.histogram.values,
+                                                     analytics.lut), intensities)):
+        print(f"{name:>12} {median_ms(call, inputs):>6.2f}")
+
+    print(f"{'palette':>12} {'ms':>6} {'hotspots':>9} {'ids':>10}")
+    for palette in PALETTES:
+        analytics = ThermalAnalytics(palette=palette)
+        # Run in order so the tracker follows the hotspots
+        ids = set()
+        for frame in synthetic_frames(30):
+            ids.update(hotspot.track_id for hotspot in analytics.process(frame).hotspots)
+        elapsed = median_ms(analytics.process, frames)
+        print(f"{palette:>12} {elapsed:>6.2f} {len(analytics.process(frames[0]).hotspots):>9} "
+              f"{str(sorted(ids)):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-frame cost of showing camera frames: the old QLabel conversion against VideoWidget.
+
+Run from the repository root (set QT_QPA_PLATFORM=offscreen on a headless machine):
+    python -m Benchmarks.video_display [width height]
+tracemalloc follows numpy/OpenCV buffers, so the extra peak memory per frame shows
+the colour conversion copies, Qt's own allocations are not traced.
+"""
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QLabel
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import Qt
+from App.video_widget import VideoWidget
+
+def legacy_show(label, frame):
+    """the per page _convert_cv_to_qt path, with the gesture page's 400x400 rescale"""
+    h, w, ch = frame.shape
+    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    qt_image = QImage(rgb_image.data, w, h, ch * w, QImage.Format_RGB888)
+    pixmap = QPixmap.fromImage(qt_image).scaled(400, 400, Qt.KeepAspectRatio,
+                                                Qt.SmoothTransformation)
+    label.setPixmap(pixmap)
+    label.repaint()
+
+def widget_show(widget, frame):
+    """VideoWidget path"""
+    widget.set_frame(frame)
+    widget.repaint()
+
+def measure(show, target, frames):
+    """(ms per frame, extra peak bytes per frame) over the frames"""
+    show(target, frames[0])
+    tracemalloc.start()
+    peaks = []
+    start = time.perf_counter()
+    for frame in frames:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        show(target, frame)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    elapsed = (time.perf_counter() - start) / len(frames)
+    tracemalloc.stop()
+    return elapsed * 1000, float(np.median(peaks))
+
+def main():
+    """print time and traced allocations per frame for each display path"""
+    size = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (1280, 720)
+    app = QApplication(sys.argv)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8) for _ in range(60)]
+    frame_bytes = frames[0].nbytes
+
+    label = QLabel()
+    label.setScaledContents(True)
+    label.resize(900, 900)
+    label.show()
+    widget = VideoWidget()
+    widget.resize(900, 900)
+    widget.show()
+    app.processEvents()
+
+    print(f"{len(frames)} frames of {size[0]}x{size[1]}, shown at 900x900")
+    print(f"{'path':<12} {'ms/frame':>9} {'extra peak KB':>14} {'frame copies':>13}")
+    for name, show, target in (("QLabel", legacy_show, label),
+                               ("VideoWidget", widget_show, widget)):
+        ms, peak = measure(show, target, frames)
+        print(f"{name:<12} {ms:>9.2f} {peak / 1024:>14.1f} {peak / frame_bytes:>13.2f}")
+    print(f"VideoWidget buffer copies {widget.copies}, buffer allocations "
+          f"{widget.buffer_allocations}")
+
+if __name__ == "__main__":
+    main()
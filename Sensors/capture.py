@@ -0,0 +1,249 @@
+"""
+Threaded frame capture
+
+Frames are grabbed on a background thread into a single latest-frame slot so the
+UI never blocks on cv2.VideoCapture.read() and stale frames never pile up.
+"""
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+from dataclasses import dataclass
+from typing import Optional
+import cv2
+import numpy as np
+
+def display_url(source):
+    """a source as it may be printed, without the user:password@ of a URL"""
+    if not isinstance(source, str):
+        return str(source)
+    parts = urlsplit(source)
+    if "@" not in parts.netloc:
+        return source
+    return urlunsplit(parts._replace(netloc=parts.netloc.rsplit("@", 1)[1]))
+
+@dataclass
+class Frame:
+    """frame grabbed by a capture source, with its sequence number and grab time"""
+    image: np.ndarray
+    seq: int
+    timestamp: float
+
+class LatestFrameSource:
+    """
+    Capture source that reads a cv2.VideoCapture on its own thread.
+    Only the newest frame is kept, frames nobody read before the next one
+    arrives are dropped. Frames may be shared between consumers, so treat
+    Frame.image as read only and copy before drawing on it.
+    """
+    def __init__(self, source=0, api_preference=cv2.CAP_ANY, buffer_size=1):
+        self.source = source
+        self.api_preference = api_preference
+        self.buffer_size = buffer_size
+        self.cap = None
+        self.failed_reads = 0  # consecutive failed reads
+        self.dropped_frames = 0  # frames overwritten before anyone read them
+        self._latest: Optional[Frame] = None
+        self._next_seq = 0
+        self._read_seq = -1
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Open the device and start the capture thread, returns self for chaining"""
+        if self._thread is not None:
+            return self
+        self.cap = self._open()
+        if not self.is_opened():
+            print(f"Error: Could not open video source {display_url(self.source)}")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _open(self):
+        """create the underlying capture, override for other backends"""
+        cap = cv2.VideoCapture(self.source, self.api_preference)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        return cap
+
+    def is_opened(self):
+        """True while the underlying capture is open"""
+        return self.cap is not None and self.cap.isOpened()
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                cap = self.cap
+                if cap is None or not cap.isOpened():
+                    time.sleep(0.1)
+                    continue
+                ret, image = cap.read()
+                if not ret:
+                    self.failed_reads += 1
+                    time.sleep(0.01)  # avoid spinning on a dead device
+                    continue
+                self.failed_reads = 0
+                self._publish(image)
+        finally:
+            # Released here, never under a read still in progress
+            self._close()
+
+    def _close(self):
+        """release the capture, only ever called from the capture thread"""
+        cap, self.cap = self.cap, None
+        if cap is not None:
+            cap.release()
+
+    def _publish(self, image):
+        """store a new frame in the latest-frame slot"""
+        with self._condition:
+            if self._latest is not None and self._latest.seq > self._read_seq:
+                self.dropped_frames += 1
+            self._latest = Frame(image=image, seq=self._next_seq, timestamp=time.monotonic())
+            self._next_seq += 1
+            self._condition.notify_all()
+
+    def read(self, last_seq=-1) -> Optional[Frame]:
+        """Return the newest frame if it is newer than last_seq, otherwise None (never blocks)"""
+        with self._condition:
+            frame = self._latest
+            if frame is None or frame.seq <= last_seq:
+                return None
+            self._read_seq = max(self._read_seq, frame.seq)
+            return frame
+
+    def peek(self) -> Optional[Frame]:
+        """Return the newest frame without marking it as read"""
+        with self._condition:
+            return self._latest
+
+    def is_alive(self, max_age=2.0):
+        """True if the device is open and produced a frame within max_age seconds"""
+        latest = self.peek()
+        return (self.is_opened() and latest is not None
+                and time.monotonic() - latest.timestamp < max_age)
+
+    def wait(self, last_seq=-1, timeout=None) -> Optional[Frame]:
+        """Block until a frame newer than last_seq arrives or timeout expires"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: (self._latest is not None and self._latest.seq > last_seq)
+                or self._stop_event.is_set(),
+                timeout=timeout)
+        return self.read(last_seq)
+
+    def release(self):
+        """Stop the capture thread, which releases the device when its read returns"""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+class CameraSubscription:
+    """A subscriber's handle on a shared camera, reads like a LatestFrameSource"""
+    def __init__(self, broker, index, source):
+        self._broker = broker
+        self._source = source
+        self.index = index
+        self.released = False
+
+    @property
+    def failed_reads(self):
+        """consecutive failed reads of the shared device"""
+        return self._source.failed_reads
+
+    def is_opened(self):
+        """True while the shared device is open"""
+        return self._source.is_opened()
+
+    def read(self, last_seq=-1) -> Optional[Frame]:
+        """Return the newest frame if it is newer than last_seq, otherwise None"""
+        return self._source.read(last_seq)
+
+    def wait(self, last_seq=-1, timeout=None) -> Optional[Frame]:
+        """Block until a frame newer than last_seq arrives or timeout expires"""
+        return self._source.wait(last_seq, timeout)
+
+    def release(self):
+        """Leave the camera, the device closes when the last subscriber leaves"""
+        if not self.released:
+            self.released = True
+            self._broker.unsubscribe(self.index)
+
+class CameraBroker:
+    """
+    Process wide owner of the RGB cameras. Each device is opened once and its
+    frames are shared by every subscriber, the device is closed again when
+    the last subscriber releases it.
+    """
+    _shared = None  # Class-level instance used by the whole application
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sources = {}
+        self._subscribers = {}
+        self._probing = {}  # index -> Condition notified when the probe has closed the device
+
+    @classmethod
+    def shared(cls):
+        """Return the application wide broker"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def subscribe(self, index=0) -> CameraSubscription:
+        """Join a camera, opening it if this is the first subscriber"""
+        with self._lock:
+            self._wait_for_probe(index)
+            if index not in self._sources:
+                self._sources[index] = LatestFrameSource(index).start()
+                self._subscribers[index] = 0
+            self._subscribers[index] += 1
+            return CameraSubscription(self, index, self._sources[index])
+
+    def unsubscribe(self, index):
+        """Leave a camera, closing it when nobody is subscribed anymore"""
+        with self._lock:
+            if index not in self._sources:
+                return
+            self._subscribers[index] -= 1
+            if self._subscribers[index] <= 0:
+                self._sources.pop(index).release()
+                del self._subscribers[index]
+
+    def is_in_use(self, index=0):
+        """True if any subscriber currently holds the camera"""
+        with self._lock:
+            return index in self._sources
+
+    def probe(self, index=0):
+        """
+        Report whether a camera is available. If it is in use the answer comes
+        from its frame stream, the device is only opened when nobody holds it.
+        """
+        with self._lock:
+            self._wait_for_probe(index)
+            source = self._sources.get(index)
+            if source is not None:
+                return source.is_alive()
+            # Subscribers to this index wait until the device is closed again, the lock
+            # is not held while it opens so other cameras are not blocked
+            self._probing[index] = threading.Condition(self._lock)
+        try:
+            cap = cv2.VideoCapture(index)
+            is_opened = cap.isOpened()
+            cap.release()
+            return is_opened
+        except Exception:
+            return False
+        finally:
+            with self._lock:
+                self._probing.pop(index).notify_all()
+
+    def _wait_for_probe(self, index):
+        """wait until no probe has the device open, the caller holds the lock"""
+        while index in self._probing:
+            self._probing[index].wait()
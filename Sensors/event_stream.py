@@ -0,0 +1,366 @@
+"""
+Event camera stream over the network
+
+The rig sends raw events (x, y, polarity, timestamp) in batches, each batch a
+16 byte header followed by the packed events:
+    header  magic b"EVB1", batch sequence number, event count, sensor width,
+            sensor height (little endian "<4sIIHH")
+    events  EVENT_DTYPE records, 13 bytes each
+Over TCP the rig listens and the app connects (and reconnects), over UDP the
+app listens and every datagram is one batch, lost batches are counted from the
+sequence numbers.
+
+Received events go into a preallocated EventRingBuffer. The display reads the
+events since its last frame, or the last few milliseconds of events, from it.
+
+EventEmitter sends events in this format. Run on the rig with the Metavision
+SDK, or anywhere as a synthetic stand-in:
+    python -m Sensors.event_stream --camera            # Metavision camera
+    python -m Sensors.event_stream --rate 5000000      # synthetic, 5M events/s
+"""
+import argparse
+import socket
+import struct
+import threading
+import time
+import numpy as np
+
+EVENT_DTYPE = np.dtype([("t", "<i8"), ("x", "<u2"), ("y", "<u2"), ("p", "u1")])  # packed
+HEADER = struct.Struct("<4sIIHH")
+MAGIC = b"EVB1"
+EVENT_PORT = 3333
+UDP_BATCH = (65507 - HEADER.size) // EVENT_DTYPE.itemsize  # events per datagram
+
+class EventRingBuffer:
+    """
+    Preallocated ring of events. Positions are absolute event counts, so a
+    reader keeps a cursor and asks for everything written after it.
+    """
+    def __init__(self, capacity=1 << 23):
+        self.capacity = capacity
+        self.events = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.head = 0  # events ever written
+        self._lock = threading.Lock()
+
+    def write(self, events):
+        """Append events, overwriting the oldest when full"""
+        if len(events) > self.capacity:
+            events = events[-self.capacity:]
+        with self._lock:
+            start = self.head % self.capacity
+            first = min(len(events), self.capacity - start)
+            self.events[start:start + first] = events[:first]
+            self.events[:len(events) - first] = events[first:]
+            self.head += len(events)
+
+    def _copy(self, start, stop):
+        """events at absolute positions [start, stop), the caller holds the lock"""
+        start = max(start, stop - self.capacity)
+        begin, end = start % self.capacity, stop % self.capacity
+        if stop - start == 0:
+            return self.events[:0].copy()
+        if begin < end:
+            return self.events[begin:end].copy()
+        return np.concatenate([self.events[begin:], self.events[:end]])
+
+    def read(self, cursor):
+        """(events written since cursor, new cursor, events lost because the reader fell behind)"""
+        with self._lock:
+            head = self.head
+            lost = max(0, head - cursor - self.capacity)
+            return self._copy(cursor, head), head, lost
+
+    def latest(self, duration, tail=4096):
+        """events of the last duration (in event time units, microseconds) before the newest"""
+        with self._lock:
+            if self.head == 0:
+                return self.events[:0].copy()
+            newest = self.events[(self.head - 1) % self.capacity]["t"]
+            available = min(self.head, self.capacity)
+            # Timestamps rise through the ring, so only a tail growing until it reaches
+            # back far enough is searched: searchsorted would copy the whole strided column
+            count = min(tail, available)
+            times = self._times(self.head - count, self.head)
+            while count < available and times[0] > newest - duration:
+                count = min(4 * count, available)
+                times = self._times(self.head - count, self.head)
+            index = int(np.searchsorted(times, newest - duration, side="right"))
+            return self._copy(self.head - count + index, self.head)
+
+    def _times(self, start, stop):
+        """contiguous timestamps at absolute positions [start, stop), the caller holds the lock"""
+        begin, end = start % self.capacity, stop % self.capacity
+        if begin < end:
+            return np.ascontiguousarray(self.events["t"][begin:end])
+        return np.concatenate([self.events["t"][begin:], self.events["t"][:end]])
+
+def pack_header(seq, count, width, height):
+    """header of a batch of count events"""
+    return HEADER.pack(MAGIC, seq, count, width, height)
+
+def recv_exactly(sock, view):
+    """fill a memoryview from a stream socket, False if the connection closed"""
+    received = 0
+    while received < len(view):
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            return False
+        received += count
+    return True
+
+class EventReceiver:
+    """Receive event batches on a background thread into an EventRingBuffer"""
+    def __init__(self, host="169.254.10.10", port=EVENT_PORT, protocol="tcp", buffer=None,
+                 max_batch=1 << 20, timeout=1.0, reconnect_delay=1.0):
+        if protocol not in ("tcp", "udp"):
+            raise ValueError(f"Unknown protocol: {protocol}, choose tcp or udp")
+        self.host = host  # rig address for TCP, local bind address for UDP
+        self.port = port
+        self.protocol = protocol
+        self.buffer = buffer if buffer is not None else EventRingBuffer()
+        self.timeout = timeout  # seconds to connect, and between checks for stop over UDP
+        self.reconnect_delay = reconnect_delay
+        self.sensor_size = None  # (width, height) from the latest header
+        self.connected = False
+        self.events_received = 0
+        self.batches_received = 0
+        self.batches_lost = 0  # UDP batches missing from the sequence
+        self.rate = 0.0  # events per second, over the last second
+        self._staging = bytearray(HEADER.size + max_batch * EVENT_DTYPE.itemsize)
+        self._next_seq = None
+        self._rate_start, self._rate_count = time.monotonic(), 0
+        self._sock = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the receiving thread, returns self for chaining"""
+        if self._thread is None:
+            self._stop_event.clear()
+            target = self._run_tcp if self.protocol == "tcp" else self._run_udp
+            self._thread = threading.Thread(target=target, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run_tcp(self):
+        view = memoryview(self._staging)
+        while not self._stop_event.is_set():
+            try:
+                with socket.create_connection((self.host, self.port), self.timeout) as sock:
+                    # Blocking reads, stop() shuts the socket down to wake them
+                    sock.settimeout(None)
+                    self._sock = sock
+                    self.connected = True
+                    while recv_exactly(sock, view[:HEADER.size]):
+                        count = self._accept_header(view)
+                        payload = view[HEADER.size:HEADER.size + count * EVENT_DTYPE.itemsize]
+                        if not recv_exactly(sock, payload):
+                            break
+                        self._store(payload)
+            except (OSError, ValueError) as e:
+                if not self._stop_event.is_set():
+                    print(f"Event stream {self.host}:{self.port} error: {e}")
+            self._sock = None
+            self.connected = False
+            self._stop_event.wait(self.reconnect_delay)
+
+    def _run_udp(self):
+        view = memoryview(self._staging)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 24)
+            sock.bind((self.host, self.port))
+            sock.settimeout(self.timeout)
+            self.connected = True
+            while not self._stop_event.is_set():
+                try:
+                    size = sock.recv_into(view)
+                    # A truncated datagram is rejected before its sequence number is
+                    # accepted, so it is counted as lost when the next batch arrives
+                    count = self._accept_header(view[:size])
+                except socket.timeout:
+                    continue
+                except OSError as e:
+                    print(f"Event stream {self.host}:{self.port} receive error: {e}")
+                    continue
+                except ValueError as e:
+                    print(f"Event stream datagram dropped: {e}")
+                    continue
+                self._store(view[HEADER.size:HEADER.size + count * EVENT_DTYPE.itemsize])
+            self.connected = False
+
+    def _accept_header(self, view):
+        """check a batch header against the bytes that may follow it, returns the event count"""
+        if len(view) < HEADER.size:
+            raise ValueError("event batch shorter than its header")
+        magic, seq, count, width, height = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("bad event batch header")
+        if HEADER.size + count * EVENT_DTYPE.itemsize > len(view):
+            raise ValueError(f"event batch of {count} events does not fit in {len(view)} bytes")
+        if self._next_seq is not None and seq > self._next_seq:
+            self.batches_lost += seq - self._next_seq
+        self._next_seq = seq + 1
+        self.sensor_size = (width, height)
+        return count
+
+    def _store(self, payload):
+        """copy a batch into the ring buffer and count it"""
+        events = np.frombuffer(payload, dtype=EVENT_DTYPE)
+        self.buffer.write(events)
+        self.events_received += len(events)
+        self.batches_received += 1
+        self._rate_count += len(events)
+        now = time.monotonic()
+        if now - self._rate_start >= 1.0:
+            self.rate = self._rate_count / (now - self._rate_start)
+            self._rate_start, self._rate_count = now, 0
+
+    def stop(self):
+        """Stop the receiving thread"""
+        self._stop_event.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2 * self.timeout)
+            self._thread = None
+
+class EventEmitter:
+    """Send events to EventReceivers, a TCP server or a UDP sender"""
+    def __init__(self, width, height, host="0.0.0.0", port=EVENT_PORT, protocol="tcp",
+                 batch_size=65536):
+        self.width = width
+        self.height = height
+        self.protocol = protocol
+        self.address = (host, port)  # listen address for TCP, destination for UDP
+        self.batch_size = batch_size if protocol == "tcp" else min(batch_size, UDP_BATCH)
+        self.events_sent = 0
+        self._seq = 0
+        self._client = None
+        if protocol == "tcp":
+            self._server = socket.create_server(self.address)
+            self._server.settimeout(0.5)
+        else:
+            self._server = None
+            self._client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    @property
+    def port(self):
+        """listening port, useful when port 0 picked a free one"""
+        return self._server.getsockname()[1] if self._server else self.address[1]
+
+    def _connected_client(self):
+        """the TCP client, accepting one if none is connected"""
+        if self._client is None:
+            try:
+                self._client, _ = self._server.accept()
+                self._client.settimeout(None)
+            except socket.timeout:
+                return None
+        return self._client
+
+    def send(self, events):
+        """Send events in batches, returns False if there is no TCP client to send to"""
+        for start in range(0, len(events), self.batch_size):
+            batch = np.ascontiguousarray(events[start:start + self.batch_size], dtype=EVENT_DTYPE)
+            header = pack_header(self._seq, len(batch), self.width, self.height)
+            self._seq += 1
+            if self.protocol == "udp":
+                self._client.sendto(header + batch.tobytes(), self.address)
+            else:
+                client = self._connected_client()
+                if client is None:
+                    return False
+                try:
+                    client.sendall(header)
+                    client.sendall(memoryview(batch).cast("B"))
+                except OSError:
+                    client.close()
+                    self._client = None
+                    return False
+            self.events_sent += len(batch)
+        return True
+
+    def close(self):
+        """Close the client connection and the server socket"""
+        for sock in (self._client, self._server):
+            if sock is not None:
+                sock.close()
+
+def synthetic_events(count, width, height, start_time, duration, rng):
+    """
+    count events over duration microseconds from start_time: the edges of a
+    disc circling the frame (ON at the front, OFF behind) and 10% noise
+    """
+    t = np.sort(rng.integers(start_time, start_time + duration, count, dtype=np.int64))
+    angle = t * 2e-6  # one turn in about 3 s
+    centre_x = width / 2 + width / 4 * np.cos(angle)
+    centre_y = height / 2 + height / 4 * np.sin(angle)
+    edge = rng.uniform(0, 2 * np.pi, count)
+    radius = min(width, height) / 8
+    x = centre_x + radius * np.cos(edge)
+    y = centre_y + radius * np.sin(edge)
+    # The disc moves along the tangent, its leading half brightens the pixels
+    polarity = np.cos(edge - angle - np.pi / 2) > 0
+    noise = rng.random(count) < 0.1
+    x[noise] = rng.uniform(0, width, noise.sum())
+    y[noise] = rng.uniform(0, height, noise.sum())
+    events = np.empty(count, dtype=EVENT_DTYPE)
+    events["t"] = t
+    events["x"] = np.clip(x, 0, width - 1)
+    events["y"] = np.clip(y, 0, height - 1)
+    events["p"] = polarity
+    return events
+
+def emit_synthetic(emitter, rate, seconds=None, chunk=0.01, seed=0):
+    """Send synthetic events at rate per second in real time until seconds have passed"""
+    rng = np.random.default_rng(seed)
+    start = time.monotonic()
+    sent_until = 0.0
+    while seconds is None or sent_until < seconds:
+        events = synthetic_events(int(rate * chunk), emitter.width, emitter.height,
+                                  int(sent_until * 1e6), int(chunk * 1e6), rng)
+        if not emitter.send(events):
+            # Nobody listening, restart the clock once someone connects
+            time.sleep(0.1)
+            start = time.monotonic() - sent_until
+            continue
+        sent_until += chunk
+        time.sleep(max(0.0, start + sent_until - time.monotonic()))
+
+def emit_camera(emitter, delta_t=10000):
+    """Send a Metavision camera's events at the camera's sensor size, run on the rig"""
+    from metavision_core.event_io import EventsIterator  # only installed on the rig
+    iterator = EventsIterator(input_path="", delta_t=delta_t)
+    emitter.height, emitter.width = iterator.get_size()  # Metavision gives (height, width)
+    for events in iterator:
+        packed = np.empty(len(events), dtype=EVENT_DTYPE)
+        for name in EVENT_DTYPE.names:
+            packed[name] = events[name]
+        emitter.send(packed)
+
+def main():
+    """Emit events from the rig's camera or a synthetic stand-in"""
+    parser = argparse.ArgumentParser(description="Send event camera batches")
+    parser.add_argument("--camera", action="store_true", help="Metavision camera on the rig")
+    parser.add_argument("--rate", type=float, default=1e6, help="synthetic events per second")
+    parser.add_argument("--size", type=int, nargs=2, default=(640, 480),
+                        help="synthetic sensor width and height, the camera reports its own")
+    parser.add_argument("--protocol", choices=("tcp", "udp"), default="tcp")
+    parser.add_argument("--host", default="0.0.0.0", help="listen address, or UDP destination")
+    parser.add_argument("--port", type=int, default=EVENT_PORT)
+    args = parser.parse_args()
+    emitter = EventEmitter(*args.size, host=args.host, port=args.port, protocol=args.protocol)
+    try:
+        if args.camera:
+            emit_camera(emitter)
+        else:
+            emit_synthetic(emitter, args.rate)
+    finally:
+        emitter.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Threaded LiDAR acquisition
+
+A background thread drains a Cepton SensorFramesListener (or anything with a
+get_points() method returning a list of frames with .positions) into a
+fixed-capacity ring buffer of recent frames. The renderer can take the newest
+frame or every frame within a time window for a denser cloud, and reports
+when it displayed them so latency and dropped frames can be counted.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+@dataclass
+class LidarFrame:
+    """a frame of points with its sequence number and receive time"""
+    positions: np.ndarray  # (n, 3) x, y, z in metres
+    seq: int
+    timestamp: float  # time.monotonic() when the frame was received
+    sensor_time: Optional[float] = None  # unix time of the last point, if the sensor is synced
+
+@dataclass
+class AcquisitionStats:
+    """counters of a LidarAcquisition"""
+    frames_received: int
+    dropped_frames: int  # frames that were never displayed
+    fps: float  # frames received per second
+    latency: float  # seconds from receive to display, moving average
+    sensor_latency: Optional[float]  # seconds from the sensor's point time to display
+
+def sensor_time(points):
+    """unix time of a frame's last point, None if its timestamps are not wall clock"""
+    timestamps = getattr(points, "timestamps", None)
+    if timestamps is None or not len(timestamps):
+        return None
+    seconds = float(timestamps[-1]) * 1e-6  # Cepton timestamps are microseconds
+    # Unsynced sensors count from power on, only trust times close to the host clock
+    return seconds if abs(time.time() - seconds) < 3600 else None
+
+class LidarAcquisition:
+    """Drain a LiDAR listener on its own thread into a ring buffer of recent frames"""
+    def __init__(self, listener, capacity=32, poll_interval=0.005, smoothing=0.1):
+        self.listener = listener
+        self.capacity = capacity  # frames kept, older ones are overwritten
+        self.poll_interval = poll_interval  # seconds to sleep when the listener had nothing
+        self.smoothing = smoothing  # weight of the newest latency sample
+        self.frames_received = 0
+        self.dropped_frames = 0
+        self.latency = 0.0
+        self.sensor_latency = None
+        self._frames = deque(maxlen=capacity)
+        self._next_seq = 0
+        self._displayed_seq = -1
+        self._accumulated = np.empty((0, 3), dtype=np.float32)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        """Start the acquisition thread, returns self for chaining"""
+        if self._thread is None:
+            self._stop_event.clear()
+            self._started = time.monotonic()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                points_list = self.listener.get_points()
+            except Exception as e:
+                print(f"Error fetching LiDAR data: {e}")
+                points_list = None
+            if not points_list:
+                time.sleep(self.poll_interval)
+                continue
+            for points in points_list:
+                self._publish(points)
+
+    def _publish(self, points):
+        """store a frame from the listener in the ring buffer"""
+        with self._lock:
+            self._frames.append(LidarFrame(positions=points.positions, seq=self._next_seq,
+                                           timestamp=time.monotonic(),
+                                           sensor_time=sensor_time(points)))
+            self._next_seq += 1
+            self.frames_received += 1
+
+    def latest(self, last_seq=-1) -> Optional[LidarFrame]:
+        """Newest frame if it is newer than last_seq, otherwise None (never blocks)"""
+        with self._lock:
+            if not self._frames or self._frames[-1].seq <= last_seq:
+                return None
+            return self._frames[-1]
+
+    def window(self, seconds, last_seq=-1):
+        """Frames received within the last seconds, oldest first, if any is newer than last_seq"""
+        with self._lock:
+            if not self._frames or self._frames[-1].seq <= last_seq:
+                return []
+            newest = self._frames[-1].timestamp
+            return [frame for frame in self._frames if newest - frame.timestamp <= seconds]
+
+    def accumulate(self, frames):
+        """Positions of several frames in one (n, 3) array, reusing the same buffer"""
+        if len(frames) == 1:
+            return frames[0].positions
+        total = sum(len(frame.positions) for frame in frames)
+        if len(self._accumulated) < total:
+            self._accumulated = np.empty((total, 3), dtype=np.float32)
+        merged = self._accumulated[:total]
+        np.concatenate([frame.positions for frame in frames], out=merged, casting="unsafe")
+        return merged
+
+    def mark_displayed(self, frames):
+        """
+        Tell the acquisition which frames were just put on screen, updating the
+        latency averages and counting skipped frames as dropped
+        """
+        if not frames:
+            return
+        now, wall = time.monotonic(), time.time()
+        newest = frames[-1]
+        with self._lock:
+            shown = sum(frame.seq > self._displayed_seq for frame in frames)
+            self.dropped_frames += max(0, newest.seq - self._displayed_seq - shown)
+            self._displayed_seq = max(self._displayed_seq, newest.seq)
+            self.latency += self.smoothing * ((now - newest.timestamp) - self.latency)
+            if newest.sensor_time is not None:
+                sample = wall - newest.sensor_time
+                self.sensor_latency = sample if self.sensor_latency is None else \
+                    self.sensor_latency + self.smoothing * (sample - self.sensor_latency)
+
+    def stats(self) -> AcquisitionStats:
+        """Snapshot of the counters"""
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        with self._lock:
+            return AcquisitionStats(frames_received=self.frames_received,
+                                    dropped_frames=self.dropped_frames,
+                                    fps=self.frames_received / elapsed if elapsed else 0.0,
+                                    latency=self.latency, sensor_latency=self.sensor_latency)
+
+    def stop(self, timeout=1.0):
+        """Stop the acquisition thread, False if it is still running after timeout seconds"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                return False  # e.g. blocked in the listener, it exits once that returns
+            self._thread = None
+        return True
@@ -0,0 +1,198 @@
+"""
+LiDAR recording and replay
+
+A recording is a directory of append-only column files, one raw numpy array
+per point attribute, plus a frame index:
+    positions.f32    (n, 3) float32 x, y, z in metres
+    intensities.f32  (n,) float32
+    timestamps.i64   (n,) int64 sensor microseconds
+    frames.i64       (frames, 3) int64 first point, point count, receive time
+                     in microseconds since the recording started
+    meta.json        format version and sensor serial number
+Points are appended before their index row, so a recording cut short (e.g. the
+app was killed) still reads back every complete frame. Reading memory-maps the
+columns, frames are views into the files and nothing is loaded up front.
+
+LidarReplay plays a recording back through the same get_points() interface as
+cepton_sdk.SensorFramesListener, at the original timing or as fast as possible,
+so LidarCameraPage and the benchmarks can run without a sensor.
+"""
+import json
+import os
+import time
+from dataclasses import dataclass
+import numpy as np
+
+FORMAT_VERSION = 1
+COLUMNS = {  # file name -> (dtype, values per point)
+    "positions.f32": (np.float32, 3),
+    "intensities.f32": (np.float32, 1),
+    "timestamps.i64": (np.int64, 1),
+}
+FRAME_INDEX = "frames.i64"
+META = "meta.json"
+
+@dataclass
+class RecordedPoints:
+    """a recorded frame, with the attributes LidarAcquisition reads from Cepton points"""
+    positions: np.ndarray
+    intensities: np.ndarray
+    timestamps: np.ndarray
+
+    @property
+    def num_points(self):
+        """points in the frame"""
+        return len(self.positions)
+
+class LidarRecorder:
+    """Append Cepton frames to a recording directory"""
+    def __init__(self, path, serial_number=None):
+        self.path = path
+        self.frames_written = 0
+        self.points_written = 0
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, FRAME_INDEX)):
+            raise FileExistsError(f"LiDAR recording already exists: {path}")
+        with open(os.path.join(path, META), "w", encoding="utf-8") as file:
+            json.dump({"version": FORMAT_VERSION, "serial_number": serial_number}, file)
+        self._files = {name: open(os.path.join(path, name), "ab") for name in COLUMNS}
+        self._index = open(os.path.join(path, FRAME_INDEX), "ab")
+        self._started = time.monotonic()
+
+    def write(self, points, receive_time=None):
+        """Append a frame of points, receive_time is time.monotonic() (defaults to now)"""
+        num_points = len(points.positions)
+        receive_time = time.monotonic() if receive_time is None else receive_time
+        for name, (dtype, width) in COLUMNS.items():
+            attribute = name.split(".")[0]
+            values = getattr(points, attribute, None)
+            if values is None:  # e.g. a source without intensities
+                values = np.zeros((num_points, width) if width > 1 else num_points, dtype=dtype)
+            self._files[name].write(np.ascontiguousarray(values, dtype=dtype).data)
+        # Index row last, readers never see a frame whose points are not written yet
+        for file in self._files.values():
+            file.flush()
+        row = np.array([self.points_written, num_points,
+                        round((receive_time - self._started) * 1e6)], dtype=np.int64)
+        self._index.write(row.data)
+        self._index.flush()
+        self.frames_written += 1
+        self.points_written += num_points
+
+    def close(self):
+        """Close the column files"""
+        for file in (*self._files.values(), self._index):
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class RecordingListener:
+    """Wrap a frames listener so every frame it returns is also recorded"""
+    def __init__(self, listener, recorder):
+        self.listener = listener
+        self.recorder = recorder
+
+    def get_points(self):
+        """frames of the wrapped listener, written to the recorder before they are returned"""
+        points_list = self.listener.get_points()
+        for points in points_list or ():
+            self.recorder.write(points)
+        return points_list
+
+class LidarRecording:
+    """Read a recording, frames are memory-mapped views"""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META), encoding="utf-8") as file:
+            self.meta = json.load(file)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported LiDAR recording version: {self.meta.get('version')}")
+        self.columns = {name: self._map(name, dtype, width)
+                        for name, (dtype, width) in COLUMNS.items()}
+        frames = self._map(FRAME_INDEX, np.int64, 3)
+        # Drop frames whose points were cut off by a crash while writing
+        total = min(len(column) for column in self.columns.values())
+        self.frames = frames[frames[:, 0] + frames[:, 1] <= total]
+
+    def _map(self, name, dtype, width):
+        """memory-map a column file, empty files cannot be mapped"""
+        filename = os.path.join(self.path, name)
+        itemsize = np.dtype(dtype).itemsize * width
+        rows = os.path.getsize(filename) // itemsize
+        if rows == 0:
+            return np.empty((0, width) if width > 1 else 0, dtype=dtype)
+        shape = (rows, width) if width > 1 else (rows,)
+        return np.memmap(filename, dtype=dtype, mode="r", shape=shape)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def receive_times(self):
+        """seconds from the start of the recording at which each frame arrived"""
+        return self.frames[:, 2] * 1e-6
+
+    @property
+    def duration(self):
+        """seconds from the first frame to the last"""
+        return float(self.frames[-1, 2] - self.frames[0, 2]) * 1e-6 if len(self) else 0.0
+
+    def frame(self, index):
+        """RecordedPoints of a frame, views into the mapped files"""
+        first, count = int(self.frames[index, 0]), int(self.frames[index, 1])
+        points = slice(first, first + count)
+        return RecordedPoints(positions=self.columns["positions.f32"][points],
+                              intensities=self.columns["intensities.f32"][points],
+                              timestamps=self.columns["timestamps.i64"][points])
+
+class LidarReplay:
+    """
+    Play a recording through get_points() like a SensorFramesListener.
+    speed scales the original timing (2.0 = twice as fast), None returns one
+    frame per call as fast as the caller asks.
+    """
+    def __init__(self, path, speed=1.0, loop=False):
+        self.recording = LidarRecording(path)
+        self.speed = speed
+        self.loop = loop  # start again after the last frame
+        self.frames_played = 0
+        self._next = 0
+        self._start = None
+        self._times = self.recording.receive_times
+        if len(self._times):
+            self._times = self._times - self._times[0]
+
+    @property
+    def finished(self):
+        """whether every frame has been played, never while looping"""
+        return not self.loop and self._next >= len(self.recording)
+
+    def reset(self):
+        """Play again from the first frame"""
+        self._next = 0
+        self._start = None
+
+    def get_points(self):
+        """Frames due since the last call, oldest first"""
+        if not len(self.recording):
+            return []
+        if self._next >= len(self.recording):
+            if not self.loop:
+                return []
+            self.reset()
+        if not self.speed:
+            end = self._next + 1
+        else:
+            now = time.monotonic()
+            if self._start is None:
+                self._start = now
+            elapsed = (now - self._start) * self.speed
+            end = int(np.searchsorted(self._times, elapsed, side="right"))
+        frames = [self.recording.frame(index) for index in range(self._next, end)]
+        self.frames_played += len(frames)
+        self._next = max(self._next, end)
+        return frames
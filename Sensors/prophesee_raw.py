@@ -0,0 +1,343 @@
+"""
+Prophesee RAW recordings (EVT 2.0 and EVT 3.0)
+
+A RAW file is an ASCII header of "% key value" lines followed by packed words:
+    EVT2  32 bit words, type in bits 31-28
+          CD_OFF 0x0 / CD_ON 0x1  time low 27-22, x 21-11, y 10-0
+          TIME_HIGH 0x8           time bits 33-6 in 27-0
+    EVT3  16 bit words, type in bits 15-12
+          ADDR_Y 0x0              y 10-0
+          ADDR_X 0x2              one event at x 10-0, polarity 11
+          VECT_BASE_X 0x3         x 10-0 and polarity 11 of the vectors after it
+          VECT_12 0x4 / VECT_8 0x5  events at base x + each set bit of 11-0 / 7-0,
+                                  then base x moves on by 12 / 8
+          TIME_LOW 0x6            time bits 11-0
+          TIME_HIGH 0x8           time bits 23-12, wrapping every 16.7 s
+Other word types (triggers, continued words) are skipped.
+
+The words are memory-mapped and decoded a chunk at a time with numpy: the
+state words (time, y, base x) of a chunk are found with flatnonzero and each
+event word picks up the latest one before it with searchsorted, vector masks
+are expanded with unpackbits. No Python loop runs per event or per word. The
+decoder state at a chunk boundary is a DecodeState, carried into the next
+chunk. The timestamp index is the state at the start of every chunk, found
+without decoding any events, so seeking decodes at most one chunk too many.
+
+RawPlayer plays a recording into an EventRingBuffer with the same interface
+as EventReceiver, so EventCameraPage runs on a recording instead of the rig:
+    python -m App.pages.event_page --replay recording.raw [--speed 2]
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+import numpy as np
+from Sensors.event_stream import EVENT_DTYPE, EventRingBuffer
+
+@dataclass
+class DecodeState:
+    """what the decoder knows at a word boundary, -1 until its first word is seen"""
+    time_high: int = -1  # EVT3: counting wraps, so timestamps keep rising
+    time_low: int = -1
+    y: int = -1
+    base_x: int = -1  # including the vectors since VECT_BASE_X
+    polarity: int = 0
+
+    def time(self, shift):
+        """timestamp an event here would get (shift = bits of time low), -1 before any time"""
+        if self.time_high < 0:
+            return -1
+        return (self.time_high << shift) | max(self.time_low, 0)
+
+def read_header(path):
+    """({key: value} of the "% key value" header lines, byte offset of the first word)"""
+    header = {}
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.startswith(b"%"):
+                break
+            offset += len(line)
+            text = line[1:].decode("ascii", "replace").strip()
+            if text == "end":
+                break
+            key, _, value = text.partition(" ")
+            header[key] = value.strip()
+    return header, offset
+
+def header_format(header):
+    """("EVT2" or "EVT3", width, height) from a RAW header"""
+    fields = header.get("format", "").split(";")
+    options = dict(field.split("=", 1) for field in fields[1:] if "=" in field)
+    name = fields[0].upper() if fields[0] else "EVT" + header.get("evt", "2.0").split(".")[0]
+    if name not in DECODERS:
+        raise ValueError(f"Unsupported event format: {name}, only EVT2 and EVT3")
+    if "width" in options:
+        width, height = int(options["width"]), int(options["height"])
+    elif "geometry" in header:
+        width, height = (int(v) for v in header["geometry"].split("x"))
+    else:
+        width, height = 1280, 720  # Gen4 / IMX636 sensors
+    return name, width, height
+
+# Set bits of every 12 bit vector mask
+POPCOUNT = np.array([bin(mask).count("1") for mask in range(4096)], dtype=np.int64)
+
+def fill_forward(marks, values, initial, positions):
+    """value of the latest marked word before each position, initial before the first mark"""
+    return np.concatenate(([initial], values))[np.cumsum(marks, dtype=np.int32)[positions]]
+
+def decode_evt2(words, state, events=True):
+    """(events of a chunk of EVT2 words, state after it), events None if not wanted"""
+    types = words >> 28
+    marks = types == 8
+    highs = (words[np.flatnonzero(marks)] & 0x0FFFFFFF).astype(np.int64)
+    end = replace(state, time_high=int(highs[-1])) if len(highs) else state
+    if not events:
+        return None, end
+    cd = np.flatnonzero(types <= 1)
+    high = fill_forward(marks, highs, state.time_high, cd)
+    # Events before the first TIME_HIGH have no timestamp
+    start = int(np.searchsorted(high, 0)) if len(high) and high[0] < 0 else 0
+    cd, high = cd[start:], high[start:]
+    cd_words = words[cd]
+    packed = np.empty(len(cd), dtype=EVENT_DTYPE)
+    packed["t"] = (high << 6) | ((cd_words >> 22) & 0x3F)
+    packed["x"] = (cd_words >> 11) & 0x7FF
+    packed["y"] = cd_words & 0x7FF
+    packed["p"] = types[cd]
+    return packed, end
+
+def evt3_time_highs(values, previous):
+    """full EVT3 time highs of TIME_HIGH word values, counting wraps since previous"""
+    highs = values.astype(np.int64)
+    if not len(highs):
+        return highs
+    before = np.concatenate(([previous & 0xFFF if previous >= 0 else highs[0]], highs[:-1]))
+    wraps = np.cumsum(highs < before)
+    return highs + ((max(previous, 0) >> 12) + wraps) * 4096
+
+def decode_evt3(words, state, events=True):
+    """(events of a chunk of EVT3 words, state after it), events None if not wanted"""
+    types = words >> 12
+    values = words & 0xFFF
+    is_high, is_low, is_y, is_base = types == 8, types == 6, types == 0, types == 3
+    base_marks = np.flatnonzero(is_base)
+    highs = evt3_time_highs(values[np.flatnonzero(is_high)], state.time_high)
+    lows = values[np.flatnonzero(is_low)]
+    ys = values[np.flatnonzero(is_y)] & 0x7FF
+    bases = np.concatenate(([state.base_x], values[base_marks] & 0x7FF))
+    polarities = np.concatenate(([state.polarity], values[base_marks] >> 11))
+    # Event words are ADDR_X (2), VECT_12 (4) and VECT_8 (5)
+    event_words = np.flatnonzero((types == 2) | (types == 4) | (types == 5))
+    kinds = types[event_words]
+    # Base x moves on by 12 or 8 after each vector, counted from the latest VECT_BASE_X
+    steps = np.where(kinds == 4, 12, np.where(kinds == 5, 8, 0))
+    moved = np.concatenate(([0], np.cumsum(steps)))  # before each event word, and after all
+    moved_at_base = np.concatenate(([0], moved[np.searchsorted(event_words, base_marks)]))
+    last_base = bases[-1] + moved[-1] - moved_at_base[-1] if bases[-1] >= 0 else -1
+    end = DecodeState(time_high=int(highs[-1]) if len(highs) else state.time_high,
+                      time_low=int(lows[-1]) if len(lows) else state.time_low,
+                      y=int(ys[-1]) if len(ys) else state.y,
+                      base_x=int(last_base), polarity=int(polarities[-1]))
+    if not events:
+        return None, end
+
+    high = fill_forward(is_high, highs, state.time_high, event_words)
+    low = fill_forward(is_low, lows, state.time_low, event_words)
+    y = fill_forward(is_y, ys, state.y, event_words)
+    base_index = np.cumsum(is_base, dtype=np.int32)[event_words]
+    word_base = bases[base_index]
+    single = kinds == 2
+    word_values = values[event_words]
+    base = np.where(single, word_values & 0x7FF, word_base + moved[:-1] - moved_at_base[base_index])
+    polarity = np.where(single, word_values >> 11, polarities[base_index])
+    # Event bits of each word: ADDR_X is a vector of one, VECT_8 only has 8 valid bits
+    masks = np.where(single, 1, word_values & np.where(kinds == 5, 0xFF, 0xFFF))
+    if min(state.time_high, state.time_low, state.y, state.base_x) < 0:
+        # Words before the first of each state word can't be decoded
+        known = (high >= 0) & (low >= 0) & (y >= 0) & (single | (word_base >= 0))
+        masks[~known] = 0
+    counts = POPCOUNT[masks]
+
+    packed = np.empty(int(counts.sum()), dtype=EVENT_DTYPE)
+    packed["t"] = np.repeat((high << 12) | low, counts)
+    packed["y"] = np.repeat(y, counts)
+    packed["p"] = np.repeat(polarity, counts)
+    x = np.repeat(base, counts)
+    # Only vectors need their bits expanded into x offsets
+    vectors = np.flatnonzero(~single & (counts > 0))
+    if len(vectors):
+        bits = np.unpackbits(masks[vectors].astype("<u2").view(np.uint8).reshape(-1, 2),
+                             axis=1, bitorder="little")
+        rows, offsets = np.nonzero(bits)
+        first = np.cumsum(counts) - counts  # first event of each event word
+        vector_first = np.cumsum(counts[vectors]) - counts[vectors]
+        x[(first[vectors] - vector_first)[rows] + np.arange(len(rows))] += offsets
+    packed["x"] = x
+    return packed, end
+
+DECODERS = {  # format -> (word dtype, decoder, bits of time below TIME_HIGH)
+    "EVT2": (np.dtype("<u4"), decode_evt2, 6),
+    "EVT3": (np.dtype("<u2"), decode_evt3, 12),
+}
+
+class RawRecording:
+    """A memory-mapped Prophesee RAW file, decoded a chunk at a time"""
+    def __init__(self, path, chunk_words=1 << 20):
+        self.path = path
+        self.header, offset = read_header(path)
+        self.format, self.width, self.height = header_format(self.header)
+        dtype, self._decode, self._time_shift = DECODERS[self.format]
+        count = (os.path.getsize(path) - offset) // dtype.itemsize
+        self.words = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,)) \
+            if count else np.empty(0, dtype=dtype)
+        self.chunk_words = chunk_words
+        self._starts = None  # chunk -> DecodeState at its first word
+        self._times = None  # chunk -> timestamp at its first word
+
+    def __len__(self):
+        """number of chunks"""
+        return -(-len(self.words) // self.chunk_words)
+
+    def decode(self, chunk, state):
+        """(events of a chunk, state after it)"""
+        start = chunk * self.chunk_words
+        return self._decode(self.words[start:start + self.chunk_words], state)
+
+    def chunks(self, first=0, state=None):
+        """Events of every chunk from first, decoding from state (the index's by default)"""
+        if state is None:
+            state = self.index()[0][first] if first else DecodeState()
+        for chunk in range(first, len(self)):
+            events, state = self.decode(chunk, state)
+            yield events
+
+    def index(self):
+        """(DecodeState, timestamp) at the start of each chunk, built on first use"""
+        if self._starts is None:
+            state = DecodeState()
+            starts, times = [], []
+            for chunk in range(len(self)):
+                starts.append(state)
+                times.append(state.time(self._time_shift))
+                start = chunk * self.chunk_words
+                _, state = self._decode(self.words[start:start + self.chunk_words], state,
+                                        events=False)
+            self._starts, self._times = starts, np.array(times, dtype=np.int64)
+        return self._starts, self._times
+
+    def seek(self, time):
+        """Events from time on, a chunk at a time"""
+        starts, times = self.index()
+        # Events at time can only start in the last chunk that begins before it
+        first = max(0, int(np.searchsorted(times, time)) - 1)
+        for events in self.chunks(first, starts[first] if len(starts) else None):
+            if len(events) and events["t"][0] < time:
+                events = events[int(np.searchsorted(events["t"], time)):]
+            if len(events):
+                yield events
+
+    def read(self, start=0, stop=None):
+        """events with start <= t < stop as one array"""
+        parts = []
+        for events in self.seek(start):
+            if stop is not None and events["t"][-1] >= stop:
+                parts.append(events[:int(np.searchsorted(events["t"], stop))])
+                break
+            parts.append(events)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=EVENT_DTYPE)
+
+    @property
+    def duration(self):
+        """microseconds from the first to the last event"""
+        starts, _ = self.index()
+        first = next((events["t"][0] for events in self.chunks() if len(events)), None)
+        for chunk in range(len(self) - 1, -1, -1):
+            events, _ = self.decode(chunk, starts[chunk])
+            if len(events):
+                return int(events["t"][-1] - first)
+        return 0
+
+class RawPlayer:
+    """
+    Play a RawRecording into an EventRingBuffer on a background thread, with
+    EventReceiver's interface. speed scales the recording's timing (2.0 = twice
+    as fast), None plays as fast as it decodes.
+    """
+    def __init__(self, path, speed=1.0, loop=False, start_time=0, buffer=None,
+                 slice_time=10_000):
+        self.recording = RawRecording(path)
+        self.speed = speed
+        self.loop = loop  # start again after the last event, timestamps keep rising
+        self.start_time = start_time  # recording microseconds to start from
+        self.slice_time = slice_time  # recording microseconds written to the buffer at once
+        self.buffer = buffer if buffer is not None else EventRingBuffer()
+        self.sensor_size = (self.recording.width, self.recording.height)
+        self.connected = False
+        self.finished = False
+        self.events_received = 0
+        self.batches_lost = 0  # nothing is lost from a file, for EventReceiver's interface
+        self.rate = 0.0  # events per second of wall time, over the last second
+        self._rate_start, self._rate_count = time.monotonic(), 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the playing thread, returns self for chaining"""
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        self.connected = True
+        offset = 0  # added to the timestamps of each loop
+        while not self._stop_event.is_set():
+            clock_start, first = time.monotonic(), None
+            last = None
+            for events in self.recording.seek(self.start_time):
+                first = events["t"][0] if first is None else first
+                for piece in self._slices(events):
+                    if self.speed:
+                        due = clock_start + (piece["t"][-1] - first) / 1e6 / self.speed
+                        if self._stop_event.wait(max(0.0, due - time.monotonic())):
+                            return
+                    elif self._stop_event.is_set():
+                        return
+                    if offset:
+                        piece = piece.copy()
+                        piece["t"] += offset
+                    self._write(piece)
+                last = events["t"][-1]
+            if not self.loop or last is None:
+                break
+            offset += int(last - first) + 1
+        self.finished = True
+        self.connected = False
+
+    def _slices(self, events):
+        """events split into slice_time pieces"""
+        t = events["t"]
+        bounds = np.arange(t[0] + self.slice_time, t[-1] + 1, self.slice_time)
+        cuts = np.searchsorted(t, bounds)
+        return (piece for piece in np.split(events, cuts) if len(piece))
+
+    def _write(self, events):
+        """copy events into the ring buffer and count them"""
+        self.buffer.write(events)
+        self.events_received += len(events)
+        self._rate_count += len(events)
+        now = time.monotonic()
+        if now - self._rate_start >= 1.0:
+            self.rate = self._rate_count / (now - self._rate_start)
+            self._rate_start, self._rate_count = now, 0
+
+    def stop(self):
+        """Stop the playing thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.connected = False
@@ -0,0 +1,196 @@
+"""
+Low-latency RTSP ingest
+
+RtspSource is a LatestFrameSource for network cameras. Its thread connects,
+decodes and keeps only the newest frame, so latency cannot build up when the
+UI is slower than the camera. FFmpeg is opened with low-latency options
+(chosen transport, no input buffering, open/read timeouts) and a dropped stream
+is reconnected with exponential backoff instead of failing forever.
+
+Any source OpenCV can open works, so a video file or a local RTSP server can
+stand in for the camera (realtime=True paces a file at its own frame rate).
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+import cv2
+from Sensors.capture import Frame, LatestFrameSource, display_url
+
+FFMPEG_OPTIONS_ENV = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+_env_lock = threading.Lock()  # the options are read from the environment while opening
+
+def ffmpeg_capture_options(transport="tcp", low_latency=True, timeout=5.0):
+    """OPENCV_FFMPEG_CAPTURE_OPTIONS string, key;value pairs separated by |"""
+    options = {"rtsp_transport": transport}
+    if low_latency:
+        options.update({"fflags": "nobuffer", "flags": "low_delay", "max_delay": "0",
+                        "reorder_queue_size": "0"})
+    if timeout:
+        # Socket timeout in microseconds, FFmpeg 5 renamed stimeout to timeout
+        options["timeout"] = str(int(timeout * 1e6))
+    return "|".join(f"{key};{value}" for key, value in options.items())
+
+@dataclass
+class StreamFrame(Frame):
+    """frame with its stream position, for measuring how far behind the stream the display is"""
+    pts: Optional[float] = None  # seconds into the stream
+
+@dataclass
+class IngestStats:
+    """counters of an RtspSource"""
+    state: str  # connecting, streaming, waiting (to reconnect) or stopped
+    fps: float  # frames decoded per second, moving average
+    decode_time: float  # CPU seconds per frame spent in cap.read(), moving average
+    frame_age: Optional[float]  # seconds from decode to display of the last shown frame
+    stream_delay: Optional[float]  # seconds the display lags the stream since it connected
+    reconnects: int
+    dropped_frames: int  # decoded frames replaced before anyone read them
+    retry_in: float  # seconds until the next connection attempt while waiting
+
+class RtspSource(LatestFrameSource):
+    """
+    Network camera read on its own thread with automatic reconnect.
+    Unlike LatestFrameSource, start() returns at once and the stream is opened
+    on the capture thread, so an unreachable camera never blocks the UI.
+    """
+    def __init__(self, url, transport="tcp", low_latency=True, open_timeout=5.0,
+                 read_timeout=5.0, backoff=(0.5, 30.0), max_failed_reads=10,
+                 realtime=False, smoothing=0.1):
+        super().__init__(url, api_preference=cv2.CAP_FFMPEG, buffer_size=1)
+        self.transport = transport  # "tcp" survives packet loss, "udp" has less delay
+        self.low_latency = low_latency
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.backoff = backoff  # first and longest wait between connection attempts
+        self.max_failed_reads = max_failed_reads  # consecutive failures before reconnecting
+        self.realtime = realtime  # pace reads at the stream's timestamps, for file stand-ins
+        self.smoothing = smoothing  # weight of the newest sample in the moving averages
+        self.state = "stopped"
+        self.reconnects = 0
+        self.fps = 0.0
+        self.decode_time = 0.0
+        self.frame_age = None
+        self.stream_delay = None
+        self._retry_at = 0.0
+        self._stream_start = None  # (monotonic, pts) of the first frame since connecting
+
+    def start(self):
+        """Start the capture thread, it connects in the background, returns self"""
+        if self._thread is None:
+            self._stop_event.clear()
+            self.state = "connecting"
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _open(self):
+        """open the stream with the FFmpeg options and timeouts"""
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(self.open_timeout * 1000),
+                  cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(self.read_timeout * 1000)]
+        with _env_lock:
+            previous = os.environ.get(FFMPEG_OPTIONS_ENV)
+            os.environ[FFMPEG_OPTIONS_ENV] = ffmpeg_capture_options(
+                self.transport, self.low_latency, self.read_timeout)
+            try:
+                cap = cv2.VideoCapture(self.source, self.api_preference, params)
+            finally:
+                if previous is None:
+                    del os.environ[FFMPEG_OPTIONS_ENV]
+                else:
+                    os.environ[FFMPEG_OPTIONS_ENV] = previous
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        return cap
+
+    def _run(self):
+        delay = self.backoff[0]
+        try:
+            while not self._stop_event.is_set():
+                if not self.is_opened():
+                    self.state = "connecting"
+                    # Only the first failure of an outage is printed
+                    if self._connect(report=delay == self.backoff[0]):
+                        delay = self.backoff[0]
+                    else:
+                        # Wait, then try again with twice the delay
+                        self.state = "waiting"
+                        self._retry_at = time.monotonic() + delay
+                        self._stop_event.wait(delay)
+                        delay = min(delay * 2, self.backoff[1])
+                    continue
+                self._read_frame()
+        finally:
+            self._close()
+            self.state = "stopped"
+
+    def _connect(self, report=True):
+        """open the stream, True if it is streaming, report prints a failure"""
+        cap = self._open()
+        if not cap.isOpened():
+            cap.release()
+            if report:
+                print(f"Error: Could not open stream {display_url(self.source)}, retrying")
+            return False
+        self.cap = cap
+        self.failed_reads = 0
+        self._stream_start = None
+        self.state = "streaming"
+        return True
+
+    def _read_frame(self):
+        """read one frame, reconnecting after max_failed_reads failures in a row"""
+        cpu_started = time.thread_time()
+        ret, image = self.cap.read()
+        if not ret:
+            self.failed_reads += 1
+            if self.failed_reads >= self.max_failed_reads:
+                print(f"Stream {display_url(self.source)} lost, reconnecting")
+                self._close()
+                self.reconnects += 1
+            else:
+                time.sleep(0.01)
+            return
+        self.failed_reads = 0
+        now = time.monotonic()
+        pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if self._stream_start is None:
+            self._stream_start = (now, pts)
+        elif self.realtime:
+            # A file decodes faster than real time, hold each frame until its time
+            due = self._stream_start[0] + pts - self._stream_start[1]
+            self._stop_event.wait(max(0.0, due - now))
+            now = time.monotonic()
+        self.decode_time += self.smoothing * (time.thread_time() - cpu_started - self.decode_time)
+        if self._latest is not None and now > self._latest.timestamp:
+            rate = 1.0 / (now - self._latest.timestamp)
+            self.fps = rate if self.fps == 0.0 else self.fps + self.smoothing * (rate - self.fps)
+        self._publish(image, now, pts)
+
+    def _publish(self, image, timestamp=None, pts=None):
+        """store a new frame in the latest-frame slot"""
+        with self._condition:
+            if self._latest is not None and self._latest.seq > self._read_seq:
+                self.dropped_frames += 1
+            self._latest = StreamFrame(image=image, seq=self._next_seq,
+                                       timestamp=time.monotonic() if timestamp is None
+                                       else timestamp, pts=pts)
+            self._next_seq += 1
+            self._condition.notify_all()
+
+    def mark_displayed(self, frame: StreamFrame):
+        """Tell the source a frame was put on screen, to measure its age and the stream delay"""
+        now = time.monotonic()
+        self.frame_age = now - frame.timestamp
+        if self._stream_start is not None and frame.pts is not None:
+            # Wall time since the first frame minus stream time: grows if frames queue up
+            start_time, start_pts = self._stream_start
+            self.stream_delay = (now - start_time) - (frame.pts - start_pts)
+
+    def stats(self) -> IngestStats:
+        """Snapshot of the counters"""
+        return IngestStats(state=self.state, fps=self.fps, decode_time=self.decode_time,
+                           frame_age=self.frame_age, stream_delay=self.stream_delay,
+                           reconnects=self.reconnects, dropped_frames=self.dropped_frames,
+                           retry_in=max(0.0, self._retry_at - time.monotonic())
+                           if self.state == "waiting" else 0.0)
@@ -0,0 +1,208 @@
+"""
+One scheduler for several sensor streams
+
+Every stream is prepared on its own ingest thread at its own target rate: the
+thread waits for its next tick, polls the newest data of its source and
+turns it into a display frame (false colour, a point cloud image, an event
+frame...). Frames are handed to the UI through a triple buffer, so the ingest
+thread never writes into the frame being shown or the one waiting to be, and
+only the newest frame is kept. The UI refreshes every pane on one timer with
+take(), which only returns streams with a new frame since the last refresh.
+
+A tick that finds the previous frame still being prepared is skipped rather
+than queued, so a slow stream falls behind its own rate without bursting to
+catch up and stealing time from the others. Each ingest thread's CPU time is
+read with time.thread_time, giving every stream's share of a core next to its
+achieved rate. Threads of the sources themselves (capture, decode, receive)
+only show in the process total.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+@dataclass
+class StreamStats:
+    """rates and CPU use of a stream over the last stats interval"""
+    name: str
+    target_fps: float
+    fps: float  # frames prepared per second
+    shown_fps: float  # frames taken by the UI per second
+    cpu: float  # share of one core used by the ingest thread
+    prepare_time: float  # seconds per prepared frame, moving average
+    skipped: int  # ticks skipped because the previous frame overran
+    status: str  # source state, empty while streaming
+
+class Stream(ABC):
+    """
+    A source prepared for display on its own thread. Subclasses implement
+    poll() and prepare(), and override open()/close() if the source has to be
+    started and stopped. All of them run on the stream's ingest thread.
+    """
+    def __init__(self, name, target_fps, smoothing=0.1):
+        self.name = name
+        self.target_fps = target_fps
+        self.smoothing = smoothing  # weight of the newest prepare time
+        self.error = None  # why open() failed, the stream is not prepared then
+        self.frames = 0  # frames prepared
+        self.shown = 0  # frames taken by the UI
+        self.skipped = 0
+        self.prepare_time = 0.0  # seconds per prepared frame, waiting in poll() not included
+        self.cpu_time = 0.0  # CPU seconds of the ingest thread
+        self._buffers = [None, None, None]
+        self._ready = None  # buffer index of the newest frame, None once taken
+        self._shown_index = None  # buffer index the UI is showing
+        self._lock = threading.Lock()
+
+    def open(self):
+        """start the source, called on the ingest thread"""
+
+    @abstractmethod
+    def poll(self, timeout):
+        """newest data of the source, None if nothing new arrived within timeout seconds"""
+
+    @abstractmethod
+    def prepare(self, data) -> Optional[np.ndarray]:
+        """display frame of the data poll() returned"""
+
+    def close(self):
+        """stop the source, called on the ingest thread"""
+
+    def status(self):
+        """short source state for the UI, empty while streaming"""
+        return self.error or ""
+
+    def publish(self, image):
+        """copy a frame into a buffer neither shown nor waiting, and make it the newest"""
+        with self._lock:
+            index = next(i for i in range(3) if i not in (self._ready, self._shown_index))
+        buffer = self._buffers[index]
+        if buffer is None or buffer.shape != image.shape:
+            buffer = self._buffers[index] = np.empty(image.shape, dtype=np.uint8)
+        np.copyto(buffer, image)
+        with self._lock:
+            self._ready = index
+            self.frames += 1
+
+    def take(self) -> Optional[np.ndarray]:
+        """newest frame if one arrived since the last take, it stays untouched until the next"""
+        with self._lock:
+            if self._ready is None:
+                return None
+            self._shown_index, self._ready = self._ready, None
+            self.shown += 1
+            return self._buffers[self._shown_index]
+
+class StreamScheduler:
+    """Run streams on their own ingest threads, each paced at its target rate"""
+    def __init__(self, streams=(), stats_interval=1.0):
+        self.streams = {}
+        self.stats_interval = stats_interval  # seconds the rates and CPU shares are measured over
+        self._stats = {}
+        self._marks = {}  # name -> (wall, cpu, frames, shown) at the start of the interval
+        self._process_mark = None
+        self.process_cpu = 0.0  # share of one core used by the whole process
+        self._threads = []
+        self._stop_event = threading.Event()
+        for stream in streams:
+            self.add(stream)
+
+    def add(self, stream):
+        """Add a stream, before start()"""
+        self.streams[stream.name] = stream
+        return stream
+
+    def start(self):
+        """Start an ingest thread per stream, returns self for chaining"""
+        if self._threads:
+            return self
+        self._stop_event.clear()
+        now = time.monotonic()
+        self._process_mark = (now, time.process_time())
+        for stream in self.streams.values():
+            self._marks[stream.name] = (now, 0.0, 0, 0)
+            thread = threading.Thread(target=self._run, args=(stream,), daemon=True,
+                                      name=f"ingest-{stream.name}")
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _run(self, stream):
+        """open the stream, then prepare a frame every tick until stopped"""
+        try:
+            stream.open()
+        except Exception as e:
+            stream.error = str(e)
+            print(f"Could not open {stream.name} stream: {e}")
+            return
+        period = 1.0 / stream.target_fps
+        next_tick = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                if now < next_tick:
+                    self._stop_event.wait(next_tick - now)
+                    continue
+                if now - next_tick >= period:
+                    # Overran: drop the missed ticks instead of running them back to back
+                    missed = int((now - next_tick) / period)
+                    stream.skipped += missed
+                    next_tick += missed * period
+                next_tick += period
+                self._step(stream, period)
+        finally:
+            stream.close()
+
+    def _step(self, stream, timeout):
+        """poll new data, then prepare and publish a frame, CPU time on the thread's clock"""
+        cpu_started = time.thread_time()
+        try:
+            data = stream.poll(timeout)
+            if data is not None:
+                started = time.perf_counter()
+                stream.publish(stream.prepare(data))
+                elapsed = time.perf_counter() - started
+                stream.prepare_time += stream.smoothing * (elapsed - stream.prepare_time)
+        except Exception as e:
+            print(f"Error preparing {stream.name} frame: {e}")
+        stream.cpu_time += time.thread_time() - cpu_started
+
+    def take(self):
+        """{name: frame} of the streams with a new frame since the last take, for the UI tick"""
+        frames = {}
+        for name, stream in self.streams.items():
+            image = stream.take()
+            if image is not None:
+                frames[name] = image
+        return frames
+
+    def stats(self):
+        """{name: StreamStats}, rates measured over the last complete stats interval"""
+        now = time.monotonic()
+        for name, stream in self.streams.items():
+            wall, cpu, frames, shown = self._marks.get(name, (now, 0.0, 0, 0))
+            elapsed = now - wall
+            if name in self._stats and elapsed < self.stats_interval:
+                self._stats[name].status = stream.status()
+                continue
+            elapsed = max(elapsed, 1e-9)
+            self._stats[name] = StreamStats(
+                name=name, target_fps=stream.target_fps,
+                fps=(stream.frames - frames) / elapsed, shown_fps=(stream.shown - shown) / elapsed,
+                cpu=(stream.cpu_time - cpu) / elapsed, prepare_time=stream.prepare_time,
+                skipped=stream.skipped, status=stream.status())
+            self._marks[name] = (now, stream.cpu_time, stream.frames, stream.shown)
+        if self._process_mark is not None and now - self._process_mark[0] >= self.stats_interval:
+            wall, cpu = self._process_mark
+            self.process_cpu = (time.process_time() - cpu) / (now - wall)
+            self._process_mark = (now, time.process_time())
+        return dict(self._stats)
+
+    def stop(self):
+        """Stop the ingest threads, each closes its source"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
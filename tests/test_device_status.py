@@ -0,0 +1,41 @@
+"""DeviceStatusChecker retry backoff and concurrent sweep"""
+import asyncio
+import time
+from Benchmarks.device_status import listener
+from utils import DeviceStatusChecker
+
+def test_backoff_sequence():
+    """online every interval, first offline retry after the interval, then doubling to the cap"""
+    checker = DeviceStatusChecker(devices={}, max_backoff=20)
+    assert checker.retry_delay(2, 0) == 2
+    assert [checker.retry_delay(2, failures) for failures in range(1, 7)] == [2, 4, 8, 16, 20, 20]
+
+def test_backoff_resets_when_online():
+    """a device back online is probed at its interval again"""
+    checker = DeviceStatusChecker(devices={}, max_backoff=20)
+    assert checker.retry_delay(2, 100) == 20
+    assert checker.retry_delay(2, 0) == 2
+
+def test_sweep_is_concurrent():
+    """online and hanging devices are told apart in about one timeout, not one per device"""
+    timeout = 0.5
+    sockets, devices = [], {}
+    for index in range(4):
+        unresponsive = index % 2 == 1
+        device_sockets = listener(unresponsive=unresponsive)
+        sockets += device_sockets
+        devices[f"{'offline' if unresponsive else 'online'}_{index}"] = {
+            "type": "ip", "address": "127.0.0.1",
+            "port": device_sockets[0].getsockname()[1], "interval": 1}
+    try:
+        checker = DeviceStatusChecker(devices, timeout=timeout)
+        start = time.perf_counter()
+        statuses = asyncio.run(checker.sweep())
+        elapsed = time.perf_counter() - start
+    finally:
+        for sock in sockets:
+            sock.close()
+    assert statuses == {"online_0": True, "offline_1": False,
+                        "online_2": True, "offline_3": False}
+    assert all(checker.get_status(device_id) == online for device_id, online in statuses.items())
+    assert elapsed < 1.5 * timeout
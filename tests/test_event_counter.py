@@ -0,0 +1,54 @@
+"""EventCounter with events outside the sensor"""
+import numpy as np
+from Algorithms.Event.event_counter import CountingLine, EventCounter
+from Sensors.event_stream import EVENT_DTYPE
+
+def events_of(x, y, t):
+    """events at the given coordinates and timestamps, all ON"""
+    events = np.empty(len(t), dtype=EVENT_DTYPE)
+    events["x"], events["y"], events["t"], events["p"] = x, y, t, 1
+    return events
+
+def test_events_outside_the_sensor_are_dropped():
+    """a 1280x720 stream fed to a 640x480 counter must not raise"""
+    rng = np.random.default_rng(0)
+    count = 20_000
+    events = events_of(rng.integers(0, 1280, count), rng.integers(0, 720, count),
+                       np.sort(rng.integers(0, 4000, count)))
+    counter = EventCounter(640, 480, lines=[CountingLine((320, 0), (320, 480), "middle")])
+    counter.process(events)
+    counter.flush()
+    assert counter.slices > 0
+
+def test_outside_events_do_not_change_the_clusters():
+    """a blob inside the sensor clusters the same with or without events outside it"""
+    rng = np.random.default_rng(1)
+    inside = events_of(rng.integers(100, 110, 500), rng.integers(100, 110, 500),
+                       np.sort(rng.integers(0, 1000, 500)))
+    outside = events_of(rng.integers(640, 1280, 500), rng.integers(480, 720, 500),
+                        inside["t"])
+    mixed = np.concatenate([inside, outside])
+    mixed = mixed[np.argsort(mixed["t"], kind="stable")]
+    clean, noisy = EventCounter(640, 480), EventCounter(640, 480)
+    clean.process(inside)
+    clean.flush()
+    noisy.process(mixed)
+    noisy.flush()
+    assert [c.centroid for c in noisy.clusters] == [c.centroid for c in clean.clusters]
+    assert len(clean.clusters) == 1
+
+def blob(rng, start, count=200):
+    """a 10x10 pixel blob at (100, 100) during the millisecond from start"""
+    return events_of(rng.integers(100, 110, count), rng.integers(100, 110, count),
+                     np.sort(rng.integers(start, start + 1000, count)))
+
+def test_tracks_age_by_time():
+    """a track is forgotten after max_missed slices of time, even with no events in between"""
+    rng = np.random.default_rng(2)
+    counter = EventCounter(640, 480, max_missed=10)
+    counter.process(np.concatenate([blob(rng, 0), blob(rng, 5000)]))
+    counter.flush()
+    assert list(counter.tracks) == [0]  # 5 ms apart, the same track
+    counter.process(blob(rng, 50_000))
+    counter.flush()
+    assert list(counter.tracks) == [1]  # 45 ms later, a new object
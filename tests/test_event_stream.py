@@ -0,0 +1,73 @@
+"""EventRingBuffer reads and wrap-around, and truncated UDP batches"""
+import socket
+import time
+import numpy as np
+from Sensors.event_stream import EVENT_DTYPE, EventReceiver, EventRingBuffer, pack_header
+
+def events_at(times):
+    """events with the given timestamps, x counting up"""
+    events = np.zeros(len(times), dtype=EVENT_DTYPE)
+    events["t"] = times
+    events["x"] = np.arange(len(times))
+    return events
+
+def test_read_since_cursor():
+    """a reader gets exactly the events written after its cursor"""
+    buffer = EventRingBuffer(capacity=16)
+    buffer.write(events_at(range(5)))
+    events, cursor, lost = buffer.read(0)
+    assert list(events["t"]) == [0, 1, 2, 3, 4] and cursor == 5 and lost == 0
+    buffer.write(events_at(range(5, 8)))
+    events, cursor, lost = buffer.read(cursor)
+    assert list(events["t"]) == [5, 6, 7] and cursor == 8 and lost == 0
+    events, cursor, _ = buffer.read(cursor)
+    assert len(events) == 0 and cursor == 8
+
+def test_wrap_around():
+    """writes across the end of the ring come back in order, a slow reader counts its losses"""
+    buffer = EventRingBuffer(capacity=16)
+    buffer.write(events_at(range(12)))
+    buffer.write(events_at(range(12, 22)))  # wraps, the first 6 are overwritten
+    events, cursor, lost = buffer.read(0)
+    assert list(events["t"]) == list(range(6, 22)) and cursor == 22 and lost == 6
+    buffer.write(events_at(range(22, 62)))  # more than the capacity at once
+    events, _, _ = buffer.read(cursor)
+    assert list(events["t"]) == list(range(46, 62))
+
+def test_latest():
+    """the events of the last duration before the newest, also across the wrap"""
+    buffer = EventRingBuffer(capacity=64)
+    assert len(buffer.latest(10)) == 0
+    buffer.write(events_at(np.arange(0, 500, 10)))
+    assert list(buffer.latest(30, tail=2)["t"]) == [470, 480, 490]
+    buffer.write(events_at(np.arange(500, 800, 10)))  # head wraps past the capacity
+    assert list(buffer.latest(45)["t"]) == [750, 760, 770, 780, 790]
+    assert list(buffer.latest(10_000)["t"]) == list(range(160, 800, 10))
+
+def test_truncated_datagram_is_a_lost_batch():
+    """a datagram shorter than its header says is dropped and counted as lost"""
+    receiver = EventReceiver("127.0.0.1", free_udp_port(), protocol="udp", timeout=0.1).start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        wait_for(lambda: receiver.connected)
+        batch = events_at(range(10)).tobytes()
+        for seq, payload in enumerate((batch, batch[:-1], batch)):
+            sender.sendto(pack_header(seq, 10, 640, 480) + payload, ("127.0.0.1", receiver.port))
+        wait_for(lambda: receiver.batches_received == 2)
+    finally:
+        sender.close()
+        receiver.stop()
+    assert receiver.events_received == 20
+    assert receiver.batches_lost == 1
+
+def free_udp_port():
+    """a UDP port nobody listens on"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for(condition, timeout=2.0):
+    """poll until condition() holds or timeout seconds have passed"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
@@ -0,0 +1,21 @@
+"""PointCloudBuffers with empty frames"""
+import numpy as np
+from Algorithms.Lidar.point_cloud import PointCloudBuffers
+
+def test_empty_frame():
+    """an empty frame gives empty buffers and keeps the colour range"""
+    buffers = PointCloudBuffers(max_points=1000)
+    rng = np.random.default_rng(0)
+    buffers.update(rng.uniform(-5, 5, (500, 3)).astype(np.float32))
+    z_range = (buffers.min_z, buffers.max_z)
+    positions, colours, sizes = buffers.update(np.empty((0, 3), dtype=np.float32))
+    assert positions.shape == (0, 3) and colours.shape == (0, 4) and sizes.shape == (0,)
+    assert (buffers.min_z, buffers.max_z) == z_range
+
+def test_empty_first_frame():
+    """the first frame of a replay may be empty, the next one sets the range"""
+    buffers = PointCloudBuffers(max_points=1000)
+    buffers.update(np.empty((0, 3), dtype=np.float32))
+    assert buffers.min_z is None
+    _, colours, _ = buffers.update(np.array([[0, 0, 0], [1, 1, 2]], dtype=np.float32))
+    assert colours.shape == (2, 4)
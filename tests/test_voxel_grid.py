@@ -0,0 +1,41 @@
+"""VoxelDownsampler keeps sparse voxels of dense frames"""
+import numpy as np
+from Algorithms.Lidar.voxel_grid import VoxelDownsampler
+
+def scene(rng, near=990_000, clusters=1000, cluster_points=2):
+    """dense points near the sensor and small far clusters, with the clusters' centres"""
+    dense = np.column_stack([rng.uniform(-10, 10, (near, 2)), rng.uniform(0, 2, near)])
+    angle = rng.uniform(0, 2 * np.pi, clusters)
+    distance = rng.uniform(40, 100, clusters)
+    centres = np.column_stack([distance * np.cos(angle), distance * np.sin(angle),
+                               rng.uniform(0, 5, clusters)])
+    far = np.repeat(centres, cluster_points, axis=0) \
+        + rng.normal(0, 0.02, (clusters * cluster_points, 3))
+    return np.vstack([dense, far]).astype(np.float32), centres
+
+def surviving(kept, centres, radius=0.5):
+    """how many clusters still have a point within radius of their centre"""
+    far = kept[np.hypot(kept[:, 0], kept[:, 1]) > 30]
+    found = 0
+    for centre in centres:
+        found += bool(len(far)) and np.min(np.linalg.norm(far - centre, axis=1)) < radius
+    return found
+
+def test_far_clusters_survive():
+    """every point is hashed, so only hash collisions can lose a sparse voxel"""
+    positions, centres = scene(np.random.default_rng(0))
+    downsampler = VoxelDownsampler(voxel_size=0.3, max_points=100_000)
+    kept = downsampler.downsample(positions)
+    assert len(kept) <= 100_000
+    assert surviving(kept, centres) >= 900
+    strided = VoxelDownsampler(voxel_size=0.3, max_points=100_000, oversample=2)
+    assert surviving(strided.downsample(positions), centres) < 700
+
+def test_over_budget_grows_the_voxels():
+    """a frame over budget is hashed again with larger voxels instead of thinned"""
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-50, 50, (500_000, 3)).astype(np.float32)
+    downsampler = VoxelDownsampler(voxel_size=0.05, max_points=50_000)
+    kept = downsampler.downsample(positions)
+    assert len(kept) <= 50_000
+    assert downsampler.voxel_size > 0.05
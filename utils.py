@@ -1,11 +1,11 @@
 """helper functions used throughout"""
-import socket
+import asyncio
 import threading
-import time
-import cv2
 from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel
 from PyQt5.QtSvg import QSvgWidget
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtGui import QPixmap
+from Sensors.capture import CameraBroker
 
 def load_stylesheet(window,style_sheet_path):
     """Load the stylesheet for the page."""
@@ -16,79 +16,173 @@ def close_event(event, widget):
     """Handle cleanup when closing a page"""
     if hasattr(widget, "cap"):  # Ensure widget has a video capture instance
         widget.cap.release()
+    if hasattr(widget, "source"):  # Threaded capture source
+        widget.source.release()
     if hasattr(widget, "timer"):  # Stop the timer if it exists
         widget.timer.stop()
+    if hasattr(widget, "worker"):  # Stop the inference worker if it exists
+        widget.worker.stop()
     event.accept()
 
-class DeviceStatusChecker:
-    """Check if sensors are connected"""
-    def __init__(self):
-        self.devices={
+class DeviceStatusChecker(QObject):
+    """
+    Check if sensors are connected. Every device is probed concurrently on an
+    asyncio loop in a background thread, at its own interval. Devices that stay
+    offline are retried with exponential backoff, and status changes are
+    pushed through the status_changed signal.
+    """
+    status_changed = pyqtSignal(str, bool)  # device id, online
+
+    def __init__(self, devices=None, timeout=0.5, max_backoff=20):
+        super().__init__()
+        # interval: seconds between probes while online, and the first retry when offline
+        self.devices = devices if devices is not None else {
             #"hdr_rgb":{"type":"ip","address":"169.254.186.74","port":135},
-            "rgb":{"type":"usb","display_name":"RGB Camera"},
-            "lidar":{"type":"ip","address":"169.254.65.122","port":135},
-            "thermal":{"type":"ip","address":"192.168.2.1","port":135},
-            "event":{"type":"ip","address":"169.254.10.1","port":135}
+            "rgb":{"type":"usb","display_name":"RGB Camera","index":0,"interval":10},
+            "lidar":{"type":"ip","address":"169.254.65.122","port":135,"interval":2},
+            "thermal":{"type":"ip","address":"192.168.2.1","port":135,"interval":2},
+            "event":{"type":"ip","address":"169.254.10.1","port":135,"interval":2}
         }
+        self.timeout = timeout  # seconds a connection attempt may take
+        self.max_backoff = max_backoff  # longest wait between probes of an offline device
         self.device_statuses = {}
         self.status_lock = threading.Lock()
-        self.check_interval = 5  # seconds between checks
-        self._stop_event = threading.Event()
-        self._thread = threading.Thread(target=self._background_check, daemon=True)
-        self._thread.start()
-
-    def _background_check(self):
-        while not self._stop_event.is_set():
-            self._update_all_statuses()
-            #debug print,remove later
-            print("[DeviceStatusChecker] Updated statuses:")
-            for ip, status in self.device_statuses.items():
-                print(f"  {ip}: {'Online' if status else 'Offline'}")
-            time.sleep(self.check_interval)
-
-    def _update_all_statuses(self):
-        statuses={}
-        for device_id, config in self.devices.items():
-            if config["type"]=="usb":
-                statuses[device_id]=self._check_webcam_available()
-            elif config["type"]=="ip":
-                statuses[device_id] = self._check_device_connection(
-                    config["address"],config.get("port",135)
-                )
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+
+    def start(self):
+        """Start probing, connect status_changed first to receive the first results"""
+        if self._thread is None:
+            self._loop = asyncio.new_event_loop()
+            self._stopped = asyncio.Event()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        self._loop.run_until_complete(self._watch_all())
+        self._loop.run_until_complete(self._loop.shutdown_default_executor())
+        self._loop.close()
+
+    async def _watch_all(self):
+        watchers = [asyncio.ensure_future(self._watch(device_id, config))
+                    for device_id, config in self.devices.items()]
+        await self._stopped.wait()
+        for watcher in watchers:
+            watcher.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
 
+    async def _watch(self, device_id, config):
+        """probe one device forever, backing off while it is offline"""
+        interval = config.get("interval", 5)
+        failures = 0  # probes in a row that found the device offline
+        while True:
+            online = await self.probe(config)
+            self._set_status(device_id, online)
+            failures = 0 if online else failures + 1
+            await asyncio.sleep(self.retry_delay(interval, failures))
+
+    def retry_delay(self, interval, failures):
+        """
+        Seconds until the next probe after failures offline probes in a row: the
+        interval while online and for the first retry, then doubling up to max_backoff
+        """
+        if failures <= 1:
+            return interval
+        return min(interval * 2 ** min(failures - 1, 30), self.max_backoff)
+
+    async def probe(self, config):
+        """Check one device, True if it is connected"""
+        if config["type"] == "usb":
+            # Blocking OpenCV call, run off the event loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._check_webcam_available, config.get("index", 0))
+        return await self._check_device_connection(config["address"], config.get("port", 135))
+
+    async def sweep(self):
+        """Probe every device once, concurrently, returns {device id: online}"""
+        results = await asyncio.gather(*(self.probe(config) for config in self.devices.values()))
+        for device_id, online in zip(self.devices, results):
+            self._set_status(device_id, online)
+        return dict(zip(self.devices, results))
+
+    def _set_status(self, device_id, online):
+        """store a probe result, emitting status_changed if it differs"""
         with self.status_lock:
-            self.device_statuses = statuses
-    
-    def _check_device_connection(self, ip, port=135, timeout=0.5):
+            changed = self.device_statuses.get(device_id) != online
+            self.device_statuses[device_id] = online
+        if changed:
+            self.status_changed.emit(device_id, online)
+
+    async def _check_device_connection(self, ip, port=135):
         """Check if a device is connected by attempting a socket connection."""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = sock.connect_ex((ip, port))
-            sock.close()
-            return result == 0
-        except:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), self.timeout)
+            writer.close()
+            return True
+        except (OSError, asyncio.TimeoutError):
             return False
-        
-    def _check_webcam_available(self):
-        """Check if a USB webcam is available."""
-        try:
-            cap = cv2.VideoCapture(0)
-            is_opened = cap.isOpened()
-            cap.release()
-            return is_opened
-        except Exception:
-            return False
-            
+
+    def _check_webcam_available(self, index=0):
+        """Check if a USB webcam is available, without reopening it if a page holds it."""
+        return CameraBroker.shared().probe(index)
+
     def get_status(self, device_id):
         """Get the current status of a device."""
         with self.status_lock:
             return self.device_statuses.get(device_id, False)
-    
+
     def stop(self):
         """Stop the background thread."""
-        self._stop_event.set()
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopped.set)
         self._thread.join(timeout=1)
+        self._thread = None
+
+class IconCache:
+    """
+    Icons decoded from disk and scaled once per size, kept for the whole
+    application so pages never read or decode an image per frame
+    """
+    _pixmaps = {}  # Class-level (path, width, height) -> QPixmap, shared by every page
+
+    @classmethod
+    def get(cls, path, size):
+        """pixmap of path scaled to fit size (a QSize), decoded on first use"""
+        key = (path, size.width(), size.height())
+        pixmap = cls._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(path)
+            if pixmap.isNull():
+                print(f"Warning: Could not load icon {path}")
+            else:
+                pixmap = pixmap.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            cls._pixmaps[key] = pixmap
+        return pixmap
+
+    @classmethod
+    def load(cls, paths, size):
+        """{label: path} to {label: pixmap} at size, skipping icons that failed to load"""
+        icons = {label: cls.get(path, size) for label, path in paths.items()}
+        return {label: pixmap for label, pixmap in icons.items() if not pixmap.isNull()}
+
+    @classmethod
+    def blank(cls, size):
+        """white pixmap of size, shown when nothing is recognised"""
+        key = (None, size.width(), size.height())
+        if key not in cls._pixmaps:
+            pixmap = QPixmap(size)
+            pixmap.fill(Qt.white)
+            cls._pixmaps[key] = pixmap
+        return cls._pixmaps[key]
+
+def set_icon(label, key, pixmap):
+    """setPixmap only when the icon shown by a label changes, key names the icon"""
+    if label.property("icon_key") != key:
+        label.setProperty("icon_key", key)
+        label.setPixmap(pixmap)
 
 class QRCodeWidget(QWidget):
     """Reusable QR Code Widget"""